@@ -30,6 +30,15 @@ options:
     required: false
     default: null
     aliases: ['elb_ids', 'ec2_elbs']
+  gather:
+    description:
+      - Details to look up besides the load balancer descriptions. C(tags) are fetched for 20 ELBs per
+        call, C(instance_health) costs one call per ELB with instances. Details that are not gathered
+        are left out of the result.
+    required: false
+    default: [ 'tags', 'instance_health' ]
+    choices: [ 'tags', 'instance_health' ]
+    version_added: "2.3"
 extends_documentation_fragment:
     - aws
     - ec2
@@ -72,16 +81,45 @@ EXAMPLES = '''
     msg: "{{ item.dns_name }}"
   with_items: elb_facts.elbs
 
+# Gather the descriptions of all ELBs only, without tags or instance health
+- action:
+    module: ec2_elb_facts
+    gather: []
+  register: elb_facts
+
 '''
 
 try:
     import boto.ec2.elb
     from boto.ec2.tag import Tag
     from boto.exception import BotoServerError
+    from boto.resultset import ResultSet
     HAS_BOTO = True
 except ImportError:
     HAS_BOTO = False
 
+# Most load balancer names passed to one DescribeTags or DescribeLoadBalancers call
+NAMES_PER_CALL = 20
+GATHER_ALL = ['tags', 'instance_health']
+
+
+class TagDescription(object):
+    """ Tags of one ELB in a DescribeTags response """
+
+    def __init__(self, connection=None):
+        self.LoadBalancerName = None
+        self.Tags = ResultSet([('member', Tag)])
+
+    def startElement(self, name, attrs, connection):
+        if name == 'Tags':
+            return self.Tags
+        return None
+
+    def endElement(self, name, value, connection):
+        if name == 'LoadBalancerName':
+            self.LoadBalancerName = value
+
+
 class ElbInformation(object):
     """ Handles ELB information """
 
@@ -89,21 +127,29 @@ class ElbInformation(object):
                  module,
                  names,
                  region,
+                 gather=GATHER_ALL,
                  **aws_connect_params):
 
         self.module = module
         self.names = names
+        self.gather = gather
         self.region = region
         self.aws_connect_params = aws_connect_params
         self.connection = self._get_elb_connection()
 
-    def _get_tags(self, elbname):
-        params = {'LoadBalancerNames.member.1': elbname}
+    def _get_tags(self, elbnames):
+        """ Tags of up to NAMES_PER_CALL ELBs, by ELB name """
+        params = {}
+        self.connection.build_list_params(params, elbnames, 'LoadBalancerNames.member.%d')
         try:
-            elb_tags = self.connection.get_list('DescribeTags', params, [('member', Tag)])
-            return dict((tag.Key, tag.Value) for tag in elb_tags if hasattr(tag, 'Key'))
+            descriptions = self.connection.get_list('DescribeTags', params, [('member', TagDescription)])
         except:
             return {}
+        tags = {}
+        for description in descriptions:
+            tags[description.LoadBalancerName] = dict((tag.Key, getattr(tag, 'Value', ''))
+                                                      for tag in description.Tags if hasattr(tag, 'Key'))
+        return tags
 
     def _get_elb_connection(self):
         try:
@@ -170,17 +216,20 @@ class ElbInformation(object):
             'security_groups': elb.security_groups,
             'health_check': self._get_health_check(elb.health_check),
             'subnets': elb.subnets,
-            'instances_inservice': [],
-            'instances_inservice_count': 0,
-            'instances_outofservice': [],
-            'instances_outofservice_count': 0,
-            'instances_inservice_percent': 0.0,
-            'tags': self._get_tags(elb.name)
         }
 
         if elb.vpc_id:
             elb_info['vpc_id'] = elb.vpc_id
 
+        if 'instance_health' not in self.gather:
+            return elb_info
+
+        elb_info['instances_inservice'] = []
+        elb_info['instances_inservice_count'] = 0
+        elb_info['instances_outofservice'] = []
+        elb_info['instances_outofservice_count'] = 0
+        elb_info['instances_inservice_percent'] = 0.0
+
         if elb.instances:
             try:
                 instance_health = self.connection.describe_instance_health(elb.name)
@@ -196,25 +245,64 @@ class ElbInformation(object):
         return elb_info
 
 
+    def _get_load_balancers(self, names=None):
+        """ Follows the pages of DescribeLoadBalancers """
+        elbs = []
+        marker = None
+        while True:
+            result = self.connection.get_all_load_balancers(load_balancer_names=names, marker=marker)
+            elbs.extend(result)
+            marker = getattr(result, 'next_marker', None)
+            if not marker:
+                return elbs
+
+    def _get_named_load_balancers(self):
+        """ Asks for the ELBs by name, skipping the names that don't exist """
+        elbs = []
+        for i in range(0, len(self.names), NAMES_PER_CALL):
+            names = self.names[i:i + NAMES_PER_CALL]
+            try:
+                elbs.extend(self._get_load_balancers(names))
+            except BotoServerError as err:
+                if err.error_code != 'LoadBalancerNotFound':
+                    raise
+                # One unknown name fails the whole call, retry them one by one
+                for name in names:
+                    try:
+                        elbs.extend(self._get_load_balancers([name]))
+                    except BotoServerError as err:
+                        if err.error_code != 'LoadBalancerNotFound':
+                            raise
+        return elbs
+
     def list_elbs(self):
         elb_array = []
 
         try:
-            all_elbs = self.connection.get_all_load_balancers()
+            if self.names:
+                all_elbs = self._get_named_load_balancers()
+            else:
+                all_elbs = self._get_load_balancers()
         except BotoServerError as err:
             self.module.fail_json(msg = "%s: %s" % (err.error_code, err.error_message))
 
-        if all_elbs:
-            for existing_lb in all_elbs:
-                if existing_lb.name in self.names:
-                    elb_array.append(self._get_elb_info(existing_lb))
+        for existing_lb in all_elbs:
+            elb_array.append(self._get_elb_info(existing_lb))
+
+        if 'tags' in self.gather:
+            for i in range(0, len(elb_array), NAMES_PER_CALL):
+                batch = elb_array[i:i + NAMES_PER_CALL]
+                tags = self._get_tags([elb_info['name'] for elb_info in batch])
+                for elb_info in batch:
+                    elb_info['tags'] = tags.get(elb_info['name'], {})
 
         return elb_array
 
 def main():
     argument_spec = ec2_argument_spec()
     argument_spec.update(dict(
-            names={'default': None, 'type': 'list'}
+            names={'default': None, 'type': 'list'},
+            gather={'default': GATHER_ALL, 'type': 'list'}
         )
     )
     module = AnsibleModule(argument_spec=argument_spec)
@@ -228,9 +316,15 @@ def main():
         module.fail_json(msg="region must be specified")
 
     names = module.params['names']
+    gather = module.params['gather']
+    for item in gather:
+        if item not in GATHER_ALL:
+            module.fail_json(msg="gather items must be one of: %s" % ', '.join(GATHER_ALL))
+
     elb_information = ElbInformation(module,
                               names,
                               region,
+                              gather,
                               **aws_connect_params)
 
     ec2_facts_result = dict(changed=False,
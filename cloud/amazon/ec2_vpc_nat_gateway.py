@@ -203,6 +203,14 @@ nat_gateway_addresses:
           'allocation_id': 'eipalloc-12345'
       }
   ]
+wait_stats:
+  description: Number of state polls made while waiting, and the seconds they took.
+  returned: always
+  type: dict
+  sample: {
+      "polls": 9,
+      "elapsed": 84.5
+  }
 '''
 
 try:
@@ -388,6 +396,51 @@ def get_nat_gateways(client, subnet_id=None, nat_gateway_id=None,
     return gateways_retrieved, err_msg, existing_gateways
 
 
+# Polls made and seconds spent by wait_with_backoff, returned as wait_stats
+WAIT_STATS = {'polls': 0, 'elapsed': 0.0}
+
+
+def wait_with_backoff(poll, wait_timeout, delay=1, max_delay=30):
+    """Call poll until it reports a final state or wait_timeout is reached,
+    sleeping with jittered exponential backoff between the calls.
+    Args:
+        poll (callable): Returns a Tuple (bool, str, object), where the bool
+            is True once the expected state is reached, False on a terminal
+            failure and None to keep waiting.
+        wait_timeout (int): Number of seconds to wait, until this timeout is reached.
+
+    Kwargs:
+        delay (int): Seconds between the first two polls, doubled after every poll.
+            default=1
+        max_delay (int): Most seconds between two polls.
+            default=30
+
+    Basic Usage:
+        >>> wait_with_backoff(lambda: (True, '', {}), 300)
+        (True, '', {})
+
+    Returns:
+        Tuple (bool, str, object), done is None when the timeout was reached
+    """
+    start = time.time()
+    deadline = start + wait_timeout
+    done, err_msg, result = None, '', None
+    while time.time() < deadline:
+        WAIT_STATS['polls'] += 1
+        done, err_msg, result = poll()
+        if done is not None:
+            break
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            break
+        # Equal jitter, so that parallel waiters drift apart
+        time.sleep(min(delay / 2.0 + random.uniform(0, delay / 2.0), remaining))
+        delay = min(delay * 2, max_delay)
+    WAIT_STATS['elapsed'] += time.time() - start
+
+    return done, err_msg, result
+
+
 def wait_for_status(client, wait_timeout, nat_gateway_id, status,
                     check_mode=False):
     """Wait for the NAT Gateway to reach a status
@@ -427,14 +480,9 @@ def wait_for_status(client, wait_timeout, nat_gateway_id, status,
     Returns:
         Tuple (bool, str, dict)
     """
-    polling_increment_secs = 5
-    wait_timeout = time.time() + wait_timeout
-    status_achieved = False
-    nat_gateway = dict()
     states = ['pending', 'failed', 'available', 'deleting', 'deleted']
-    err_msg = ""
 
-    while wait_timeout > time.time():
+    def poll():
         try:
             gws_retrieved, err_msg, nat_gateways = (
                 get_nat_gateways(
@@ -442,33 +490,39 @@ def wait_for_status(client, wait_timeout, nat_gateway_id, status,
                     states=states, check_mode=check_mode
                 )
             )
-            if gws_retrieved and nat_gateways:
-                nat_gateway = nat_gateways[0]
-                if check_mode:
-                    nat_gateway['state'] = status
+        except botocore.exceptions.ClientError as e:
+            return None, str(e), dict()
 
-                if nat_gateway.get('state') == status:
-                    status_achieved = True
-                    break
+        if gws_retrieved and nat_gateways:
+            nat_gateway = nat_gateways[0]
+            if check_mode:
+                nat_gateway['state'] = status
 
-                elif nat_gateway.get('state') == 'failed':
-                    err_msg = nat_gateway.get('failure_message')
-                    break
+            if nat_gateway.get('state') == status:
+                return True, err_msg, nat_gateway
 
-                elif nat_gateway.get('state') == 'pending':
-                    if 'failure_message' in nat_gateway:
-                        err_msg = nat_gateway.get('failure_message')
-                        status_achieved = False
-                        break
+            elif nat_gateway.get('state') == 'failed':
+                return False, nat_gateway.get('failure_message'), nat_gateway
 
-            else:
-                time.sleep(polling_increment_secs)
+            elif nat_gateway.get('state') == 'pending':
+                if 'failure_message' in nat_gateway:
+                    return False, nat_gateway.get('failure_message'), nat_gateway
 
-        except botocore.exceptions.ClientError as e:
-            err_msg = str(e)
+            return None, err_msg, nat_gateway
+
+        return None, err_msg, dict()
 
-    if not status_achieved:
+    status_achieved, err_msg, nat_gateway = (
+        wait_with_backoff(poll, wait_timeout)
+    )
+    if nat_gateway is None:
+        nat_gateway = dict()
+
+    if status_achieved is None:
+        status_achieved = False
         err_msg = "Wait time out reached, while waiting for results"
+    elif not status_achieved:
+        err_msg = err_msg or "Failed while waiting for status {0}".format(status)
 
     return status_achieved, err_msg, nat_gateway
 
@@ -1068,13 +1122,18 @@ def main():
                 )
             )
 
+    wait_stats = dict(
+        polls=WAIT_STATS['polls'], elapsed=round(WAIT_STATS['elapsed'], 2)
+    )
     if not success:
         module.fail_json(
-            msg=err_msg, success=success, changed=changed
+            msg=err_msg, success=success, changed=changed,
+            wait_stats=wait_stats
         )
     else:
         module.exit_json(
-            msg=err_msg, success=success, changed=changed, **results
+            msg=err_msg, success=success, changed=changed,
+            wait_stats=wait_stats, **results
         )
 
 # import module snippets
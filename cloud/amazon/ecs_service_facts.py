@@ -41,7 +41,8 @@ options:
         default: 'default'
     service:
         description:
-            - The service to get details for (required if details is true)
+            - The service to get details for, or a comma separated list of services.
+            - When details is true and no service is given, all the services of the cluster are described.
         required: false
 extends_documentation_fragment:
     - aws
@@ -60,6 +61,11 @@ EXAMPLES = '''
 # Basic listing example
 - ecs_service_facts:
     cluster: test-cluster
+
+# Describe every service of the cluster
+- ecs_service_facts:
+    cluster: test-cluster
+    details: true
 '''
 
 RETURN = '''
@@ -139,6 +145,20 @@ try:
 except ImportError:
     HAS_BOTO3 = False
 
+import threading
+import time
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+# Most services accepted by one DescribeServices call
+DESCRIBE_SERVICES_MAX = 10
+# Most ARNs returned by one ListServices call
+LIST_SERVICES_MAX = 100
+DESCRIBE_WORKERS = 8
+THROTTLING_ERRORS = ('ThrottlingException', 'Throttling', 'RequestLimitExceeded')
+
 class EcsServiceManager:
     """Handles ECS Services"""
 
@@ -164,22 +184,39 @@ class EcsServiceManager:
     # 'clusters': []}
 
     def list_services(self, cluster):
-        fn_args = dict()
+        fn_args = dict(maxResults=LIST_SERVICES_MAX)
         if cluster and cluster is not None:
             fn_args['cluster'] = cluster
-        response = self.ecs.list_services(**fn_args)
-        relevant_response = dict(services = response['serviceArns'])
+        services = []
+        while True:
+            response = call_with_backoff(self.ecs.list_services, **fn_args)
+            services.extend(response['serviceArns'])
+            if not response.get('nextToken'):
+                break
+            fn_args['nextToken'] = response['nextToken']
+        relevant_response = dict(services = services)
         return relevant_response
 
     def describe_services(self, cluster, services):
         fn_args = dict()
         if cluster and cluster is not None:
             fn_args['cluster'] = cluster
-        fn_args['services']=services.split(",")
-        response = self.ecs.describe_services(**fn_args)
-        relevant_response = dict(services = map(self.extract_service_from, response['services']))
-        if 'failures' in response and len(response['failures'])>0:
-            relevant_response['services_not_running'] = response['failures']
+        if isinstance(services, basestring):
+            services = services.split(",")
+        chunks = [services[i:i + DESCRIBE_SERVICES_MAX] for i in range(0, len(services), DESCRIBE_SERVICES_MAX)]
+        responses = [None] * len(chunks)
+
+        def describe(i):
+            responses[i] = call_with_backoff(self.ecs.describe_services, services=chunks[i], **fn_args)
+
+        run_concurrently(describe, range(len(chunks)), DESCRIBE_WORKERS)
+        relevant_response = dict(services = [])
+        failures = []
+        for response in responses:
+            relevant_response['services'].extend(map(self.extract_service_from, response['services']))
+            failures.extend(response.get('failures', []))
+        if len(failures)>0:
+            relevant_response['services_not_running'] = failures
         return relevant_response
 
     def extract_service_from(self, service):
@@ -197,6 +234,52 @@ class EcsServiceManager:
                     e['createdAt'] = str(e['createdAt'])
         return service
 
+
+def call_with_backoff(method, **kwargs):
+    """
+    Calls an API method, retrying with a doubling delay while it is throttled
+    """
+    wait = 1
+    while True:
+        try:
+            return method(**kwargs)
+        except botocore.exceptions.ClientError as e:
+            if e.response['Error']['Code'] in THROTTLING_ERRORS and wait < 600:
+                time.sleep(wait)
+                wait = wait * 2
+                continue
+            raise
+
+
+def run_concurrently(func, items, workers):
+    """
+    Calls func for every item from a pool of threads, raising the first
+    error once all of them are done
+    """
+    pending = queue.Queue()
+    for item in items:
+        pending.put(item)
+    errors = []
+
+    def worker():
+        while not errors:
+            try:
+                item = pending.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                func(item)
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=worker) for i in range(max(1, min(workers, len(items))))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+
 def main():
 
     argument_spec = ec2_argument_spec()
@@ -218,9 +301,11 @@ def main():
 
     task_mgr = EcsServiceManager(module)
     if show_details:
-        if 'service' not in module.params or not module.params['service']:
-            module.fail_json(msg="service must be specified for ecs_service_facts")
-        ecs_facts = task_mgr.describe_services(module.params['cluster'], module.params['service'])
+        if module.params.get('service'):
+            services = module.params['service']
+        else:
+            services = task_mgr.list_services(module.params['cluster'])['services']
+        ecs_facts = task_mgr.describe_services(module.params['cluster'], services)
     else:
         ecs_facts = task_mgr.list_services(module.params['cluster'])
 
@@ -50,6 +50,25 @@ options:
                     - SecurityGroups - Optional. List of security group IDs, of the form "sg-xxxxxxxx". These must be for the same VPC as subnet specified.
         required: false
         default: None
+    gather:
+        description:
+            - Attributes to look up for every file system, each costing API calls per file system
+              (or per mount target for C(security_groups)). Use an empty list to only get what
+              the file system listing returns.
+            - C(tags) is always looked up when filtering on C(tags), and C(mount_targets) and
+              C(security_groups) when filtering on C(targets). C(security_groups) implies
+              C(mount_targets).
+        required: false
+        default: [ tags, mount_targets, security_groups ]
+        choices: [ tags, mount_targets, security_groups ]
+        version_added: "2.3"
+    workers:
+        description:
+            - Number of file systems whose attributes are looked up at the same time. Each worker
+              uses its own connection.
+        required: false
+        default: 8
+        version_added: "2.3"
 extends_documentation_fragment:
     - aws
 '''
@@ -65,6 +84,10 @@ EXAMPLES = '''
 - efs_facts:
     id: fs-1234abcd
 
+# List the file systems only, in one paginated call
+- efs_facts:
+    gather: []
+
 # Searching all EFS instances with tag Name = 'myTestNameTag', in subnet 'subnet-1a2b3c4d' and with security group 'sg-4d3c2b1a'
 - efs_facts:
     tags:
@@ -162,8 +185,13 @@ tags:
 '''
 
 
+import threading
 from time import sleep
 from collections import defaultdict
+try:
+    import Queue as queue
+except ImportError:
+    import queue
 
 try:
     from botocore.exceptions import ClientError
@@ -172,6 +200,11 @@ try:
 except ImportError as e:
     HAS_BOTO3 = False
 
+GATHER_ALL = ['tags', 'mount_targets', 'security_groups']
+DEFAULT_WORKERS = 8
+THROTTLING_ERRORS = ('ThrottlingException', 'Throttling', 'RequestLimitExceeded')
+
+
 class EFSConnection(object):
     STATE_CREATING = 'creating'
     STATE_AVAILABLE = 'available'
@@ -179,24 +212,40 @@ class EFSConnection(object):
     STATE_DELETED = 'deleted'
 
     def __init__(self, module, region, **aws_connect_params):
+        self.module = module
+        self.region = region
+        self.aws_connect_params = aws_connect_params
+        self.local = threading.local()
         try:
-            self.connection = boto3_conn(module, conn_type='client',
-                                         resource='efs', region=region,
-                                         **aws_connect_params)
+            self.local.connection = self.connect()
         except Exception as e:
             module.fail_json(msg="Failed to connect to AWS: %s" % str(e))
 
-        self.region = region
+    def connect(self):
+        return boto3_conn(self.module, conn_type='client',
+                          resource='efs', region=self.region,
+                          **self.aws_connect_params)
+
+    @property
+    def connection(self):
+        """
+         Client of the current thread, boto3 sessions are not thread safe
+        """
+        if getattr(self.local, 'connection', None) is None:
+            self.local.connection = self.connect()
+        return self.local.connection
 
-    def get_file_systems(self, **kwargs):
+    def get_file_systems(self, gather=GATHER_ALL, workers=DEFAULT_WORKERS, **kwargs):
         """
-         Returns generator of file systems including all attributes of FS
+         Returns generator of file systems including the gathered attributes of FS
         """
-        items = iterate_all(
+        items = list(iterate_all(
             'FileSystems',
             self.connection.describe_file_systems,
             **kwargs
-        )
+        ))
+        if gather:
+            run_concurrently(lambda item: self.gather(item, gather), items, workers)
         for item in items:
             item['CreationTime'] = str(item['CreationTime'])
             """
@@ -206,14 +255,26 @@ class EFSConnection(object):
             item['MountPoint'] = '.%s.efs.%s.amazonaws.com:/' % (item['FileSystemId'], self.region)
             if 'Timestamp' in item['SizeInBytes']:
                 item['SizeInBytes']['Timestamp'] = str(item['SizeInBytes']['Timestamp'])
-            if item['LifeCycleState'] == self.STATE_AVAILABLE:
-                item['Tags'] = self.get_tags(FileSystemId=item['FileSystemId'])
-                item['MountTargets'] = list(self.get_mount_targets(FileSystemId=item['FileSystemId']))
-            else:
-                item['Tags'] = {}
-                item['MountTargets'] = []
             yield item
 
+    def gather(self, item, gather):
+        """
+         Looks up the requested attributes of a file system
+        """
+        available = item['LifeCycleState'] == self.STATE_AVAILABLE
+        if 'tags' in gather:
+            item['Tags'] = {}
+            if available:
+                item['Tags'] = self.get_tags(FileSystemId=item['FileSystemId'])
+        # Security groups are looked up per mount target
+        if 'mount_targets' in gather or 'security_groups' in gather:
+            item['MountTargets'] = []
+            if available:
+                item['MountTargets'] = list(self.get_mount_targets(
+                    'security_groups' in gather,
+                    FileSystemId=item['FileSystemId']
+                ))
+
     def get_tags(self, **kwargs):
         """
          Returns tag list for selected instance of EFS
@@ -225,7 +286,7 @@ class EFSConnection(object):
         )
         return dict((tag['Key'], tag['Value']) for tag in tags)
 
-    def get_mount_targets(self, **kwargs):
+    def get_mount_targets(self, security_groups=True, **kwargs):
         """
          Returns mount targets for selected instance of EFS
         """
@@ -235,12 +296,13 @@ class EFSConnection(object):
             **kwargs
         )
         for target in targets:
-            if target['LifeCycleState'] == self.STATE_AVAILABLE:
-                target['SecurityGroups'] = list(self.get_security_groups(
-                    MountTargetId=target['MountTargetId']
-                ))
-            else:
-                target['SecurityGroups'] = []
+            if security_groups:
+                if target['LifeCycleState'] == self.STATE_AVAILABLE:
+                    target['SecurityGroups'] = list(self.get_security_groups(
+                        MountTargetId=target['MountTargetId']
+                    ))
+                else:
+                    target['SecurityGroups'] = []
             yield target
 
     def get_security_groups(self, **kwargs):
@@ -259,21 +321,59 @@ def iterate_all(attr, map_method, **kwargs):
      Method creates iterator from boto result set
     """
     args = dict((key, value) for (key, value) in kwargs.items() if value is not None)
+    while True:
+        data = call_with_backoff(map_method, **args)
+        for elm in data[attr]:
+            yield elm
+        if 'NextMarker' not in data:
+            break
+        args['Marker'] = data['NextMarker']
+
+
+def call_with_backoff(method, **kwargs):
+    """
+     Calls an API method, retrying with a doubling delay while it is throttled
+    """
     wait = 1
     while True:
         try:
-            data = map_method(**args)
-            for elm in data[attr]:
-                yield elm
-            if 'NextMarker' in data:
-                args['Marker'] = data['Nextmarker']
-                continue
-            break
+            return method(**kwargs)
         except ClientError as e:
-            if e.response['Error']['Code'] == "ThrottlingException" and wait < 600:
+            if e.response['Error']['Code'] in THROTTLING_ERRORS and wait < 600:
                 sleep(wait)
                 wait = wait * 2
                 continue
+            raise
+
+
+def run_concurrently(func, items, workers):
+    """
+     Calls func for every item from a pool of threads, raising the first
+     error once all of them are done
+    """
+    pending = queue.Queue()
+    for item in items:
+        pending.put(item)
+    errors = []
+
+    def worker():
+        while not errors:
+            try:
+                item = pending.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                func(item)
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=worker) for i in range(max(1, min(workers, len(items))))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
 
 
 def prefix_to_attr(attr_id):
@@ -341,7 +441,9 @@ def main():
         id=dict(required=False, type='str', default=None),
         name=dict(required=False, type='str', default=None),
         tags=dict(required=False, type="dict", default={}),
-        targets=dict(required=False, type="list", default=[])
+        targets=dict(required=False, type="list", default=[]),
+        gather=dict(required=False, type="list", default=GATHER_ALL),
+        workers=dict(required=False, type="int", default=DEFAULT_WORKERS)
     ))
 
     module = AnsibleModule(argument_spec=argument_spec)
@@ -356,8 +458,19 @@ def main():
     fs_id = module.params.get('id')
     tags = module.params.get('tags')
     targets = module.params.get('targets')
+    gather = module.params.get('gather')
+
+    for item in gather:
+        if item not in GATHER_ALL:
+            module.fail_json(msg="gather items must be one of: %s" % ', '.join(GATHER_ALL))
+    # Filters need the attributes they look at
+    if tags and 'tags' not in gather:
+        gather = gather + ['tags']
+    if targets:
+        gather = gather + [item for item in ['mount_targets', 'security_groups'] if item not in gather]
 
-    file_systems_info = connection.get_file_systems(FileSystemId=fs_id, CreationToken=name)
+    file_systems_info = connection.get_file_systems(gather, module.params.get('workers'),
+                                                    FileSystemId=fs_id, CreationToken=name)
 
     if tags:
         file_systems_info = filter(lambda item: has_tags(item['Tags'], tags), file_systems_info)
@@ -144,6 +144,14 @@ tags:
       "Name": "Splunk",
       "Env": "development"
   }
+wait_stats:
+  description: Number of status polls made while waiting, and the seconds they took.
+  returned: always
+  type: dict
+  sample: {
+      "polls": 6,
+      "elapsed": 31.2
+  }
 '''
 
 try:
@@ -155,6 +163,7 @@ except ImportError:
 
 import re
 import datetime
+import random
 import time
 from functools import reduce
 
@@ -344,6 +353,51 @@ def find_stream(client, stream_name, check_mode=False):
     return success, err_msg, results
 
 
+# Polls made and seconds spent by wait_with_backoff, returned as wait_stats
+WAIT_STATS = {'polls': 0, 'elapsed': 0.0}
+
+
+def wait_with_backoff(poll, wait_timeout, delay=1, max_delay=30):
+    """Call poll until it reports a final state or wait_timeout is reached,
+    sleeping with jittered exponential backoff between the calls.
+    Args:
+        poll (callable): Returns a Tuple (bool, str, object), where the bool
+            is True once the expected state is reached, False on a terminal
+            failure and None to keep waiting.
+        wait_timeout (int): Number of seconds to wait, until this timeout is reached.
+
+    Kwargs:
+        delay (int): Seconds between the first two polls, doubled after every poll.
+            default=1
+        max_delay (int): Most seconds between two polls.
+            default=30
+
+    Basic Usage:
+        >>> wait_with_backoff(lambda: (True, '', {}), 300)
+        (True, '', {})
+
+    Returns:
+        Tuple (bool, str, object), done is None when the timeout was reached
+    """
+    start = time.time()
+    deadline = start + wait_timeout
+    done, err_msg, result = None, '', None
+    while time.time() < deadline:
+        WAIT_STATS['polls'] += 1
+        done, err_msg, result = poll()
+        if done is not None:
+            break
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            break
+        # Equal jitter, so that parallel waiters drift apart
+        time.sleep(min(delay / 2.0 + random.uniform(0, delay / 2.0), remaining))
+        delay = min(delay * 2, max_delay)
+    WAIT_STATS['elapsed'] += time.time() - start
+
+    return done, err_msg, result
+
+
 def wait_for_status(client, stream_name, status, wait_timeout=300,
                     check_mode=False):
     """Wait for the the status to change for a Kinesis Stream.
@@ -366,38 +420,33 @@ def wait_for_status(client, stream_name, status, wait_timeout=300,
     Returns:
         Tuple (bool, str, dict)
     """
-    polling_increment_secs = 5
-    wait_timeout = time.time() + wait_timeout
-    status_achieved = False
-    stream = dict()
-    err_msg = ""
-
-    while wait_timeout > time.time():
+    def poll():
         try:
             find_success, find_msg, stream = (
                 find_stream(client, stream_name, check_mode=check_mode)
             )
-            if check_mode:
-                status_achieved = True
-                break
+        except botocore.exceptions.ClientError as e:
+            return None, str(e), dict()
 
-            elif status != 'DELETING':
-                if find_success and stream:
-                    if stream.get('StreamStatus') == status:
-                        status_achieved = True
-                        break
+        if check_mode:
+            return True, '', stream
 
-            elif status == 'DELETING' and not check_mode:
-                if not find_success:
-                    status_achieved = True
-                    break
+        elif status != 'DELETING':
+            if find_success and stream:
+                if stream.get('StreamStatus') == status:
+                    return True, '', stream
 
-            else:
-                time.sleep(polling_increment_secs)
-        except botocore.exceptions.ClientError as e:
-            err_msg = str(e)
+        elif not find_success:
+            return True, '', stream
+
+        return None, find_msg, stream
+
+    status_achieved, err_msg, stream = wait_with_backoff(poll, wait_timeout)
+    if stream is None:
+        stream = dict()
 
     if not status_achieved:
+        status_achieved = False
         err_msg = "Wait time out reached, while waiting for results"
     else:
         err_msg = "Status {0} achieved successfully".format(status)
@@ -1081,13 +1130,18 @@ def main():
             delete_stream(client, stream_name, wait, wait_timeout, check_mode)
         )
 
+    wait_stats = dict(
+        polls=WAIT_STATS['polls'], elapsed=round(WAIT_STATS['elapsed'], 2)
+    )
     if success:
         module.exit_json(
-            success=success, changed=changed, msg=err_msg, **results
+            success=success, changed=changed, msg=err_msg,
+            wait_stats=wait_stats, **results
         )
     else:
         module.fail_json(
-            success=success, changed=changed, msg=err_msg, result=results
+            success=success, changed=changed, msg=err_msg, result=results,
+            wait_stats=wait_stats
         )
 
 # import module snippets
@@ -97,6 +97,45 @@ options:
         'tags',
         ]
     default: 'list'
+  all_pages:
+    description:
+      - "Used with query: record_sets. Follow the pages of the record sets
+        listing within the module and return all of them, instead of one page
+        of at most max_items records. Pages grow up to the API limit of 300
+        records. Throttled requests are retried after a growing delay."
+    required: false
+    default: false
+    version_added: "2.3"
+  name_filter:
+    description:
+      - "Used with query: record_sets and all_pages. Only return the record
+        sets whose name matches this shell-style wildcard, like
+        C(*.dev.example.com). When the pattern is a literal domain, or a
+        literal domain preceded by C(*.), only that part of the zone is read."
+    required: false
+    version_added: "2.3"
+  type_filter:
+    description:
+      - "Used with query: record_sets and all_pages. Only return the record
+        sets of these types."
+    required: false
+    version_added: "2.3"
+  compact:
+    description:
+      - "Used with query: record_sets and all_pages. Return each record set
+        as a short dict of name, type, ttl, values and, when set, alias and
+        set_id, instead of the full API structure."
+    required: false
+    default: false
+    version_added: "2.3"
+  compress:
+    description:
+      - "Used with query: record_sets and all_pages. Return the record sets
+        as gzipped JSON encoded in base64, in ResourceRecordSetsCompressed,
+        instead of ResourceRecordSets."
+    required: false
+    default: false
+    version_added: "2.3"
   health_check_method:
     description:
       - "This is used in conjunction with query: health_check.
@@ -138,6 +177,16 @@ EXAMPLES = '''
     max_items: 20
   register: record_sets
 
+- name: List all the A and CNAME records under dev.example.com, as short dicts
+  route53_facts:
+    query: record_sets
+    hosted_zone_id: 'ZZZ1111112222'
+    all_pages: true
+    name_filter: '*.dev.example.com'
+    type_filter: [ 'A', 'CNAME' ]
+    compact: true
+  register: record_sets
+
 - name: List first 20 health checks
   route53_facts:
     query: health_check
@@ -159,6 +208,12 @@ EXAMPLES = '''
   register: delegation_sets
 
 '''
+import base64
+import fnmatch
+import gzip
+import time
+from StringIO import StringIO
+
 try:
     import boto
     import botocore
@@ -172,6 +227,9 @@ try:
 except ImportError:
     HAS_BOTO3 = False
 
+# Largest MaxItems accepted by ListResourceRecordSets
+MAX_RECORD_SETS_PAGE = 300
+
 
 def get_hosted_zone(client, module):
     params = dict()
@@ -331,6 +389,151 @@ def record_sets_details(client, module):
     return results
 
 
+def record_name_glob(pattern):
+    """
+    Normalizes a record name pattern to the form of the names returned by
+    the API, and finds the literal domain, if any, under which all the
+    matching names are.
+    """
+    pattern = pattern.lower()
+    if not pattern.endswith('.'):
+        pattern += '.'
+    if pattern.startswith('*.'):
+        domain = pattern[2:]
+    else:
+        domain = pattern
+    for c in '*?[':
+        if c in domain:
+            domain = None
+            break
+    return pattern, domain
+
+
+def in_domain(name, domain):
+    return name == domain or name.endswith('.' + domain)
+
+
+def iterate_record_sets(client, params, page_size):
+    """
+    Yields the record sets from params on, following the pages of the
+    listing. Pages double in size up to the API limit. Throttled requests
+    are retried with the same page size after a growing delay.
+    """
+    params = dict(params)
+    wait = 1
+    while True:
+        params['MaxItems'] = str(page_size)
+        try:
+            data = client.list_resource_record_sets(**params)
+        except botocore.exceptions.ClientError as e:
+            if e.response['Error']['Code'] in ('Throttling', 'PriorRequestNotComplete') and wait < 600:
+                time.sleep(wait)
+                wait = wait * 2
+                continue
+            raise
+        wait = 1
+        for record_set in data['ResourceRecordSets']:
+            yield record_set
+        if not data.get('IsTruncated'):
+            break
+        params['StartRecordName'] = data['NextRecordName']
+        if data.get('NextRecordType'):
+            params['StartRecordType'] = data['NextRecordType']
+        if data.get('NextRecordIdentifier'):
+            params['StartRecordIdentifier'] = data['NextRecordIdentifier']
+        elif 'StartRecordIdentifier' in params:
+            del params['StartRecordIdentifier']
+        page_size = min(page_size * 2, MAX_RECORD_SETS_PAGE)
+
+
+def compact_record_set(record_set):
+    compact = dict(
+        name=record_set['Name'],
+        type=record_set['Type'],
+        values=[r['Value'] for r in record_set.get('ResourceRecords', [])],
+    )
+    if 'TTL' in record_set:
+        compact['ttl'] = record_set['TTL']
+    if 'AliasTarget' in record_set:
+        compact['alias'] = record_set['AliasTarget']['DNSName']
+    if 'SetIdentifier' in record_set:
+        compact['set_id'] = record_set['SetIdentifier']
+    return compact
+
+
+def all_record_sets_details(client, module):
+    params = dict()
+
+    if module.params.get('hosted_zone_id'):
+        params['HostedZoneId'] = module.params.get('hosted_zone_id')
+    else:
+        module.fail_json(msg="Hosted Zone Id is required")
+
+    if module.params.get('type') and not module.params.get('start_record_name'):
+        module.fail_json(msg="start_record_name must be specified if type is set")
+
+    pattern = domain = None
+    if module.params.get('name_filter'):
+        pattern, domain = record_name_glob(module.params.get('name_filter'))
+
+    # The zone is ordered by name with the labels reversed, so all the names
+    # under a domain come in one run starting at the domain itself
+    in_range = False
+    if domain and not module.params.get('start_record_name'):
+        params['StartRecordName'] = domain
+        in_range = True
+    elif module.params.get('start_record_name'):
+        params['StartRecordName'] = module.params.get('start_record_name')
+        if module.params.get('type'):
+            params['StartRecordType'] = module.params.get('type')
+
+    page_size = MAX_RECORD_SETS_PAGE
+    if module.params.get('max_items'):
+        page_size = min(int(module.params.get('max_items')), MAX_RECORD_SETS_PAGE)
+
+    types = module.params.get('type_filter')
+    compact = module.params.get('compact')
+    compress = module.params.get('compress')
+
+    if compress:
+        buf = StringIO()
+        out = gzip.GzipFile(fileobj=buf, mode='wb')
+        out.write('[')
+    else:
+        record_sets = []
+
+    count = 0
+    for record_set in iterate_record_sets(client, params, page_size):
+        name = record_set['Name'].lower()
+        if domain:
+            if in_domain(name, domain):
+                in_range = True
+            elif in_range:
+                break
+        if pattern and not fnmatch.fnmatchcase(name, pattern):
+            continue
+        if types and record_set['Type'] not in types:
+            continue
+        if compact:
+            record_set = compact_record_set(record_set)
+        if compress:
+            if count:
+                out.write(',')
+            out.write(module.jsonify(record_set))
+        else:
+            record_sets.append(record_set)
+        count += 1
+
+    results = dict(IsTruncated=False, RecordCount=count)
+    if compress:
+        out.write(']')
+        out.close()
+        results['ResourceRecordSetsCompressed'] = base64.b64encode(buf.getvalue())
+    else:
+        results['ResourceRecordSets'] = record_sets
+    return results
+
+
 def health_check_details(client, module):
     health_check_invocations = {
         'list': list_health_checks,
@@ -388,6 +591,11 @@ def main():
             'count',
             'tags'
         ], default='list'),
+        all_pages=dict(type='bool', default=False),
+        name_filter=dict(),
+        type_filter=dict(type='list'),
+        compact=dict(type='bool', default=False),
+        compress=dict(type='bool', default=False),
         health_check_method=dict(choices=[
             'list',
             'details',
@@ -406,6 +614,12 @@ def main():
         ],
     )
 
+    if not module.params.get('all_pages'):
+        given = [option for option in ('name_filter', 'type_filter', 'compact', 'compress')
+                 if module.params.get(option)]
+        if given:
+            module.fail_json(msg="%s can only be used with all_pages" % ', '.join(given))
+
     # Validate Requirements
     if not (HAS_BOTO or HAS_BOTO3):
         module.fail_json(msg='json and boto/boto3 is required.')
@@ -424,6 +638,8 @@ def main():
         'record_sets': record_sets_details,
         'reusable_delegation_set': reusable_delegation_set_details,
     }
+    if module.params.get('query') == 'record_sets' and module.params.get('all_pages'):
+        invocations['record_sets'] = all_record_sets_details
     results = invocations[module.params.get('query')](route53, module)
 
     module.exit_json(**results)
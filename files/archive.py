@@ -54,6 +54,26 @@ options:
     type: bool
     required: false
     default: false
+  threads:
+    description:
+      - Number of worker threads used to stat and read source files and to compress I(gz) and I(bz2) output.
+      - When greater than 1, the output is compressed in independent blocks in parallel (as done by pigz/pbzip2)
+        and streamed to C(dest) with a bounded number of blocks held in memory. The result is a valid multi-member
+        gzip or multi-stream bzip2 file readable by the standard tools.
+      - I(zip) archives only benefit from the parallel reads, members are still deflated one at a time.
+    required: false
+    default: 1
+    version_added: "2.3"
+  incremental:
+    description:
+      - Keep a manifest of the path, size, mtime and SHA1 of every member next to the archive, as C(dest).manifest.
+      - On later runs the sources are only stat'ed and compared against it. The archive is left untouched and
+        the task reports no change when no member differs, otherwise it is rebuilt.
+      - Files whose size and mtime are unchanged are assumed to be unchanged.
+    type: bool
+    required: false
+    default: false
+    version_added: "2.3"
 
 author: "Ben Doherty (@bendoh)"
 notes:
@@ -78,6 +98,18 @@ EXAMPLES = '''
         - /path/wong/foo
     dest: /path/file.tar.bz2
     format: bz2
+
+# Only rebuild the archive when the files in the tree changed
+- archive:
+    path: /srv/app/static
+    dest: /srv/backup/static.tar.gz
+    incremental: yes
+
+# Compress a large log tree using 8 threads
+- archive:
+    path: /var/log/build
+    dest: /srv/archive/build-logs.tar.gz
+    threads: 8
 '''
 
 RETURN = '''
@@ -104,6 +136,19 @@ arcroot:
 expanded_paths:
     description: The list of matching paths from paths argument.
     type: list
+throughput:
+    description: Statistics about the data written, empty when no archive or compressed file was written.
+    type: dictionary
+    returned: always
+    version_added: "2.3"
+    sample: {
+        "bytes_in": 1073741824,
+        "bytes_out": 104857600,
+        "bytes_per_second": 268435456.0,
+        "files": 1024,
+        "seconds": 4.0,
+        "threads": 8
+    }
 '''
 
 import os
@@ -112,9 +157,720 @@ import glob
 import shutil
 import gzip
 import bz2
-import filecmp
+import stat
+import struct
+import time
+import zlib
+import threading
 import zipfile
 import tarfile
+import tempfile
+
+try:
+    import json
+except ImportError:
+    try:
+        import simplejson as json
+    except ImportError:
+        # Let snippet from module_utils/basic.py return a proper error in this case
+        pass
+
+try:
+    from hashlib import sha1
+except ImportError:
+    from sha import sha as sha1
+
+try:
+    from os import scandir
+except ImportError:
+    scandir = None
+
+try:
+    text_type = unicode
+except NameError:
+    text_type = str
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+try:
+    from io import BytesIO
+except ImportError:
+    from StringIO import StringIO as BytesIO
+
+# Size of the independently compressed blocks. bzip2 works on 900k blocks
+# internally, so feeding it anything bigger only costs memory.
+GZIP_BLOCK_SIZE = 1024 * 1024
+BZ2_BLOCK_SIZE = 900 * 1024
+
+# Minimum number of source paths sharing a parent directory for the
+# directory to be listed instead of checking each path on its own.
+SCANDIR_THRESHOLD = 16
+
+# Regular files up to this size are read in full by the worker threads
+# ahead of being added to the archive; bigger ones are streamed.
+PREFETCH_SIZE = 1024 * 1024
+
+
+class Job(object):
+    """A unit of work submitted to a WorkerPool."""
+
+    def __init__(self, func, args):
+        self.func = func
+        self.args = args
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+    def run(self):
+        try:
+            try:
+                self.result = self.func(*self.args)
+            except Exception:
+                self.error = get_exception()
+        finally:
+            self.done.set()
+
+    def wait(self):
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class WorkerPool(object):
+    """Fixed size pool of daemon threads.
+
+    With a single thread, jobs are run inline by submit() so the
+    sequential case does not pay for any synchronisation.
+    """
+
+    def __init__(self, threads):
+        self.jobs = queue.Queue()
+        self.workers = []
+        if threads > 1:
+            for i in range(threads):
+                worker = threading.Thread(target=self._work)
+                worker.setDaemon(True)
+                worker.start()
+                self.workers.append(worker)
+
+    def _work(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            job.run()
+
+    def submit(self, func, *args):
+        job = Job(func, args)
+        if self.workers:
+            self.jobs.put(job)
+        else:
+            job.run()
+        return job
+
+    def close(self):
+        for worker in self.workers:
+            self.jobs.put(None)
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+
+
+def gzip_block(data):
+    """Compress data into a complete, self-contained gzip member."""
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -zlib.MAX_WBITS)
+    body = compressor.compress(data) + compressor.flush()
+    header = struct.pack('<BBBBIBB', 0x1f, 0x8b, 8, 0, int(time.time()), 0, 255)
+    trailer = struct.pack('<II', zlib.crc32(data) & 0xffffffff, len(data) & 0xffffffff)
+    return header + body + trailer
+
+
+def bz2_block(data):
+    """Compress data into a complete, self-contained bzip2 stream."""
+    return bz2.compress(data, 9)
+
+
+class ParallelCompressedFile(object):
+    """Write-only file object compressing its input on a WorkerPool.
+
+    The input is cut in fixed size blocks which are compressed independently
+    and written to disk in order. Concatenated gzip members and bzip2 streams
+    are valid files for gzip(1), bzip2(1) and tar(1). At most ``inflight``
+    blocks are held in memory at any time.
+    """
+
+    def __init__(self, path, format, pool, inflight):
+        if format == 'gz':
+            self.compress = gzip_block
+            self.block_size = GZIP_BLOCK_SIZE
+        elif format == 'bz2':
+            self.compress = bz2_block
+            self.block_size = BZ2_BLOCK_SIZE
+        else:
+            raise ValueError('Unsupported compression format %s' % format)
+
+        self.fileobj = open(path, 'wb')
+        self.pool = pool
+        self.inflight = max(inflight, 1)
+        self.pending = []
+        self.buffer = BytesIO()
+        self.buffered = 0
+        self.blocks = 0
+        self.closed = False
+
+    def write(self, data):
+        self.buffer.write(data)
+        self.buffered += len(data)
+        if self.buffered >= self.block_size:
+            self._dispatch(False)
+
+    def _dispatch(self, final):
+        data = self.buffer.getvalue()
+        offset = 0
+        while len(data) - offset >= self.block_size or (final and offset < len(data)):
+            self._submit(data[offset:offset + self.block_size])
+            offset += self.block_size
+
+        self.buffer = BytesIO()
+        self.buffer.write(data[offset:])
+        self.buffered = len(data) - offset
+
+    def _submit(self, block):
+        self.pending.append(self.pool.submit(self.compress, block))
+        self.blocks += 1
+        while len(self.pending) > self.inflight:
+            self._drain()
+
+    def _drain(self):
+        job = self.pending.pop(0)
+        self.fileobj.write(job.wait())
+
+    def close(self):
+        if self.closed:
+            return
+
+        self._dispatch(True)
+        if self.blocks == 0:
+            # Empty input still has to produce a valid compressed file
+            self._submit(self.buffer.getvalue())
+
+        while self.pending:
+            self._drain()
+
+        self.fileobj.close()
+        self.closed = True
+
+    def abort(self):
+        if not self.closed:
+            self.pending = []
+            self.fileobj.close()
+            self.closed = True
+
+
+class ChecksumFile(object):
+    """Read-only file wrapper computing the SHA1 of what is read through it."""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.sha1 = sha1()
+
+    def read(self, size=-1):
+        data = self.fileobj.read(size)
+        self.sha1.update(data)
+        return data
+
+    def hexdigest(self):
+        return self.sha1.hexdigest()
+
+    def close(self):
+        self.fileobj.close()
+
+
+def file_checksum(path):
+    f = ChecksumFile(open(path, 'rb'))
+    try:
+        while f.read(GZIP_BLOCK_SIZE):
+            pass
+    finally:
+        f.close()
+    return f.hexdigest()
+
+
+def read_member(path, digest):
+    """lstat a path, reading its content too if it is a small regular file.
+
+    Returns the stat result, the content and, if digest is set, its SHA1.
+    """
+    st = os.lstat(path)
+    data = checksum = None
+
+    if stat.S_ISREG(st.st_mode) and st.st_size <= PREFETCH_SIZE:
+        f = open(path, 'rb')
+        try:
+            data = f.read()
+        finally:
+            f.close()
+
+        if digest:
+            checksum = sha1(data).hexdigest()
+
+    return st, data, checksum
+
+
+def iter_members(archive_paths, arcroot):
+    """Yield (path, arcname, kind) for everything to add to the archive.
+
+    kind is 'top' for the source paths themselves and 'dir' or 'file' for
+    the entries found when walking source directories.
+    """
+    for path in archive_paths:
+        if os.path.isdir(path):
+            # Recurse into directories
+            for dirpath, dirnames, filenames in os.walk(path, topdown=True):
+                if not dirpath.endswith(os.sep):
+                    dirpath += os.sep
+
+                for dirname in dirnames:
+                    fullpath = dirpath + dirname
+                    yield fullpath, fullpath[len(arcroot):], 'dir'
+
+                for filename in filenames:
+                    fullpath = dirpath + filename
+                    yield fullpath, fullpath[len(arcroot):], 'file'
+        else:
+            yield path, path[len(arcroot):], 'top'
+
+
+def prefetch(pool, members, window, digest=False):
+    """Run read_member() for members on the pool, keeping at most window
+    reads in flight, and yield (path, arcname, kind, stat, data, checksum,
+    error) in the original order.
+    """
+    pending = []
+    for path, arcname, kind in members:
+        pending.append((path, arcname, kind, pool.submit(read_member, path, digest)))
+        if len(pending) >= window:
+            yield collect_member(pending.pop(0))
+
+    while pending:
+        yield collect_member(pending.pop(0))
+
+
+def collect_member(item):
+    path, arcname, kind, job = item
+    try:
+        st, data, checksum = job.wait()
+    except Exception:
+        return path, arcname, kind, None, None, None, get_exception()
+
+    return path, arcname, kind, st, data, checksum, None
+
+
+def add_member(arcfile, format, path, arcname, st, data, digest=False):
+    """Add one path to arcfile, using the prefetched content if any.
+
+    Returns whether the path was added and, if digest is set and the content
+    was not prefetched, the SHA1 of the regular file added.
+    """
+    checksum = None
+
+    if format == 'zip':
+        if data is None:
+            arcfile.write(path, arcname)
+            if digest and stat.S_ISREG(st.st_mode):
+                checksum = file_checksum(path)
+        else:
+            zinfo = zipfile.ZipInfo(arcname, time.localtime(st.st_mtime)[0:6])
+            zinfo.external_attr = (st.st_mode & 0xFFFF) << 16
+            zinfo.compress_type = zipfile.ZIP_DEFLATED
+            arcfile.writestr(zinfo, data)
+    else:
+        tarinfo = arcfile.gettarinfo(path, arcname)
+        if tarinfo is None:
+            # Sockets and other unsupported file types, as in TarFile.add()
+            return False, None
+
+        if tarinfo.isreg():
+            if data is not None and len(data) == tarinfo.size:
+                fileobj = BytesIO(data)
+            elif digest:
+                fileobj = ChecksumFile(open(path, 'rb'))
+            else:
+                fileobj = open(path, 'rb')
+
+            try:
+                arcfile.addfile(tarinfo, fileobj)
+            finally:
+                fileobj.close()
+
+            if isinstance(fileobj, ChecksumFile):
+                checksum = fileobj.hexdigest()
+        else:
+            arcfile.addfile(tarinfo)
+
+    return True, checksum
+
+
+def write_archive(dest, format, archive_paths, arcroot, threads, exclude=(), manifest=None):
+    """Write archive_paths to dest, reading sources on `threads` threads and,
+    for gz and bz2, compressing in parallel blocks.
+
+    Paths listed in exclude are skipped. If manifest is a dict, it is filled
+    with the manifest_entry() of every member, keyed by archive name.
+
+    Returns the list of added paths, the list of per-member errors and the
+    throughput statistics. Errors on the source paths themselves are raised.
+    """
+    digest = manifest is not None
+    pool = WorkerPool(threads)
+    writer = arcfile = None
+    successes = []
+    errors = []
+    files = bytes_in = 0
+    start = time.time()
+
+    try:
+        # Slightly more difficult (and less efficient!) compression using zipfile module
+        if format == 'zip':
+            arcfile = zipfile.ZipFile(dest, 'w', zipfile.ZIP_DEFLATED)
+
+        # Block compression of a plain tar stream on the worker threads
+        elif threads > 1 and (format == 'gz' or format == 'bz2'):
+            writer = ParallelCompressedFile(dest, format, pool, threads * 2)
+            arcfile = tarfile.open(mode='w|', fileobj=writer)
+
+        # Easier compression using tarfile module
+        elif format == 'gz' or format == 'bz2':
+            arcfile = tarfile.open(dest, 'w|' + format)
+
+        # Or plain tar archiving
+        elif format == 'tar':
+            arcfile = tarfile.open(dest, 'w')
+
+        dest_stat = os.stat(dest)
+
+        members = prefetch(pool, iter_members(archive_paths, arcroot), threads * 4, digest)
+        for path, arcname, kind, st, data, checksum, error in members:
+            if path in exclude:
+                continue
+
+            if error is not None:
+                if kind == 'top':
+                    raise error
+                errors.append('Adding %s: %s' % (path, str(error)))
+                continue
+
+            # Never add the archive being written to itself
+            if kind == 'file' and (st.st_dev, st.st_ino) == (dest_stat.st_dev, dest_stat.st_ino):
+                continue
+
+            if kind == 'top':
+                added, streamed = add_member(arcfile, format, path, arcname, st, data, digest)
+            else:
+                try:
+                    added, streamed = add_member(arcfile, format, path, arcname, st, data, digest)
+                except Exception:
+                    e = get_exception()
+                    errors.append('Adding %s: %s' % (path, str(e)))
+                    continue
+
+            if not added:
+                continue
+
+            if digest:
+                manifest[arcname] = manifest_entry(path, st, checksum or streamed)
+
+            if stat.S_ISREG(st.st_mode):
+                bytes_in += st.st_size
+
+            files += 1
+            if kind != 'dir':
+                successes.append(path)
+
+        arcfile.close()
+        if writer is not None:
+            writer.close()
+    finally:
+        pool.close()
+        if writer is not None:
+            writer.abort()
+
+    return successes, errors, get_throughput(dest, files, bytes_in, start, threads)
+
+
+def manifest_entry(path, st, checksum):
+    """Describe a member for the manifest: source path, mode, size, mtime
+    and either the SHA1 of a regular file or the target of a symlink.
+    """
+    if stat.S_ISLNK(st.st_mode):
+        checksum = os.readlink(path)
+    return [path, st.st_mode, st.st_size, st.st_mtime, checksum]
+
+
+def to_native(value):
+    """json returns unicode strings on python 2, paths are byte strings."""
+    if isinstance(value, text_type) and not isinstance(value, str):
+        return value.encode('utf-8')
+    return value
+
+
+def member_unchanged(entry, path, st):
+    old_path, mode, size, mtime, checksum = [to_native(v) for v in entry]
+
+    if old_path != path or mode != st.st_mode:
+        return False
+    if stat.S_ISLNK(st.st_mode):
+        return os.readlink(path) == checksum
+    if stat.S_ISREG(st.st_mode):
+        if size != st.st_size:
+            return False
+        # Only read files back when they were touched
+        return mtime == st.st_mtime or file_checksum(path) == checksum
+
+    # Directories and special files carry no content of their own
+    return True
+
+
+def read_manifest(manifest_path):
+    try:
+        f = open(manifest_path, 'r')
+        try:
+            return json.load(f)
+        finally:
+            f.close()
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def write_manifest(module, manifest_path, dest, format, arcroot, members):
+    manifest = dict(
+        version=1,
+        format=format,
+        arcroot=arcroot,
+        size=os.path.getsize(dest),
+        members=members,
+    )
+
+    fd, tmp_path = tempfile.mkstemp(prefix='.manifest', dir=os.path.dirname(manifest_path))
+    f = os.fdopen(fd, 'w')
+    try:
+        json.dump(manifest, f)
+    finally:
+        f.close()
+
+    module.atomic_move(tmp_path, manifest_path)
+
+
+def archive_unchanged(manifest, dest, format, archive_paths, arcroot, exclude):
+    """Compare the sources against the manifest of the last run, using one
+    lstat per member and only hashing regular files whose mtime changed.
+
+    Returns the list of archived paths if nothing differs, None otherwise.
+    """
+    if not manifest or manifest.get('version') != 1:
+        return None
+    if manifest.get('format') != format or to_native(manifest.get('arcroot')) != arcroot:
+        return None
+    if manifest.get('size') != os.path.getsize(dest):
+        return None
+
+    members = dict((to_native(k), v) for k, v in manifest['members'].items())
+    dest_stat = os.stat(dest)
+    successes = []
+    seen = 0
+
+    try:
+        for path, arcname, kind in iter_members(archive_paths, arcroot):
+            if path in exclude:
+                continue
+
+            st = os.lstat(path)
+            if kind == 'file' and (st.st_dev, st.st_ino) == (dest_stat.st_dev, dest_stat.st_ino):
+                continue
+
+            entry = members.get(arcname)
+            if entry is None or not member_unchanged(entry, path, st):
+                return None
+
+            seen += 1
+            if kind != 'dir':
+                successes.append(path)
+    except (IOError, OSError):
+        return None
+
+    if seen != len(members):
+        return None
+
+    return successes
+
+
+def compress_file(path, dest, format, threads):
+    """Compress the single file path into dest."""
+    pool = WorkerPool(threads)
+    f_in = f_out = None
+    start = time.time()
+
+    try:
+        f_in = open(path, 'rb')
+
+        if threads > 1 and (format == 'gz' or format == 'bz2'):
+            f_out = ParallelCompressedFile(dest, format, pool, threads * 2)
+            block_size = f_out.block_size
+        elif format == 'gz':
+            f_out = gzip.open(dest, 'wb')
+            block_size = GZIP_BLOCK_SIZE
+        elif format == 'bz2':
+            f_out = bz2.BZ2File(dest, 'wb')
+            block_size = BZ2_BLOCK_SIZE
+        else:
+            raise OSError("Invalid format")
+
+        shutil.copyfileobj(f_in, f_out, block_size)
+        f_out.close()
+    finally:
+        pool.close()
+        if f_in:
+            f_in.close()
+        if isinstance(f_out, ParallelCompressedFile):
+            f_out.abort()
+        elif f_out:
+            f_out.close()
+
+    return get_throughput(dest, 1, os.path.getsize(path), start, threads)
+
+
+def get_throughput(dest, files, bytes_in, start, threads):
+    seconds = time.time() - start
+    throughput = dict(
+        files=files,
+        bytes_in=bytes_in,
+        bytes_out=os.path.getsize(dest),
+        seconds=round(seconds, 3),
+        bytes_per_second=0.0,
+        threads=threads,
+    )
+    if seconds > 0:
+        throughput['bytes_per_second'] = round(bytes_in / seconds, 1)
+    return throughput
+
+
+def expand_paths(paths):
+    """Expand variables, ~ and globs in paths.
+
+    Returns the expanded paths and whether any glob was used.
+    """
+    expanded_paths = []
+    globby = False
+
+    for path in paths:
+        path = os.path.expanduser(os.path.expandvars(path))
+
+        # Expand any glob characters. If found, add the expanded glob to the
+        # list of expanded_paths, which might be empty.
+        if ('*' in path or '?' in path):
+            expanded_paths.extend(glob.glob(path))
+            globby = True
+
+        # If there are no glob characters the path is added to the expanded paths
+        # whether the path exists or not
+        else:
+            expanded_paths.append(path)
+
+    return expanded_paths, globby
+
+
+def common_root(paths):
+    """Return the longest common parent directory of paths, with a trailing
+    separator, comparing whole path components in a single pass.
+    """
+    root = None
+    prefix = None
+
+    for path in paths:
+        # Most paths share the current root, only split the ones which do not
+        if prefix is not None and path.startswith(prefix):
+            continue
+
+        parts = os.path.dirname(path).split(os.sep)
+        if parts[-1] == '':
+            # Paths directly under the filesystem root
+            parts.pop()
+
+        if root is None:
+            root = parts
+        else:
+            i = 0
+            length = min(len(root), len(parts))
+            while i < length and root[i] == parts[i]:
+                i += 1
+            del root[i:]
+
+        prefix = os.sep.join(root) + os.sep
+
+    if not root:
+        return os.sep
+    return prefix
+
+
+def list_names(path):
+    """Return the set of entry names in directory path, None if unreadable."""
+    try:
+        if scandir is not None:
+            return set([entry.name for entry in scandir(path or os.curdir)])
+        return set(os.listdir(path or os.curdir))
+    except OSError:
+        return None
+
+
+def split_parent(path):
+    """Cheaper os.path.split(), the parent keeps any trailing separator."""
+    i = path.rfind(os.sep)
+    if i == -1:
+        return '', path
+    if i == 0:
+        return os.sep, path[1:]
+    return path[:i], path[i + 1:]
+
+
+def split_existing(paths):
+    """Split paths into the existing and the missing ones, keeping their order.
+
+    Parent directories holding at least SCANDIR_THRESHOLD of the paths are
+    listed once instead of calling lstat for every path in them.
+    """
+    splits = [split_parent(path) for path in paths]
+
+    counts = {}
+    for parent, name in splits:
+        counts[parent] = counts.get(parent, 0) + 1
+
+    listings = {}
+    for parent, count in counts.items():
+        if count >= SCANDIR_THRESHOLD:
+            listings[parent] = list_names(parent)
+
+    existing = []
+    missing = []
+    for i, path in enumerate(paths):
+        parent, name = splits[i]
+        names = listings.get(parent)
+
+        if names is not None and name not in ('', os.curdir, os.pardir):
+            found = name in names
+        else:
+            found = os.path.lexists(path)
+
+        if found:
+            existing.append(path)
+        else:
+            missing.append(path)
+
+    return existing, missing
+
 
 def main():
     module = AnsibleModule(
@@ -123,6 +879,8 @@ def main():
             format  = dict(choices=['gz', 'bz2', 'zip', 'tar'], default='gz', required=False),
             dest = dict(required=False, type='path'),
             remove = dict(required=False, default=False, type='bool'),
+            threads = dict(required=False, default=1, type='int'),
+            incremental = dict(required=False, default=False, type='bool'),
         ),
         add_file_common_args=True,
         supports_check_mode=True,
@@ -133,30 +891,24 @@ def main():
     paths = params['path']
     dest = params['dest']
     remove = params['remove']
+    threads = params['threads']
+    incremental = params['incremental']
+
+    if threads < 1:
+        module.fail_json(threads=threads, msg='Error, threads must be at least 1')
 
     expanded_paths = []
     format = params['format']
     globby = False
     changed = False
     state = 'absent'
+    throughput = {}
 
     # Simple or archive file compression (inapplicable with 'zip' since it's always an archive)
     archive = False
     successes = []
 
-    for i, path in enumerate(paths):
-        path = os.path.expanduser(os.path.expandvars(path))
-
-        # Expand any glob characters. If found, add the expanded glob to the
-        # list of expanded_paths, which might be empty.
-        if ('*' in path or '?' in path):
-            expanded_paths = expanded_paths + glob.glob(path)
-            globby = True
-
-        # If there are no glob characters the path is added to the expanded paths
-        # whether the path exists or not
-        else:
-            expanded_paths.append(path)
+    expanded_paths, globby = expand_paths(paths)
 
     if len(expanded_paths) == 0:
         return module.fail_json(path=', '.join(paths), expanded_paths=', '.join(expanded_paths), msg='Error, no source paths were found')
@@ -174,33 +926,17 @@ def main():
     if archive and not dest:
         module.fail_json(dest=dest, path=', '.join(paths), msg='Error, must specify "dest" when archiving multiple files or trees')
 
-    archive_paths = []
-    missing = []
-    arcroot = ''
-
-    for path in expanded_paths:
-        # Use the longest common directory name among all the files
-        # as the archive root path
-        if arcroot == '':
-            arcroot = os.path.dirname(path) + os.sep
-        else:
-            for i in range(len(arcroot)):
-                if path[i] != arcroot[i]:
-                    break
-
-            if i < len(arcroot):
-                arcroot = os.path.dirname(arcroot[0:i+1])
+    # Use the longest common directory name among all the files
+    # as the archive root path
+    arcroot = common_root(expanded_paths)
 
-            arcroot += os.sep
+    # Don't allow archives to be created anywhere within paths to be removed
+    if remove:
+        for path in expanded_paths:
+            if dest.startswith(path) and os.path.isdir(path):
+                module.fail_json(path=', '.join(paths), msg='Error, created archive can not be contained in source paths when remove=True')
 
-        # Don't allow archives to be created anywhere within paths to be removed
-        if remove and os.path.isdir(path) and dest.startswith(path):
-            module.fail_json(path=', '.join(paths), msg='Error, created archive can not be contained in source paths when remove=True')
-
-        if os.path.lexists(path):
-            archive_paths.append(path)
-        else:
-            missing.append(path)
+    archive_paths, missing = split_existing(expanded_paths)
 
     # No source files were found but the named archive exists: are we 'compress' or 'archive' now?
     if len(missing) == len(expanded_paths) and dest and os.path.exists(dest):
@@ -223,79 +959,50 @@ def main():
         archive = None
         size = 0
         errors = []
+        manifest_path = dest + '.manifest'
+        exclude = []
+        members = None
+        unchanged = None
+
+        if incremental:
+            exclude.append(manifest_path)
+            members = {}
 
         if os.path.lexists(dest):
             size = os.path.getsize(dest)
 
-        if state != 'archive':
+            # Nothing to rewrite if no member differs from the last run
+            if incremental and state != 'archive':
+                unchanged = archive_unchanged(read_manifest(manifest_path), dest, format, archive_paths, arcroot, exclude)
+
+        if unchanged is not None:
+            # Only the rewrite is skipped, missing sources still count
+            successes = unchanged
+            if len(missing) == 0:
+                state = 'archive'
+
+        elif state != 'archive':
             if check_mode:
                 changed = True
 
             else:
                 try:
-                    # Slightly more difficult (and less efficient!) compression using zipfile module
-                    if format == 'zip':
-                        arcfile = zipfile.ZipFile(dest, 'w', zipfile.ZIP_DEFLATED)
-
-                    # Easier compression using tarfile module
-                    elif format == 'gz' or format == 'bz2':
-                        arcfile = tarfile.open(dest, 'w|' + format)
-
-                    # Or plain tar archiving
-                    elif format == 'tar':
-                        arcfile = tarfile.open(dest, 'w')
-
-                    for path in archive_paths:
-                        if os.path.isdir(path):
-                            # Recurse into directories
-                            for dirpath, dirnames, filenames in os.walk(path, topdown=True):
-                                if not dirpath.endswith(os.sep):
-                                    dirpath += os.sep
-
-                                for dirname in dirnames:
-                                    fullpath = dirpath + dirname
-                                    arcname = fullpath[len(arcroot):]
-
-                                    try:
-                                        if format == 'zip':
-                                            arcfile.write(fullpath, arcname)
-                                        else:
-                                            arcfile.add(fullpath, arcname, recursive=False)
-
-                                    except Exception:
-                                        e = get_exception()
-                                        errors.append('%s: %s' % (fullpath, str(e)))
-
-                                for filename in filenames:
-                                    fullpath = dirpath + filename
-                                    arcname = fullpath[len(arcroot):]
-
-                                    if not filecmp.cmp(fullpath, dest):
-                                        try:
-                                            if format == 'zip':
-                                                arcfile.write(fullpath, arcname)
-                                            else:
-                                                arcfile.add(fullpath, arcname, recursive=False)
-
-                                            successes.append(fullpath)
-                                        except Exception:
-                                            e = get_exception()
-                                            errors.append('Adding %s: %s' % (path, str(e)))
-                        else:
-                            if format == 'zip':
-                                arcfile.write(path, path[len(arcroot):])
-                            else:
-                                arcfile.add(path, path[len(arcroot):], recursive=False)
-
-                            successes.append(path)
-
+                    successes, errors, throughput = write_archive(dest, format, archive_paths, arcroot, threads, exclude, members)
                 except Exception:
                     e = get_exception()
                     return module.fail_json(msg='Error when writing %s archive at %s: %s' % (format == 'zip' and 'zip' or ('tar.' + format), dest, str(e)))
 
-                if arcfile:
-                    arcfile.close()
-                    state = 'archive'
+                state = 'archive'
+
+                if incremental:
+                    # The members changed even if the archive size did not
+                    changed = True
+                    if len(errors) == 0:
+                        try:
+                            write_manifest(module, manifest_path, dest, format, arcroot, members)
+                        except (IOError, OSError, ValueError):
+                            e = get_exception()
+                            module.fail_json(dest=dest, msg='Error writing archive manifest %s: %s' % (manifest_path, str(e)))
 
                 if len(errors) > 0:
                     module.fail_json(msg='Errors when writing archive at %s: %s' % (dest, '; '.join(errors)))
@@ -339,7 +1046,7 @@ def main():
                     changed = True
             else:
                 size = 0
-                f_in = f_out = arcfile = None
+                arcfile = None
 
                 if os.path.lexists(dest):
                     size = os.path.getsize(dest)
@@ -352,30 +1059,14 @@ def main():
                         state = 'archive' # because all zip files are archives
 
                     else:
-                        f_in = open(path, 'rb')
-
-                        if format == 'gz':
-                            f_out = gzip.open(dest, 'wb')
-                        elif format == 'bz2':
-                            f_out = bz2.BZ2File(dest, 'wb')
-                        else:
-                            raise OSError("Invalid format")
-
-                        shutil.copyfileobj(f_in, f_out)
+                        throughput = compress_file(path, dest, format, threads)
 
                     successes.append(path)
 
-                except OSError:
+                except (IOError, OSError):
                     e = get_exception()
                     module.fail_json(path=path, dest=dest, msg='Unable to write to compressed file: %s' % str(e))
 
-                if arcfile:
-                    arcfile.close()
-                if f_in:
-                    f_in.close()
-                if f_out:
-                    f_out.close()
-
                 # Rudimentary check: If size changed then file changed. Not perfect, but easy.
                 if os.path.getsize(dest) != size:
                     changed = True
@@ -395,7 +1086,7 @@ def main():
 
     changed = module.set_fs_attributes_if_different(file_args, changed)
 
-    module.exit_json(archived=successes, dest=dest, changed=changed, state=state, arcroot=arcroot, missing=missing, expanded_paths=expanded_paths)
+    module.exit_json(archived=successes, dest=dest, changed=changed, state=state, arcroot=arcroot, missing=missing, expanded_paths=expanded_paths, throughput=throughput)
 
 if __name__ == '__main__':
     main()
@@ -100,6 +100,19 @@ options:
     description:
       - 'This flag indicates that filesystem links, if they exist, should be followed.'
     version_added: "2.1"
+  blocks:
+    required: false
+    default: null
+    description:
+      - A list of blocks to manage in the file at once. Each item is a
+        dictionary taking C(marker), C(block), C(state), C(insertafter) and
+        C(insertbefore); options that are left out are taken from the task.
+        Every block needs its own marker. The file is read and scanned once
+        for all the markers, and validated and written once.
+      - C(insertafter) and C(insertbefore) are matched against the file as
+        it was read. New blocks going to the same place are inserted in the
+        order of the list.
+    version_added: "2.3"
 """
 
 EXAMPLES = r"""
@@ -144,12 +157,26 @@ EXAMPLES = r"""
       - { name: host1, ip: 10.10.1.10 }
       - { name: host2, ip: 10.10.1.11 }
       - { name: host3, ip: 10.10.1.12 }
+
+- name: Add mappings to /etc/hosts with a single read and write of the file
+  blockinfile:
+    dest: /etc/hosts
+    blocks:
+      - marker: "# {mark} ANSIBLE MANAGED BLOCK host1"
+        block: "10.10.1.10 host1"
+      - marker: "# {mark} ANSIBLE MANAGED BLOCK host2"
+        block: "10.10.1.11 host2"
+      - marker: "# {mark} ANSIBLE MANAGED BLOCK host3"
+        state: absent
 """
 
 import re
 import os
 import tempfile
 
+# Options that may be set on the items of blocks
+BLOCK_OPTIONS = ('marker', 'block', 'content', 'state', 'insertafter', 'insertbefore')
+
 
 def write_changes(module, contents, dest):
 
@@ -172,6 +199,145 @@ def write_changes(module, contents, dest):
         module.atomic_move(tmpfile, dest, unsafe_writes=module.params['unsafe_writes'])
 
 
+def prepare_block(module, item):
+    """Return the marker lines, block lines and insertion point of a block,
+    with the options missing from item taken from the task."""
+    params = module.params
+    for key in item:
+        if key not in BLOCK_OPTIONS:
+            module.fail_json(msg='Unsupported option in blocks: %s' % key)
+    if 'content' in item:
+        item = dict(item)
+        item.setdefault('block', item.pop('content'))
+
+    insertbefore = item.get('insertbefore', params['insertbefore'])
+    insertafter = item.get('insertafter', params['insertafter'])
+    block = item.get('block', params['block']) or ''
+    marker = item.get('marker', params['marker'])
+    present = item.get('state', params['state']) == 'present'
+
+    if insertbefore is not None and insertafter is not None:
+        module.fail_json(msg='insertbefore and insertafter are mutually exclusive')
+    if insertbefore is None and insertafter is None:
+        insertafter = 'EOF'
+
+    if insertafter not in (None, 'EOF'):
+        insertre = re.compile(insertafter)
+    elif insertbefore not in (None, 'BOF'):
+        insertre = re.compile(insertbefore)
+    else:
+        insertre = None
+
+    marker0 = re.sub(r'{mark}', 'BEGIN', marker)
+    marker1 = re.sub(r'{mark}', 'END', marker)
+    if present and block:
+        # Escape seqeuences like '\n' need to be handled in Ansible 1.x
+        if module.ansible_version.startswith('1.'):
+            block = re.sub('', block, '')
+        blocklines = [marker0] + block.splitlines() + [marker1]
+    else:
+        blocklines = []
+
+    return dict(marker0=marker0, marker1=marker1, blocklines=blocklines,
+                insertafter=insertafter, insertbefore=insertbefore,
+                insertre=insertre)
+
+
+def find_markers(lines, blocks):
+    """Find the last line starting with each marker in a single scan.
+
+    Lines are first picked by their leading characters, so that only the
+    few lines that can hold a marker are compared with every marker."""
+    markers = []
+    for block in blocks:
+        markers.extend([block['marker0'], block['marker1']])
+    width = min([len(m) for m in markers])
+    prefixes = dict([(m[:width], True) for m in markers])
+    candidates = [i for i, line in enumerate(lines) if line[:width] in prefixes]
+    found = {}
+    for i in candidates:
+        for marker in markers:
+            if lines[i].startswith(marker):
+                found[marker] = i
+    return found
+
+
+def find_insert_points(lines, blocks):
+    """Find the last match of the insertafter/insertbefore expressions of
+    blocks in a single scan."""
+    regexes = {}
+    for block in blocks:
+        if block['insertre'] is not None:
+            regexes[block['insertre'].pattern] = block['insertre']
+    found = {}
+    if regexes:
+        regexes = regexes.items()
+        for i, line in enumerate(lines):
+            for pattern, insertre in regexes:
+                if insertre.search(line):
+                    found[pattern] = i
+    return found
+
+
+def update_blocks(lines, blocks):
+    """Return lines with all blocks inserted, updated or removed.
+
+    Blocks are located on the lines as read, and the result is assembled in
+    one pass. New blocks that go to the same place keep the order they were
+    given in."""
+    markers = find_markers(lines, blocks)
+    missing = [b for b in blocks
+               if b['blocklines'] and None in (markers.get(b['marker0']), markers.get(b['marker1']))]
+    insert_points = find_insert_points(lines, missing)
+
+    edits = []
+    for order, block in enumerate(blocks):
+        n0 = markers.get(block['marker0'])
+        n1 = markers.get(block['marker1'])
+        if None in (n0, n1):
+            if not block['blocklines']:
+                continue
+            if block['insertre'] is not None:
+                n0 = insert_points.get(block['insertre'].pattern)
+                if n0 is None:
+                    n0 = len(lines)
+                elif block['insertafter'] is not None:
+                    n0 += 1
+            elif block['insertbefore'] is not None:
+                n0 = 0           # insertbefore=BOF
+            else:
+                n0 = len(lines)  # insertafter=EOF
+            edits.append((n0, n0, order, block['blocklines']))
+        elif n0 < n1:
+            edits.append((n0, n1 + 1, order, block['blocklines']))
+        else:
+            edits.append((n1, n0 + 1, order, block['blocklines']))
+
+    if not edits:
+        return lines
+
+    # Insertion points inside a replaced range go to the start of the range
+    replaced = [(start, end) for start, end, order, blocklines in edits if start != end]
+    for k in range(len(edits)):
+        start, end, order, blocklines = edits[k]
+        if start == end:
+            for rstart, rend in replaced:
+                if rstart < start < rend:
+                    edits[k] = (rstart, rstart, order, blocklines)
+    edits.sort()
+
+    result = []
+    pos = 0
+    for start, end, order, blocklines in edits:
+        if start > pos:
+            result.extend(lines[pos:start])
+            pos = start
+        result.extend(blocklines)
+        pos = max(pos, end)
+    result.extend(lines[pos:])
+    return result
+
+
 def check_file_attrs(module, changed, message):
 
     file_args = module.load_file_common_arguments(module.params)
@@ -197,6 +363,7 @@ def main():
             create=dict(default=False, type='bool'),
             backup=dict(default=False, type='bool'),
             validate=dict(default=None, type='str'),
+            blocks=dict(default=None, type='list'),
         ),
         mutually_exclusive=[['insertbefore', 'insertafter']],
         add_file_common_args=True,
@@ -225,63 +392,24 @@ def main():
         f.close()
         lines = original.splitlines()
 
-    insertbefore = params['insertbefore']
-    insertafter = params['insertafter']
-    block = params['block']
-    marker = params['marker']
-    present = params['state'] == 'present'
-
-    if not present and not path_exists:
-        module.exit_json(changed=False, msg="File not present")
-
-    if insertbefore is None and insertafter is None:
-        insertafter = 'EOF'
-
-    if insertafter not in (None, 'EOF'):
-        insertre = re.compile(insertafter)
-    elif insertbefore not in (None, 'BOF'):
-        insertre = re.compile(insertbefore)
+    if params['blocks']:
+        items = params['blocks']
     else:
-        insertre = None
+        items = [dict()]
+    blocks = [prepare_block(module, item) for item in items]
 
-    marker0 = re.sub(r'{mark}', 'BEGIN', marker)
-    marker1 = re.sub(r'{mark}', 'END', marker)
-    if present and block:
-        # Escape seqeuences like '\n' need to be handled in Ansible 1.x
-        if module.ansible_version.startswith('1.'):
-            block = re.sub('', block, '')
-        blocklines = [marker0] + block.splitlines() + [marker1]
-    else:
-        blocklines = []
+    markers = {}
+    for n, block in enumerate(blocks):
+        for marker in (block['marker0'], block['marker1']):
+            if markers.get(marker, n) != n:
+                module.fail_json(msg='Marker %s is used by more than one block' % marker)
+            markers[marker] = n
 
-    n0 = n1 = None
-    for i, line in enumerate(lines):
-        if line.startswith(marker0):
-            n0 = i
-        if line.startswith(marker1):
-            n1 = i
-
-    if None in (n0, n1):
-        n0 = None
-        if insertre is not None:
-            for i, line in enumerate(lines):
-                if insertre.search(line):
-                    n0 = i
-            if n0 is None:
-                n0 = len(lines)
-            elif insertafter is not None:
-                n0 += 1
-        elif insertbefore is not None:
-            n0 = 0           # insertbefore=BOF
-        else:
-            n0 = len(lines)  # insertafter=EOF
-    elif n0 < n1:
-        lines[n0:n1+1] = []
-    else:
-        lines[n1:n0+1] = []
-        n0 = n1
+    present = [b for b in blocks if b['blocklines']]
+    if not present and not path_exists:
+        module.exit_json(changed=False, msg="File not present")
 
-    lines[n0:n0] = blocklines
+    lines = update_blocks(lines, blocks)
 
     if lines:
         result = '\n'.join(lines)
@@ -295,7 +423,10 @@ def main():
     elif original is None:
         msg = 'File created'
         changed = True
-    elif not blocklines:
+    elif len(blocks) > 1:
+        msg = 'Blocks updated'
+        changed = True
+    elif not present:
         msg = 'Block removed'
         changed = True
     else:
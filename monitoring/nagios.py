@@ -41,6 +41,14 @@ options:
       - Host to operate on in Nagios.
     required: false
     default: null
+  hosts:
+    version_added: "2.3"
+    description:
+      - List of hosts to operate on in Nagios, instead of C(host). The
+        commands for all the hosts are sent in one go, through a single
+        open of the command file.
+    required: false
+    default: null
   cmdfile:
     description:
       - Path to the nagios I(command file) (FIFO pipe).
@@ -139,13 +147,33 @@ EXAMPLES = '''
 
 # command something
 - nagios: action=command command='DISABLE_FAILURE_PREDICTION'
+
+# set an hour of downtime for all services on several hosts at once
+- nagios: action=downtime minutes=60 service=all hosts={{ groups['web'] | join(',') }}
+'''
+
+RETURN = '''
+nagios_commands:
+    description: the commands written to the command file
+    returned: always
+    type: list
+    sample: ["[1480000000] DISABLE_HOST_NOTIFICATIONS;web01"]
+commands_per_second:
+    description: rate at which the commands were written to the command file
+    returned: always
+    type: float
+    sample: 41000.0
 '''
 
 import ConfigParser
 import types
 import time
+import os
 import os.path
 
+# Smallest PIPE_BUF allowed by POSIX, for when it cannot be queried
+DEFAULT_PIPE_BUF = 512
+
 ######################################################################
 
 
@@ -182,6 +210,38 @@ def which_cmdfile():
 
     return None
 
+
+def pipe_buf(fd):
+    """
+    The number of bytes that can be written atomically to the FIFO fd
+    """
+
+    try:
+        return os.fpathconf(fd, 'PC_PIPE_BUF')
+    except (AttributeError, ValueError, OSError):
+        return DEFAULT_PIPE_BUF
+
+
+def chunk_commands(commands, size):
+    """
+    Join commands into chunks of whole commands no bigger than size. A
+    command bigger than size gets a chunk of its own.
+    """
+
+    chunks = []
+    chunk = []
+    chunk_len = 0
+    for cmd in commands:
+        if chunk and chunk_len + len(cmd) > size:
+            chunks.append(''.join(chunk))
+            chunk = []
+            chunk_len = 0
+        chunk.append(cmd)
+        chunk_len += len(cmd)
+    if chunk:
+        chunks.append(''.join(chunk))
+    return chunks
+
 ######################################################################
 
 
@@ -207,16 +267,18 @@ def main():
             author=dict(default='Ansible'),
             comment=dict(default='Scheduling downtime'),
             host=dict(required=False, default=None),
+            hosts=dict(required=False, default=None, type='list'),
             servicegroup=dict(required=False, default=None),
             minutes=dict(default=30),
             cmdfile=dict(default=which_cmdfile()),
             services=dict(default=None, aliases=['service']),
             command=dict(required=False, default=None),
-            )
+            ),
+        mutually_exclusive=[['host', 'hosts']],
         )
 
     action = module.params['action']
-    host = module.params['host']
+    host = module.params['host'] or module.params['hosts']
     servicegroup = module.params['servicegroup']
     minutes = module.params['minutes']
     services = module.params['services']
@@ -313,6 +375,10 @@ class Nagios(object):
         self.author = kwargs['author']
         self.comment = kwargs['comment']
         self.host = kwargs['host']
+        if kwargs.get('hosts'):
+            self.hosts = kwargs['hosts']
+        else:
+            self.hosts = [self.host]
         self.servicegroup = kwargs['servicegroup']
         self.minutes = int(kwargs['minutes'])
         self.cmdfile = kwargs['cmdfile']
@@ -324,6 +390,7 @@ class Nagios(object):
             self.services = kwargs['services'].split(',')
 
         self.command_results = []
+        self.pending_commands = []
 
     def _now(self):
         """
@@ -334,18 +401,40 @@ class Nagios(object):
 
     def _write_command(self, cmd):
         """
-        Write the given command to the Nagios command file
+        Queue the given command for the Nagios command file, see
+        _flush_commands()
         """
 
+        self.pending_commands.append(cmd)
+        self.command_results.append(cmd.strip())
+
+    def _flush_commands(self):
+        """
+        Write the queued commands to the Nagios command file
+
+        The command file is opened once and the commands are written in
+        chunks of whole commands no bigger than PIPE_BUF, which the kernel
+        writes to the FIFO atomically: commands cannot be interleaved with
+        the ones of other writers, nor be cut in half when the pipe is full.
+
+        Returns the time spent writing, in seconds.
+        """
+
+        start = time.time()
         try:
-            fp = open(self.cmdfile, 'w')
-            fp.write(cmd)
-            fp.flush()
-            fp.close()
-            self.command_results.append(cmd.strip())
-        except IOError:
+            fd = os.open(self.cmdfile, os.O_WRONLY | os.O_APPEND)
+            try:
+                for chunk in chunk_commands(self.pending_commands, pipe_buf(fd)):
+                    while chunk:
+                        written = os.write(fd, chunk)
+                        chunk = chunk[written:]
+            finally:
+                os.close(fd)
+        except (IOError, OSError):
             self.module.fail_json(msg='unable to write to nagios command file',
                                   cmdfile=self.cmdfile)
+        self.pending_commands = []
+        return time.time() - start
 
     def _fmt_dt_str(self, cmd, host, duration, author=None,
                     comment=None, start=None,
@@ -956,24 +1045,45 @@ class Nagios(object):
         Figure out what you want to do from ansible, and then do the
         needful (at the earliest).
         """
+        if self.action in ['servicegroup_host_downtime', 'servicegroup_service_downtime',
+                           'silence_nagios', 'unsilence_nagios', 'command']:
+            self.act_on_host(self.host)
+        else:
+            for host in self.hosts:
+                self.act_on_host(host)
+
+        elapsed = self._flush_commands()
+        if elapsed > 0:
+            rate = len(self.command_results) / elapsed
+        else:
+            rate = float(len(self.command_results))
+
+        self.module.exit_json(nagios_commands=self.command_results,
+                              commands_per_second=round(rate, 1),
+                              changed=True)
+
+    def act_on_host(self, host):
+        """
+        Queue the commands of the action for host.
+        """
         # host or service downtime?
         if self.action == 'downtime':
             if self.services == 'host':
-                self.schedule_host_downtime(self.host, self.minutes)
+                self.schedule_host_downtime(host, self.minutes)
             elif self.services == 'all':
-                self.schedule_host_svc_downtime(self.host, self.minutes)
+                self.schedule_host_svc_downtime(host, self.minutes)
             else:
-                self.schedule_svc_downtime(self.host,
+                self.schedule_svc_downtime(host,
                                            services=self.services,
                                            minutes=self.minutes)
 
         elif self.action == 'delete_downtime':
             if self.services=='host':
-                self.delete_host_downtime(self.host)
+                self.delete_host_downtime(host)
             elif self.services=='all':
-                self.delete_host_downtime(self.host, comment='')
+                self.delete_host_downtime(host, comment='')
             else:
-                self.delete_host_downtime(self.host, services=self.services)
+                self.delete_host_downtime(host, services=self.services)
 
         elif self.action == "servicegroup_host_downtime":
             if self.servicegroup:
@@ -984,28 +1094,28 @@ class Nagios(object):
 
         # toggle the host AND service alerts
         elif self.action == 'silence':
-            self.silence_host(self.host)
+            self.silence_host(host)
 
         elif self.action == 'unsilence':
-            self.unsilence_host(self.host)
+            self.unsilence_host(host)
 
         # toggle host/svc alerts
         elif self.action == 'enable_alerts':
             if self.services == 'host':
-                self.enable_host_notifications(self.host)
+                self.enable_host_notifications(host)
             elif self.services == 'all':
-                self.enable_host_svc_notifications(self.host)
+                self.enable_host_svc_notifications(host)
             else:
-                self.enable_svc_notifications(self.host,
+                self.enable_svc_notifications(host,
                                               services=self.services)
 
         elif self.action == 'disable_alerts':
             if self.services == 'host':
-                self.disable_host_notifications(self.host)
+                self.disable_host_notifications(host)
             elif self.services == 'all':
-                self.disable_host_svc_notifications(self.host)
+                self.disable_host_svc_notifications(host)
             else:
-                self.disable_svc_notifications(self.host,
+                self.disable_svc_notifications(host,
                                                services=self.services)
         elif self.action == 'silence_nagios':
             self.silence_nagios()
@@ -1021,10 +1131,9 @@ class Nagios(object):
             self.module.fail_json(msg="unknown action specified: '%s'" % \
                                       self.action)
 
-        self.module.exit_json(nagios_commands=self.command_results,
-                              changed=True)
-
 ######################################################################
 # import module snippets
 from ansible.module_utils.basic import *
-main()
+
+if __name__ == '__main__':
+    main()
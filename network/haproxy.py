@@ -40,8 +40,17 @@ options:
   host:
     description:
       - Name of the backend host to change.
-    required: true
+      - Required unless C(hosts) is given.
+    required: false
+    default: null
+  hosts:
+    description:
+      - List of backend hosts to change, instead of C(host). All the hosts
+        are handled over one connection, with their commands sent in
+        batches and a single status snapshot per check.
+    required: false
     default: null
+    version_added: "2.3"
   shutdown_sessions:
     description:
       - When disabling a server, immediately terminate all the sessions attached
@@ -126,6 +135,13 @@ EXAMPLES = '''
 # enable server in 'www' backend pool with change server(s) weight
 - haproxy: state=enabled host={{ inventory_hostname }} socket=/var/run/haproxy.sock weight=10 backend=www
 
+# drain a whole rack in one task, waiting until all its servers are in maintenance
+- haproxy:
+    state: disabled
+    hosts: "{{ groups['rack12'] }}"
+    backend: www
+    wait: yes
+
 author: "Ravi Bhure (@ravibhure)"
 '''
 
@@ -137,6 +153,11 @@ from string import Template
 
 DEFAULT_SOCKET_LOCATION="/var/run/haproxy.sock"
 RECV_SIZE = 1024
+# HAProxy prints this after every response in interactive mode
+PROMPT = '\n> '
+# Longest line of ';' separated commands sent at once, well below the
+# default tune.bufsize of 16384
+MAX_COMMAND_LINE = 4096
 ACTION_CHOICES = ['enabled', 'disabled']
 WAIT_RETRIES=25
 WAIT_INTERVAL=5
@@ -162,6 +183,10 @@ class HAProxy(object):
 
         self.state = self.module.params['state']
         self.host = self.module.params['host']
+        if self.module.params['hosts']:
+            self.hosts = self.module.params['hosts']
+        else:
+            self.hosts = [self.host]
         self.backend = self.module.params['backend']
         self.weight = self.module.params['weight']
         self.socket = self.module.params['socket']
@@ -171,24 +196,67 @@ class HAProxy(object):
         self.wait_retries = self.module.params['wait_retries']
         self.wait_interval = self.module.params['wait_interval']
         self.command_results = {}
+        self.client = None
 
-    def execute(self, cmd, timeout=200, capture_output=True):
+    def connect(self):
         """
-        Executes a HAProxy command by sending a message to a HAProxy's local
-        UNIX socket and waiting up to 'timeout' milliseconds for the response.
+        Connects to HAProxy's local UNIX socket and switches to interactive
+        mode, so that all the commands of the run share one connection.
         """
         self.client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
         self.client.connect(self.socket)
-        self.client.sendall('%s\n' % cmd)
-        result = ''
-        buf = ''
-        buf = self.client.recv(RECV_SIZE)
-        while buf:
-            result += buf
+        self.client.sendall('prompt\n')
+        self.read_response()
+
+    def close(self):
+        if self.client is not None:
+            try:
+                self.client.sendall('quit\n')
+            except socket.error:
+                pass
+            self.client.close()
+            self.client = None
+
+    def read_response(self):
+        """
+        Reads a response up to the prompt that follows it. Raises a
+        socket.error when HAProxy closes the connection before that.
+        """
+        chunks = []
+        tail = ''
+        while not tail.endswith(PROMPT):
             buf = self.client.recv(RECV_SIZE)
+            if not buf:
+                raise socket.error('connection closed by HAProxy')
+            chunks.append(buf)
+            tail = (tail + buf)[-len(PROMPT):]
+        result = ''.join(chunks)
+        if result.endswith(PROMPT):
+            result = result[:-len(PROMPT)]
+        return result
+
+    def execute(self, cmd, timeout=200, capture_output=True):
+        """
+        Executes a HAProxy command by sending a message to a HAProxy's local
+        UNIX socket and waiting up to 'timeout' milliseconds for the response.
+        A connection HAProxy closed in the meantime (after its 'stats timeout')
+        is opened again once.
+        """
+        if self.client is None:
+            self.connect()
+            self.client.sendall('%s\n' % cmd)
+            result = self.read_response()
+        else:
+            try:
+                self.client.sendall('%s\n' % cmd)
+                result = self.read_response()
+            except socket.error:
+                self.close()
+                self.connect()
+                self.client.sendall('%s\n' % cmd)
+                result = self.read_response()
         if capture_output:
             self.capture_command_output(cmd, result.strip())
-        self.client.close()
         return result
 
 
@@ -204,70 +272,126 @@ class HAProxy(object):
         self.command_results['output'].append(output)
 
 
-    def discover_all_backends(self):
+    def get_stats(self):
+        """
+        Takes a snapshot of 'show stat', indexed by (pxname, svname) and by
+        svname, along with the list of the backends.
+        """
+        data = self.execute('show stat', 200, False).lstrip('# ')
+        stats = dict(index={}, by_svname={}, backends=[])
+        for d in csv.DictReader(data.splitlines()):
+            state = { 'status': d['status'], 'weight': d['weight'] }
+            stats['index'][(d['pxname'], d['svname'])] = state
+            stats['by_svname'].setdefault(d['svname'], []).append(state)
+            if d['svname'] == 'BACKEND':
+                stats['backends'].append(d['pxname'])
+        return stats
+
+
+    def discover_all_backends(self, stats=None):
         """
         Discover all entries with svname = 'BACKEND' and return a list of their corresponding
         pxnames
         """
-        data = self.execute('show stat', 200, False).lstrip('# ')
-        r = csv.DictReader(data.splitlines())
-        return map(lambda d: d['pxname'], filter(lambda d: d['svname'] == 'BACKEND', r))
+        if stats is None:
+            stats = self.get_stats()
+        return stats['backends']
 
 
-    def execute_for_backends(self, cmd, pxname, svname, wait_for_status = None):
+    def execute_for_backends(self, cmd, pxname, svnames, wait_for_status = None, stats = None):
         """
         Run some command on the specified backends. If no backends are provided they will
         be discovered automatically (all backends)
         """
+        if stats is None:
+            stats = self.get_stats()
+
         # Discover backends if none are given
         if pxname is None:
-            backends = self.discover_all_backends()
+            backends = self.discover_all_backends(stats)
         else:
             backends = [pxname]
 
-        # Run the command for each requested backend
-        for backend in backends:
-            # Fail when backends were not found
-            state = self.get_state_for(backend, svname)
-            if (self.fail_on_not_found or self.wait) and state is None:
-                self.module.fail_json(msg="The specified backend '%s/%s' was not found!" % (backend, svname))
-
-            self.execute(Template(cmd).substitute(pxname = backend, svname = svname))
-            if self.wait:
-                self.wait_until_status(backend, svname, wait_for_status)
-
-
-    def get_state_for(self, pxname, svname):
+        # Find the servers to run the command for
+        targets = []
+        for svname in svnames:
+            for backend in backends:
+                if (backend, svname) in stats['index']:
+                    targets.append((backend, svname))
+                elif self.fail_on_not_found or self.wait:
+                    # Fail when backends were not found
+                    self.module.fail_json(msg="The specified backend '%s/%s' was not found!" % (backend, svname))
+
+        # Send the commands, as many at once as fit on a line
+        line = ''
+        for backend, svname in targets:
+            command = Template(cmd).substitute(pxname = backend, svname = svname)
+            if line and len(line) + len(command) + 2 > MAX_COMMAND_LINE:
+                self.execute(line)
+                line = ''
+            if line:
+                line += '; '
+            line += command
+        if line:
+            self.execute(line)
+
+        if self.wait and targets:
+            self.wait_until_status(targets, wait_for_status)
+
+
+    def get_state_for(self, pxname, svname, stats=None):
         """
         Find the state of specific services. When pxname is not set, get all backends for a specific host.
         Returns a list of dictionaries containing the status and weight for those services.
         """
-        data = self.execute('show stat', 200, False).lstrip('# ')
-        r = csv.DictReader(data.splitlines())
-        state = map(lambda d: { 'status': d['status'], 'weight': d['weight'] }, filter(lambda d: (pxname is None or d['pxname'] == pxname) and d['svname'] == svname, r))
+        if stats is None:
+            stats = self.get_stats()
+        if pxname is None:
+            state = stats['by_svname'].get(svname, [])
+        else:
+            state = []
+            if (pxname, svname) in stats['index']:
+                state = [stats['index'][(pxname, svname)]]
         return state or None
 
 
-    def wait_until_status(self, pxname, svname, status):
+    def get_state(self, stats):
         """
-        Wait for a service to reach the specified status. Try RETRIES times
-        with INTERVAL seconds of sleep in between. If the service has not reached
-        the expected status in that time, the module will fail. If the service was 
-        not found, the module will fail.
+        State of the host, or of every host when a list of hosts is given.
         """
-        for i in range(1, self.wait_retries):
-            state = self.get_state_for(pxname, svname)
+        if not self.module.params['hosts']:
+            return self.get_state_for(self.backend, self.host, stats)
+        state = {}
+        for host in self.hosts:
+            state[host] = self.get_state_for(self.backend, host, stats)
+        return state
 
-            # We can assume there will only be 1 element in state because both svname and pxname are always set when we get here
-            if state[0]['status'] == status:
+
+    def wait_until_status(self, targets, status):
+        """
+        Wait for services, given as (pxname, svname) tuples, to reach the
+        specified status. Try RETRIES times with INTERVAL seconds of sleep
+        in between, checking all the services in one snapshot each time. If
+        the services have not reached the expected status in that time, the
+        module will fail.
+        """
+        pending = targets
+        for i in range(1, self.wait_retries):
+            stats = self.get_stats()
+            pending = [t for t in pending if stats['index'].get(t, {}).get('status') != status]
+            if not pending:
                 return True
             else:
+                # Do not keep the session idle through the sleep, HAProxy
+                # drops it after its 'stats timeout'
+                self.close()
                 time.sleep(self.wait_interval)
 
-        self.module.fail_json(msg="server %s/%s not status '%s' after %d retries. Aborting." % (pxname, svname, status, self.wait_retries))
+        servers = ', '.join(['%s/%s' % t for t in pending])
+        self.module.fail_json(msg="server %s not status '%s' after %d retries. Aborting." % (servers, status, self.wait_retries))
 
 
-    def enabled(self, host, backend, weight):
+    def enabled(self, hosts, backend, weight, stats=None):
         """
         Enabled action, marks server to UP and checks are re-enabled,
         also supports to get current weight for server (default) and
@@ -276,10 +400,10 @@ class HAProxy(object):
         cmd = "get weight $pxname/$svname; enable server $pxname/$svname"
         if weight:
             cmd += "; set weight $pxname/$svname %s" % weight
-        self.execute_for_backends(cmd, backend, host, 'UP')
+        self.execute_for_backends(cmd, backend, hosts, 'UP', stats)
 
 
-    def disabled(self, host, backend, shutdown_sessions):
+    def disabled(self, hosts, backend, shutdown_sessions, stats=None):
         """
         Disabled action, marks server to DOWN for maintenance. In this mode, no more checks will be
         performed on the server until it leaves maintenance,
@@ -288,7 +412,7 @@ class HAProxy(object):
         cmd = "get weight $pxname/$svname; disable server $pxname/$svname"
         if shutdown_sessions:
             cmd += "; shutdown sessions server $pxname/$svname"
-        self.execute_for_backends(cmd, backend, host, 'MAINT')
+        self.execute_for_backends(cmd, backend, hosts, 'MAINT', stats)
 
 
     def act(self):
@@ -296,20 +420,22 @@ class HAProxy(object):
         Figure out what you want to do from ansible, and then do it.
         """
         # Get the state before the run
-        state_before = self.get_state_for(self.backend, self.host)
+        stats = self.get_stats()
+        state_before = self.get_state(stats)
         self.command_results['state_before'] = state_before
 
         # toggle enable/disbale server
         if self.state == 'enabled':
-            self.enabled(self.host, self.backend, self.weight)
+            self.enabled(self.hosts, self.backend, self.weight, stats)
         elif self.state == 'disabled':
-            self.disabled(self.host, self.backend, self.shutdown_sessions)
+            self.disabled(self.hosts, self.backend, self.shutdown_sessions, stats)
         else:
             self.module.fail_json(msg="unknown state specified: '%s'" % self.state)
 
         # Get the state after the run
-        state_after = self.get_state_for(self.backend, self.host)
+        state_after = self.get_state(self.get_stats())
         self.command_results['state_after'] = state_after
+        self.close()
 
         # Report change status
         if state_before != state_after:
@@ -326,7 +452,8 @@ def main():
     module = AnsibleModule(
         argument_spec = dict(
             state = dict(required=True, default=None, choices=ACTION_CHOICES),
-            host=dict(required=True, default=None),
+            host=dict(required=False, default=None),
+            hosts=dict(required=False, default=None, type='list'),
             backend=dict(required=False, default=None),
             weight=dict(required=False, default=None),
             socket = dict(required=False, default=DEFAULT_SOCKET_LOCATION),
@@ -336,6 +463,8 @@ def main():
             wait_retries=dict(required=False, default=WAIT_RETRIES, type='int'),
             wait_interval=dict(required=False, default=WAIT_INTERVAL, type='int'),
         ),
+        mutually_exclusive=[['host', 'hosts']],
+        required_one_of=[['host', 'hosts']],
     )
 
     if not socket:
@@ -24,9 +24,15 @@ __author__ = 'cschmidt'
 from lxml import etree
 import os
 import hashlib
-import sys
+import json
 import posixpath
+import tempfile
+import threading
 import urlparse
+try:
+    import Queue as queue
+except ImportError:
+    import queue
 from ansible.module_utils.basic import *
 from ansible.module_utils.urls import *
 try:
@@ -53,11 +59,13 @@ options:
     group_id:
         description:
             - The Maven groupId coordinate
-        required: true
+        required: false
+        default: null
     artifact_id:
         description:
             - The maven artifactId coordinate
-        required: true
+        required: false
+        default: null
     version:
         description:
             - The maven version coordinate
@@ -94,8 +102,41 @@ options:
     dest:
         description:
             - The path where the artifact should be written to
-        required: true
-        default: false
+        required: false
+        default: null
+    artifacts:
+        description:
+            - List of artifacts to download concurrently, instead of a single one. Each item is a dict
+              with the keys C(group_id), C(artifact_id), C(dest) and optionally C(version),
+              C(classifier) and C(extension), taking the same values as the options of that name.
+            - Either C(artifacts) or all of C(group_id), C(artifact_id) and C(dest) must be given.
+            - The maven-metadata.xml of each artifact path is downloaded once and shared by all the
+              items that need it.
+        required: false
+        default: null
+        version_added: "2.3"
+    workers:
+        description:
+            - Number of artifacts downloaded at the same time when C(artifacts) is given.
+        required: false
+        default: 4
+        version_added: "2.3"
+    checksum:
+        description:
+            - Checksum published by the repository next to each artifact, used to tell whether the
+              local file is up to date and to verify downloads before moving them into place.
+        required: false
+        default: sha1
+        choices: [md5, sha1, sha256]
+        version_added: "2.3"
+    checksum_cache:
+        description:
+            - Path of a file in which the checksums of the local artifacts are cached along with
+              their size and modification time, so that unchanged files are not hashed again on
+              every run.
+        required: false
+        default: null
+        version_added: "2.3"
     state:
         description:
             - The desired state of the artifact
@@ -123,8 +164,20 @@ EXAMPLES = '''
 
 # Download a WAR File to the Tomcat webapps directory to be deployed
 - maven_artifact: group_id=com.company artifact_id=web-app extension=war repository_url=https://repo.company.com/maven dest=/var/lib/tomcat7/webapps/web-app.war
+
+# Download several artifacts at once, verified with SHA-256, caching the local checksums
+- maven_artifact:
+    repository_url: https://repo.company.com/maven
+    checksum: sha256
+    checksum_cache: /var/cache/maven_artifact.json
+    artifacts:
+      - { group_id: com.company, artifact_id: web-app, extension: war, dest: /var/lib/tomcat7/webapps/web-app.war }
+      - { group_id: com.company, artifact_id: library-name, version: 1.2.0, dest: /opt/app/lib/ }
 '''
 
+CHUNK_SIZE = 65536
+
+
 class Artifact(object):
     def __init__(self, group_id, artifact_id, version, classifier=None, extension='jar'):
         if not group_id:
@@ -192,17 +245,95 @@ class Artifact(object):
             return None
 
 
+class ChecksumCache(object):
+    """
+    Checksums of local files, keyed by path and valid as long as the size
+    and modification time of the file are unchanged.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.changed = False
+        self.lock = threading.Lock()
+        if os.path.exists(path):
+            f = open(path)
+            try:
+                try:
+                    self.entries = json.load(f)
+                except ValueError:
+                    # A damaged cache only costs a rehash
+                    self.entries = {}
+            finally:
+                f.close()
+
+    def get(self, file, algorithm):
+        st = os.stat(file)
+        entry = self.entries.get(os.path.abspath(file))
+        if entry and entry['size'] == st.st_size and entry['mtime'] == st.st_mtime:
+            return entry.get(algorithm)
+        return None
+
+    def set(self, file, algorithm, digest):
+        st = os.stat(file)
+        key = os.path.abspath(file)
+        self.lock.acquire()
+        try:
+            entry = self.entries.get(key)
+            if not entry or entry['size'] != st.st_size or entry['mtime'] != st.st_mtime:
+                entry = dict(size=st.st_size, mtime=st.st_mtime)
+                self.entries[key] = entry
+            entry[algorithm] = digest
+            self.changed = True
+        finally:
+            self.lock.release()
+
+    def save(self, module):
+        if not self.changed:
+            return
+        path = os.path.dirname(os.path.abspath(self.path))
+        if not os.path.exists(path):
+            os.makedirs(path)
+        fd, tmp = tempfile.mkstemp(dir=path)
+        f = os.fdopen(fd, 'w')
+        json.dump(self.entries, f)
+        f.close()
+        module.atomic_move(tmp, self.path)
+
+
 class MavenDownloader:
-    def __init__(self, module, base="http://repo1.maven.org/maven2"):
+    def __init__(self, module, base="http://repo1.maven.org/maven2", checksum="sha1", cache=None):
         self.module = module
         if base.endswith("/"):
             base = base.rstrip("/")
         self.base = base
         self.user_agent = "Maven Artifact Downloader/1.0"
+        self.checksum = checksum
+        self.cache = cache
+        self._metadata = {}
+        self._metadata_locks = {}
+        self._lock = threading.Lock()
+
+    def _get_metadata(self, path):
+        """
+        Parsed maven-metadata.xml at path, downloaded once per run and shared
+        by all the artifacts that need it.
+        """
+        self._lock.acquire()
+        try:
+            lock = self._metadata_locks.setdefault(path, threading.Lock())
+        finally:
+            self._lock.release()
+        lock.acquire()
+        try:
+            if path not in self._metadata:
+                self._metadata[path] = self._request(self.base + path, "Failed to download maven-metadata.xml", lambda r: etree.parse(r))
+            return self._metadata[path]
+        finally:
+            lock.release()
 
     def _find_latest_version_available(self, artifact):
         path = "/%s/maven-metadata.xml" % (artifact.path(False))
-        xml = self._request(self.base + path, "Failed to download maven-metadata.xml", lambda r: etree.parse(r))
+        xml = self._get_metadata(path)
         v = xml.xpath("/metadata/versioning/versions/version[last()]/text()")
         if v:
             return v[0]
@@ -213,7 +344,7 @@ class MavenDownloader:
 
         if artifact.is_snapshot():
             path = "/%s/maven-metadata.xml" % (artifact.path())
-            xml = self._request(self.base + path, "Failed to download maven-metadata.xml", lambda r: etree.parse(r))
+            xml = self._get_metadata(path)
             timestamp = xml.xpath("/metadata/versioning/snapshot/timestamp/text()")[0]
             buildNumber = xml.xpath("/metadata/versioning/snapshot/buildNumber/text()")[0]
             return self._uri_for_artifact(artifact, artifact.version.replace("SNAPSHOT", timestamp + "-" + buildNumber))
@@ -258,32 +389,68 @@ class MavenDownloader:
             artifact = Artifact(artifact.group_id, artifact.artifact_id, self._find_latest_version_available(artifact),
                                 artifact.classifier, artifact.extension)
 
+        tmp, digest = self.fetch(artifact, filename)
+        if tmp:
+            self.install(tmp, filename, digest)
+        return True
+
+    def fetch(self, artifact, dest):
+        """
+        Returns (None, digest) when dest is already up to date with the
+        artifact, else (tmp, digest) where tmp is a verified download next to
+        dest, to be moved into place with install().
+        """
         url = self.find_uri_for_artifact(artifact)
-        if not self.verify_md5(filename, url + ".md5"):
-            response = self._request(url, "Failed to download artifact " + str(artifact), lambda r: r)
-            if response:
-                f = open(filename, 'w')
-                # f.write(response.read())
-                self._write_chunks(response, f, report_hook=self.chunk_report)
+        remote = self._remote_checksum(url)
+        if os.path.lexists(dest) and self._local_checksum(dest) == remote:
+            return None, remote
+
+        response = self._request(url, "Failed to download artifact " + str(artifact), lambda r: r)
+        fd, tmp = tempfile.mkstemp(prefix=".%s." % os.path.basename(dest), dir=os.path.dirname(os.path.abspath(dest)))
+        f = os.fdopen(fd, 'wb')
+        digest = hashlib.new(self.checksum)
+        try:
+            try:
+                self._write_chunks(response, f, digest=digest)
+            finally:
                 f.close()
-                return True
-            else:
-                return False
+            if digest.hexdigest() != remote:
+                raise ValueError("%s checksum mismatch for artifact %s downloaded from %s" % (self.checksum.upper(), artifact, url))
+        except:
+            os.remove(tmp)
+            raise
+        return tmp, remote
+
+    def fetch_all(self, items, workers=1):
+        """
+        Runs fetch() for a list of (artifact, dest) from a pool of threads.
+        Returns a list of (tmp, digest, error) in the order of items.
+        """
+        # A worker that dies before storing its result leaves this error behind
+        results = [(None, None, 'not downloaded')] * len(items)
+
+        def fetch_one(i):
+            artifact, dest = items[i]
+            try:
+                tmp, digest = self.fetch(artifact, dest)
+                results[i] = (tmp, digest, None)
+            except Exception as e:
+                results[i] = (None, None, str(e))
+
+        run_concurrently(fetch_one, range(len(items)), workers)
+        return results
+
+    def install(self, tmp, dest, digest):
+        self.module.atomic_move(tmp, dest)
+        if self.cache is not None:
+            self.cache.set(dest, self.checksum, digest)
+
+    def _write_chunks(self, response, file, chunk_size=CHUNK_SIZE, report_hook=None, digest=None):
+        total_size = response.info().getheader('Content-Length')
+        if total_size:
+            total_size = int(total_size.strip())
         else:
-            return True
-
-    def chunk_report(self, bytes_so_far, chunk_size, total_size):
-        percent = float(bytes_so_far) / total_size
-        percent = round(percent * 100, 2)
-        sys.stdout.write("Downloaded %d of %d bytes (%0.2f%%)\r" %
-                         (bytes_so_far, total_size, percent))
-
-        if bytes_so_far >= total_size:
-            sys.stdout.write('\n')
-
-    def _write_chunks(self, response, file, chunk_size=8192, report_hook=None):
-        total_size = response.info().getheader('Content-Length').strip()
-        total_size = int(total_size)
+            report_hook = None
         bytes_so_far = 0
 
         while 1:
@@ -294,26 +461,71 @@ class MavenDownloader:
                 break
 
             file.write(chunk)
+            if digest:
+                digest.update(chunk)
             if report_hook:
                 report_hook(bytes_so_far, chunk_size, total_size)
 
         return bytes_so_far
 
-    def verify_md5(self, file, remote_md5):
+    def verify_checksum(self, file, url):
         if not os.path.exists(file):
             return False
         else:
-            local_md5 = self._local_md5(file)
-            remote = self._request(remote_md5, "Failed to download MD5", lambda r: r.read())
-            return local_md5 == remote
-
-    def _local_md5(self, file):
-        md5 = hashlib.md5()
+            return self._local_checksum(file) == self._remote_checksum(url)
+
+    def _remote_checksum(self, url):
+        remote = self._request(url + "." + self.checksum, "Failed to download %s checksum" % self.checksum.upper(), lambda r: r.read())
+        # Some repositories put the file name after the digest
+        remote = remote.split()
+        if not remote:
+            raise ValueError("Empty %s checksum for URL %s" % (self.checksum.upper(), url))
+        return remote[0].lower()
+
+    def _local_checksum(self, file):
+        if self.cache is not None:
+            digest = self.cache.get(file, self.checksum)
+            if digest:
+                return digest
+        h = hashlib.new(self.checksum)
         f = open(file, 'rb')
-        for chunk in iter(lambda: f.read(8192), ''):
-            md5.update(chunk)
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), ''):
+            h.update(chunk)
         f.close()
-        return md5.hexdigest()
+        digest = h.hexdigest()
+        if self.cache is not None:
+            self.cache.set(file, self.checksum, digest)
+        return digest
+
+
+def run_concurrently(func, items, workers):
+    """
+    Calls func for every item from a pool of threads, raising the first
+    error once all of them are done.
+    """
+    pending = queue.Queue()
+    for item in items:
+        pending.put(item)
+    errors = []
+
+    def worker():
+        while not errors:
+            try:
+                item = pending.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                func(item)
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=worker) for i in range(max(1, min(workers, len(items))))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
 
 
 def main():
@@ -330,7 +542,12 @@ def main():
             state = dict(default="present", choices=["present","absent"]), # TODO - Implement a "latest" state
             dest = dict(type="path", default=None),
             validate_certs = dict(required=False, default=True, type='bool'),
-        )
+            artifacts = dict(default=None, type='list'),
+            workers = dict(default=4, type='int'),
+            checksum = dict(default='sha1', choices=['md5', 'sha1', 'sha256']),
+            checksum_cache = dict(type='path', default=None),
+        ),
+        mutually_exclusive = [['artifacts', 'group_id'], ['artifacts', 'artifact_id']],
     )
 
     try:
@@ -355,35 +572,65 @@ def main():
     if not repository_url:
         repository_url = "http://repo1.maven.org/maven2"
 
+    cache = None
+    if module.params["checksum_cache"]:
+        cache = ChecksumCache(module.params["checksum_cache"])
+
     #downloader = MavenDownloader(module, repository_url, repository_username, repository_password)
-    downloader = MavenDownloader(module, repository_url)
+    downloader = MavenDownloader(module, repository_url, module.params["checksum"], cache)
 
-    try:
-        artifact = Artifact(group_id, artifact_id, version, classifier, extension)
-    except ValueError as e:
-        module.fail_json(msg=e.args[0])
-
-    prev_state = "absent"
-    if os.path.isdir(dest):
-        dest = posixpath.join(dest, artifact_id + "-" + version + "." + extension)
-    if os.path.lexists(dest) and downloader.verify_md5(dest, downloader.find_uri_for_artifact(artifact) + '.md5'):
-        prev_state = "present"
+    if module.params["artifacts"]:
+        specs = module.params["artifacts"]
     else:
-        path = os.path.dirname(dest)
-        if not os.path.exists(path):
+        specs = [dict(group_id=group_id, artifact_id=artifact_id, version=version, classifier=classifier,
+                      extension=extension, dest=dest)]
+
+    items = []
+    for spec in specs:
+        if not isinstance(spec, dict) or not spec.get("dest"):
+            module.fail_json(msg="each artifact needs at least group_id, artifact_id and dest: %s" % spec)
+        item_version = spec.get("version") or "latest"
+        item_extension = spec.get("extension") or "jar"
+        try:
+            artifact = Artifact(spec.get("group_id"), spec.get("artifact_id"), item_version, spec.get("classifier"), item_extension)
+        except ValueError as e:
+            module.fail_json(msg=e.args[0])
+
+        item_dest = os.path.expanduser(spec["dest"])
+        if os.path.isdir(item_dest) or item_dest.endswith(os.sep):
+            item_dest = posixpath.join(item_dest, artifact.artifact_id + "-" + item_version + "." + item_extension)
+        path = os.path.dirname(item_dest)
+        if path and not os.path.exists(path):
             os.makedirs(path)
-
-    if prev_state == "present":
-        module.exit_json(dest=dest, state=state, changed=False)
-
-    try:
-        if downloader.download(artifact, dest):
-            module.exit_json(state=state, dest=dest, group_id=group_id, artifact_id=artifact_id, version=version, classifier=classifier, extension=extension, repository_url=repository_url, changed=True)
-        else:
-            module.fail_json(msg="Unable to download the artifact")
-    except ValueError as e:
-        module.fail_json(msg=e.args[0])
-
+        items.append((artifact, item_dest))
+
+    results = []
+    errors = []
+    changed = False
+    for (artifact, item_dest), (tmp, digest, error) in zip(items, downloader.fetch_all(items, module.params["workers"])):
+        if error:
+            errors.append(error)
+            continue
+        if tmp:
+            downloader.install(tmp, item_dest, digest)
+            changed = True
+        results.append(dict(group_id=artifact.group_id, artifact_id=artifact.artifact_id, version=artifact.version,
+                            classifier=artifact.classifier, extension=artifact.extension, dest=item_dest,
+                            changed=bool(tmp)))
+
+    if cache is not None:
+        cache.save(module)
+
+    if errors:
+        module.fail_json(msg="; ".join(errors), results=results, changed=changed)
+
+    if not module.params["artifacts"]:
+        dest = items[0][1]
+        if not changed:
+            module.exit_json(dest=dest, state=state, changed=False)
+        module.exit_json(state=state, dest=dest, group_id=group_id, artifact_id=artifact_id, version=version, classifier=classifier, extension=extension, repository_url=repository_url, changed=True)
+
+    module.exit_json(state=state, results=results, repository_url=repository_url, changed=changed)
 
 
 if __name__ == '__main__':
@@ -31,6 +31,16 @@ options:
     description:
       - The name of a node.js library to install
     required: false
+  packages:
+    description:
+      - List of node.js libraries to manage in one go, instead of C(name) and C(version). Items are
+        either names, optionally followed by C(@version), or dicts with the keys C(name) and C(version).
+      - The installed and outdated libraries are read once, and all the libraries to change are
+        passed to a single npm command per action.
+      - A library installed at another version than the exact version requested for it is
+        installed again at that version.
+    required: false
+    version_added: "2.3"
   path:
     description:
       - The base path where to install the node.js libraries
@@ -92,6 +102,14 @@ description: Remove the globally package "coffee-script".
 description: Install "coffee-script" node.js package from custom registry.
 - npm: name=coffee-script registry=http://registry.mysite.com
 
+description: Install a global toolchain with one npm run.
+- npm:
+    global: yes
+    packages:
+      - grunt-cli
+      - bower@1.7.9
+      - { name: "@angular/cli", version: "1.0.0" }
+
 description: Install packages based on package.json.
 - npm: path=/app/location
 
@@ -135,7 +153,7 @@ class Npm(object):
         else:
             self.name_version = self.name
 
-    def _exec(self, args, run_in_check_mode=False, check_rc=True):
+    def _exec(self, args, run_in_check_mode=False, check_rc=True, packages=None):
         if not self.module.check_mode or (self.module.check_mode and run_in_check_mode):
             cmd = self.executable + args
 
@@ -145,7 +163,9 @@ class Npm(object):
                 cmd.append('--production')
             if self.ignore_scripts:
                 cmd.append('--ignore-scripts')
-            if self.name:
+            if packages is not None:
+                cmd.extend(packages)
+            elif self.name:
                 cmd.append(self.name_version)
             if self.registry:
                 cmd.append('--registry')
@@ -169,6 +189,7 @@ class Npm(object):
 
         installed = list()
         missing = list()
+        self.installed_versions = dict()
         data = json.loads(self._exec(cmd, True, False))
         if 'dependencies' in data:
             for dep in data['dependencies']:
@@ -178,6 +199,7 @@ class Npm(object):
                     missing.append(dep)
                 else:
                     installed.append(dep)
+                    self.installed_versions[dep] = data['dependencies'][dep].get('version')
             if self.name and self.name not in installed:
                 missing.append(self.name)
         #Named dependency not installed
@@ -186,14 +208,14 @@ class Npm(object):
 
         return installed, missing
 
-    def install(self):
-        return self._exec(['install'])
+    def install(self, packages=None):
+        return self._exec(['install'], packages=packages)
 
-    def update(self):
-        return self._exec(['update'])
+    def update(self, packages=None):
+        return self._exec(['update'], packages=packages)
 
-    def uninstall(self):
-        return self._exec(['uninstall'])
+    def uninstall(self, packages=None):
+        return self._exec(['uninstall'], packages=packages)
 
     def list_outdated(self):
         outdated = list()
@@ -208,9 +230,48 @@ class Npm(object):
         return outdated
 
 
+def parse_packages(module, packages):
+    """
+    Turns the items of the packages option into (name, version, name_version)
+    tuples, version being None when no version was requested.
+    """
+    parsed = []
+    for package in packages:
+        if isinstance(package, dict):
+            name = package.get('name')
+            version = package.get('version')
+        else:
+            name = str(package)
+            version = None
+            # Scoped packages start with '@', the version comes after the last one
+            at = name.rfind('@')
+            if at > 0:
+                name, version = name[:at], name[at + 1:]
+        if not name:
+            module.fail_json(msg='each item of packages needs a name: %s' % package)
+        if version:
+            parsed.append((name, str(version), name + '@' + str(version)))
+        else:
+            parsed.append((name, None, name))
+    return parsed
+
+
+def version_differs(requested, installed):
+    """
+    Whether an installed version does not match a requested exact version.
+    Ranges and dist-tags are left to npm, like a plain name.
+    """
+    if requested is None or installed is None:
+        return False
+    if not re.match(r'^v?\d+\.\d+\.\d+([-+][0-9A-Za-z.+-]*)?$', requested):
+        return False
+    return requested.lstrip('v') != installed
+
+
 def main():
     arg_spec = dict(
         name=dict(default=None),
+        packages=dict(default=None, type='list'),
         path=dict(default=None, type='path'),
         version=dict(default=None),
         production=dict(default='no', type='bool'),
@@ -222,6 +283,7 @@ def main():
     arg_spec['global'] = dict(default='no', type='bool')
     module = AnsibleModule(
         argument_spec=arg_spec,
+        mutually_exclusive=[['name', 'packages'], ['version', 'packages']],
         supports_check_mode=True
     )
 
@@ -234,15 +296,53 @@ def main():
     registry = module.params['registry']
     state = module.params['state']
     ignore_scripts = module.params['ignore_scripts']
+    packages = module.params['packages']
 
     if not path and not glbl:
         module.fail_json(msg='path must be specified when not using global')
-    if state == 'absent' and not name:
+    if state == 'absent' and not name and not packages:
         module.fail_json(msg='uninstalling a package is only available for named packages')
 
     npm = Npm(module, name=name, path=path, version=version, glbl=glbl, production=production, \
               executable=executable, registry=registry, ignore_scripts=ignore_scripts)
 
+    if packages:
+        packages = parse_packages(module, packages)
+
+        # One snapshot of the tree serves all the packages
+        installed, missing = npm.list()
+        outdated = []
+        if state == 'latest':
+            outdated = npm.list_outdated()
+
+        to_install = []
+        to_update = []
+        to_uninstall = []
+        results = []
+        for pkg_name, pkg_version, pkg_name_version in packages:
+            action = None
+            if state == 'absent':
+                if pkg_name in installed:
+                    action = 'removed'
+                    to_uninstall.append(pkg_name)
+            elif pkg_name not in installed or version_differs(pkg_version, npm.installed_versions.get(pkg_name)):
+                action = 'installed'
+                to_install.append(pkg_name_version)
+            elif pkg_name in outdated:
+                action = 'updated'
+                to_update.append(pkg_name)
+            results.append(dict(name=pkg_name, changed=action is not None, action=action))
+
+        if to_install:
+            npm.install(to_install)
+        if to_update:
+            npm.update(to_update)
+        if to_uninstall:
+            npm.uninstall(to_uninstall)
+
+        changed = bool(to_install or to_update or to_uninstall)
+        module.exit_json(changed=changed, results=results)
+
     changed = False
     if state == 'present':
         installed, missing = npm.list()
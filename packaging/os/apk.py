@@ -46,6 +46,14 @@ options:
     required: false
     default: no
     choices: [ "yes", "no" ]
+  cache_valid_time:
+    description:
+      - Skip the update of the repository indexes requested by C(update_cache) if the newest
+        index in I(/var/cache/apk) was modified less than this number of seconds ago.
+      - Set it to C(0) to always update the indexes.
+    required: false
+    default: 0
+    version_added: "2.3"
   upgrade:
     description:
       - Upgrade all installed packages to their latest version.
@@ -86,16 +94,44 @@ EXAMPLES = '''
 
 # Update repositories as a separate step
 - apk: update_cache=yes
+
+# Install "foo", updating repositories at most once an hour
+- apk: name=foo update_cache=yes cache_valid_time=3600
+'''
+
+RETURN = '''
+cache_updated:
+    description: Whether the repository indexes were updated.
+    returned: when update_cache is set
+    type: boolean
+    sample: false
+cache_update_time:
+    description: Time of the last update of the repository indexes, in seconds since the epoch.
+      When the update was skipped, this is the modification time of the newest index.
+    returned: when update_cache is set
+    type: int
+    sample: 1476802320
 '''
 
+import glob
 import os
 import re
+import time
+
+# Repository indexes written by 'apk update'
+APK_INDEXES = '/var/cache/apk/APKINDEX.*'
 
 def update_package_db(module):
+    # The indexes themselves tell when they were last updated
+    mtimes = [os.path.getmtime(path) for path in glob.glob(APK_INDEXES)]
+    cache_valid_time = module.params['cache_valid_time']
+    if cache_valid_time > 0 and mtimes and time.time() - max(mtimes) < cache_valid_time:
+        return False, int(max(mtimes))
+
     cmd = "%s update" % (APK_PATH)
     rc, stdout, stderr = module.run_command(cmd, check_rc=False)
     if rc == 0:
-        return True
+        return True, int(time.time())
     else:
         module.fail_json(msg="could not update package db")
 
@@ -133,7 +169,7 @@ def get_dependencies(module, name):
     else:
         return []
 
-def upgrade_packages(module):
+def upgrade_packages(module, result):
     if module.check_mode:
         cmd = "%s upgrade --simulate" % (APK_PATH)
     else:
@@ -142,10 +178,10 @@ def upgrade_packages(module):
     if rc != 0:
         module.fail_json(msg="failed to upgrade packages")
     if re.search('^OK', stdout):
-        module.exit_json(changed=False, msg="packages already upgraded")
-    module.exit_json(changed=True, msg="upgraded packages")
+        module.exit_json(changed=False, msg="packages already upgraded", **result)
+    module.exit_json(changed=True, msg="upgraded packages", **result)
 
-def install_packages(module, names, state):
+def install_packages(module, names, state, result):
     upgrade = False
     to_install = []
     to_upgrade = []
@@ -165,7 +201,7 @@ def install_packages(module, names, state):
     if to_upgrade:
         upgrade = True
     if not to_install and not upgrade:
-        module.exit_json(changed=False, msg="package(s) already installed")
+        module.exit_json(changed=False, msg="package(s) already installed", **result)
     packages = " ".join(to_install) + " ".join(to_upgrade)
     if upgrade:
         if module.check_mode:
@@ -180,15 +216,15 @@ def install_packages(module, names, state):
     rc, stdout, stderr = module.run_command(cmd, check_rc=False)
     if rc != 0:
         module.fail_json(msg="failed to install %s" % (packages))
-    module.exit_json(changed=True, msg="installed %s package(s)" % (packages))
+    module.exit_json(changed=True, msg="installed %s package(s)" % (packages), **result)
 
-def remove_packages(module, names):
+def remove_packages(module, names, result):
     installed = []
     for name in names:
         if query_package(module, name):
             installed.append(name)
     if not installed:
-        module.exit_json(changed=False, msg="package(s) already removed")
+        module.exit_json(changed=False, msg="package(s) already removed", **result)
     names = " ".join(installed)
     if module.check_mode:
         cmd = "%s del --purge --simulate %s" % (APK_PATH, names)
@@ -197,7 +233,7 @@ def remove_packages(module, names):
     rc, stdout, stderr = module.run_command(cmd, check_rc=False)
     if rc != 0:
         module.fail_json(msg="failed to remove %s package(s)" % (names))
-    module.exit_json(changed=True, msg="removed %s package(s)" % (names))
+    module.exit_json(changed=True, msg="removed %s package(s)" % (names), **result)
 
 # ==========================================
 # Main control flow.
@@ -208,6 +244,7 @@ def main():
             state = dict(default='present', choices=['present', 'installed', 'absent', 'removed', 'latest']),
             name = dict(type='list'),
             update_cache = dict(default='no', type='bool'),
+            cache_valid_time = dict(default=0, type='int'),
             upgrade = dict(default='no', type='bool'),
         ),
         required_one_of = [['name', 'update_cache', 'upgrade']],
@@ -229,18 +266,24 @@ def main():
     if p['state'] in ['absent', 'removed']:
         p['state'] = 'absent'
 
+    result = {}
+
     if p['update_cache']:
-        update_package_db(module)
+        cache_updated, cache_update_time = update_package_db(module)
+        result['cache_updated'] = cache_updated
+        result['cache_update_time'] = cache_update_time
         if not p['name']:
-            module.exit_json(changed=True, msg='updated repository indexes')
+            if cache_updated:
+                module.exit_json(changed=True, msg='updated repository indexes', **result)
+            module.exit_json(changed=False, msg='repository indexes are up to date', **result)
 
     if p['upgrade']:
-        upgrade_packages(module)
+        upgrade_packages(module, result)
 
     if p['state'] in ['present', 'latest']:
-        install_packages(module, p['name'], p['state'])
+        install_packages(module, p['name'], p['state'], result)
     elif p['state'] == 'absent':
-        remove_packages(module, p['name'])
+        remove_packages(module, p['name'], result)
 
 # Import module snippets.
 from ansible.module_utils.basic import *
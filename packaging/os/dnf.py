@@ -38,9 +38,36 @@ options:
   list:
     description:
       - Various (non-idempotent) commands for usage with C(/usr/bin/ansible) and I(not) playbooks. See examples.
+      - Several commands can be given as a list, answered from the same loaded metadata. C(results)
+        is then a dictionary of the results of each command.
     required: false
     default: null
 
+  list_filters:
+    description:
+      - Only return the packages matching these filters when using C(list). Valid keys are C(name)
+        (a shell-style wildcard), C(arch) and C(repo).
+    required: false
+    default: null
+    version_added: "2.3"
+
+  cacheonly:
+    description:
+      - Load the repository metadata from the local cache only, without checking the repositories
+        for newer metadata over the network.
+    required: false
+    default: "no"
+    choices: ["yes", "no"]
+    version_added: "2.3"
+
+  metadata_expire:
+    description:
+      - Time in seconds after which the cached repository metadata expires and is downloaded
+        again, overriding the value of the dnf configuration. C(-1) never expires it.
+    required: false
+    default: null
+    version_added: "2.3"
+
   state:
     description:
       - Whether to install (C(present), C(latest)), or remove (C(absent)) a package.
@@ -114,8 +141,16 @@ EXAMPLES = '''
 - name: install the 'Development tools' package group
   dnf: name="@Development tools" state=present
 
+- name: list the installed and upgradable python packages, from the cached metadata
+  dnf:
+    list: [installed, upgrades]
+    list_filters:
+      name: "python*"
+    cacheonly: yes
+
 '''
 import os
+import fnmatch
 
 try:
     import dnf
@@ -132,7 +167,8 @@ def _fail_if_no_dnf(module):
             msg="`python2-dnf` is not installed, but it is required for the Ansible dnf module.")
 
 
-def _configure_base(module, base, conf_file, disable_gpg_check):
+def _configure_base(module, base, conf_file, disable_gpg_check,
+                    cacheonly=False, metadata_expire=None):
     """Configure the dnf Base object."""
     conf = base.conf
 
@@ -157,8 +193,15 @@ def _configure_base(module, base, conf_file, disable_gpg_check):
     # Read the configuration file
     conf.read()
 
+    # Use the local metadata cache without checking for newer metadata
+    if cacheonly:
+        conf.cacheonly = True
+    if metadata_expire is not None:
+        conf.metadata_expire = metadata_expire
+
 
-def _specify_repositories(base, disablerepo, enablerepo):
+def _specify_repositories(base, disablerepo, enablerepo,
+                          cacheonly=False, metadata_expire=None):
     """Enable and disable repositories matching the provided patterns."""
     base.read_all_repos()
     repos = base.repos
@@ -173,13 +216,23 @@ def _specify_repositories(base, disablerepo, enablerepo):
         for repo in repos.get_matching(repo_pattern):
             repo.enable()
 
+    # Repositories carry their own copy of these settings
+    for repo in repos.iter_enabled():
+        if cacheonly:
+            repo.md_only_cached = True
+        if metadata_expire is not None:
+            repo.metadata_expire = metadata_expire
 
-def _base(module, conf_file, disable_gpg_check, disablerepo, enablerepo):
+
+def _base(module, conf_file, disable_gpg_check, disablerepo, enablerepo,
+          cacheonly=False, metadata_expire=None, load_available_repos=True):
     """Return a fully configured dnf Base object."""
     base = dnf.Base()
-    _configure_base(module, base, conf_file, disable_gpg_check)
-    _specify_repositories(base, disablerepo, enablerepo)
-    base.fill_sack()
+    _configure_base(
+        module, base, conf_file, disable_gpg_check, cacheonly, metadata_expire)
+    _specify_repositories(
+        base, disablerepo, enablerepo, cacheonly, metadata_expire)
+    base.fill_sack(load_available_repos=load_available_repos)
     return base
 
 
@@ -200,26 +253,51 @@ def _package_dict(package):
     return result
 
 
-def list_items(module, base, command):
-    """List package info based on the command."""
+def _filter_query(query, filters):
+    """Narrow a package query down to the list filters."""
+    if filters.get('name'):
+        query = query.filter(name__glob=filters['name'])
+    if filters.get('arch'):
+        query = query.filter(arch=filters['arch'])
+    if filters.get('repo'):
+        query = query.filter(reponame=filters['repo'])
+    return query
+
+
+def iter_items(base, command, filters):
+    """Yield package info for the command, one package at a time."""
     # Rename updates to upgrades
     if command == 'updates':
         command = 'upgrades'
 
-    # Return the corresponding packages
+    # Yield the enabled repository ids
+    if command in ['repos', 'repositories']:
+        for repo in base.repos.iter_enabled():
+            if not filters.get('repo') or fnmatch.fnmatch(
+                    repo.id, filters['repo']):
+                yield {'repoid': repo.id, 'state': 'enabled'}
+        return
+
+    # Yield the corresponding packages
     if command in ['installed', 'upgrades', 'available']:
-        results = [
-            _package_dict(package)
-            for package in getattr(base.sack.query(), command)()]
-    # Return the enabled repository ids
-    elif command in ['repos', 'repositories']:
-        results = [
-            {'repoid': repo.id, 'state': 'enabled'}
-            for repo in base.repos.iter_enabled()]
-    # Return any matching packages
+        query = getattr(base.sack.query(), command)()
+    # Yield any matching packages
+    else:
+        query = subject.Subject(command).get_best_query(base.sack)
+
+    for package in _filter_query(query, filters):
+        yield _package_dict(package)
+
+
+def list_items(module, base, commands, filters=None):
+    """List package info based on the commands."""
+    filters = filters or {}
+    if len(commands) == 1:
+        results = list(iter_items(base, commands[0], filters))
     else:
-        packages = subject.Subject(command).get_best_query(base.sack)
-        results = [_package_dict(package) for package in packages]
+        results = {}
+        for command in commands:
+            results[command] = list(iter_items(base, command, filters))
 
     module.exit_json(results=results)
 
@@ -322,9 +400,12 @@ def main():
                     'absent', 'present', 'installed', 'removed', 'latest']),
             enablerepo=dict(type='list', default=[]),
             disablerepo=dict(type='list', default=[]),
-            list=dict(),
+            list=dict(type='list'),
+            list_filters=dict(type='dict', default=None),
             conf_file=dict(default=None, type='path'),
             disable_gpg_check=dict(default=False, type='bool'),
+            cacheonly=dict(default=False, type='bool'),
+            metadata_expire=dict(default=None, type='int'),
         ),
         required_one_of=[['name', 'list']],
         mutually_exclusive=[['name', 'list']],
@@ -333,10 +414,14 @@ def main():
 
     _fail_if_no_dnf(module)
     if params['list']:
+        # The installed packages alone don't need the repository metadata
+        load_available_repos = [
+            command for command in params['list'] if command != 'installed']
         base = _base(
             module, params['conf_file'], params['disable_gpg_check'],
-            params['disablerepo'], params['enablerepo'])
-        list_items(module, base, params['list'])
+            params['disablerepo'], params['enablerepo'], params['cacheonly'],
+            params['metadata_expire'], bool(load_available_repos))
+        list_items(module, base, params['list'], params['list_filters'])
     else:
         # Note: base takes a long time to run so we want to check for failure
         # before running it.
@@ -344,7 +429,8 @@ def main():
             module.fail_json(msg="This command has to be run under the root user.")
         base = _base(
             module, params['conf_file'], params['disable_gpg_check'],
-            params['disablerepo'], params['enablerepo'])
+            params['disablerepo'], params['enablerepo'], params['cacheonly'],
+            params['metadata_expire'])
 
         ensure(module, base, params['state'], params['name'])
 
@@ -98,6 +98,7 @@ EXAMPLES = '''
 - homebrew: name=foo state=present install_options=with-baz,enable-debug
 '''
 
+import json
 import os.path
 import re
 
@@ -346,6 +347,8 @@ class Homebrew(object):
         self.changed_count = 0
         self.unchanged_count = 0
         self.message = ''
+        self._installed = None
+        self._outdated = None
 
     def _setup_instance_vars(self, **kwargs):
         for key, val in kwargs.iteritems():
@@ -393,6 +396,75 @@ class Homebrew(object):
 
         return (failed, changed, message)
 
+    # state -------------------------------------------------------- {{{
+    def _load_installed(self):
+        """Snapshot all installed formulae with a single brew call.
+
+        The snapshot is indexed by name, full name and aliases and is
+        consulted by all the checks below, instead of running brew for
+        every package.
+        """
+        rc, out, err = self.module.run_command([
+            self.brew_path,
+            'info',
+            '--json=v1',
+            '--installed',
+        ])
+        try:
+            formulae = json.loads(out)
+        except ValueError:
+            self.failed = True
+            self.message = 'Unable to read installed packages: {0}'.format(
+                err.strip() or out.strip(),
+            )
+            raise HomebrewException(self.message)
+
+        self._installed = dict()
+        for formula in formulae:
+            if not formula.get('installed'):
+                continue
+            keys = [formula['name'], formula.get('full_name')]
+            keys.extend(formula.get('aliases') or [])
+            for key in keys:
+                if key:
+                    self._installed[key] = formula
+
+        self._outdated = None
+
+    def _load_outdated(self):
+        # brew outdated exits non-zero when something is outdated
+        rc, out, err = self.module.run_command([
+            self.brew_path,
+            'outdated',
+            '--json=v1',
+        ])
+        try:
+            outdated = json.loads(out)
+        except ValueError:
+            self.failed = True
+            self.message = 'Unable to read outdated packages: {0}'.format(
+                err.strip() or out.strip(),
+            )
+            raise HomebrewException(self.message)
+
+        # Tap formulae are listed by their full name (user/tap/formula)
+        self._outdated = set()
+        for formula in outdated:
+            self._outdated.add(formula['name'])
+            if formula.get('full_name'):
+                self._outdated.add(formula['full_name'])
+
+    def _invalidate_state(self):
+        self._installed = None
+        self._outdated = None
+
+    def _package_info(self, package):
+        if self._installed is None:
+            self._load_installed()
+
+        return self._installed.get(package)
+    # /state ------------------------------------------------------- }}}
+
     # checks ------------------------------------------------------- {{{
     def _current_package_is_installed(self):
         if not self.valid_package(self.current_package):
@@ -400,51 +472,34 @@ class Homebrew(object):
             self.message = 'Invalid package: {0}.'.format(self.current_package)
             raise HomebrewException(self.message)
 
-        cmd = [
-            "{brew_path}".format(brew_path=self.brew_path),
-            "info",
-            self.current_package,
-        ]
-        rc, out, err = self.module.run_command(cmd)
-        for line in out.split('\n'):
-            if (
-                re.search(r'Built from source', line)
-                or re.search(r'Poured from bottle', line)
-            ):
-                return True
-
-        return False
+        return self._package_info(self.current_package) is not None
 
     def _current_package_is_outdated(self):
         if not self.valid_package(self.current_package):
             return False
 
-        rc, out, err = self.module.run_command([
-            self.brew_path,
-            'outdated',
-            self.current_package,
-        ])
+        info = self._package_info(self.current_package)
+        if info is None:
+            return False
 
-        return rc != 0
+        if self._outdated is None:
+            self._load_outdated()
+
+        return (info['name'] in self._outdated or
+                info.get('full_name') in self._outdated)
 
     def _current_package_is_installed_from_head(self):
         if not Homebrew.valid_package(self.current_package):
             return False
-        elif not self._current_package_is_installed():
-            return False
 
-        rc, out, err = self.module.run_command([
-            self.brew_path,
-            'info',
-            self.current_package,
-        ])
-
-        try:
-            version_info = [line for line in out.split('\n') if line][0]
-        except IndexError:
+        info = self._package_info(self.current_package)
+        if info is None:
             return False
 
-        return version_info.split(' ')[-1] == 'HEAD'
+        return any(
+            keg['version'].startswith('HEAD')
+            for keg in info['installed']
+        )
     # /checks ------------------------------------------------------ }}}
 
     # commands ----------------------------------------------------- {{{
@@ -470,6 +525,22 @@ class Homebrew(object):
                 return self._uninstall_packages()
 
     # updated -------------------------------- {{{
+    def _run_batch(self, command, packages, extra=None):
+        """Run a single brew command for all packages, then drop the state
+        snapshot so that the outcome is checked against a fresh one.
+        """
+        opts = (
+            [self.brew_path, command]
+            + self.install_options
+            + packages
+            + (extra or [])
+        )
+        cmd = [opt for opt in opts if opt]
+        rc, out, err = self.module.run_command(cmd)
+        self._invalidate_state()
+
+        return rc, out, err
+
     def _update_homebrew(self):
         rc, out, err = self.module.run_command([
             self.brew_path,
@@ -508,6 +579,7 @@ class Homebrew(object):
             else:
                 self.changed = True
                 self.message = 'Homebrew upgraded.'
+                self._invalidate_state()
 
             return True
         else:
@@ -518,6 +590,7 @@ class Homebrew(object):
 
     # installed ------------------------------ {{{
     def _install_current_package(self):
+        """Check the current package, returning whether it must be installed."""
         if not self.valid_package(self.current_package):
             self.failed = True
             self.message = 'Invalid package: {0}.'.format(self.current_package)
@@ -528,7 +601,7 @@ class Homebrew(object):
             self.message = 'Package already installed: {0}'.format(
                 self.current_package,
             )
-            return True
+            return False
 
         if self.module.check_mode:
             self.changed = True
@@ -537,39 +610,44 @@ class Homebrew(object):
             )
             raise HomebrewException(self.message)
 
-        if self.state == 'head':
-            head = '--HEAD'
-        else:
-            head = None
+        return True
 
-        opts = (
-            [self.brew_path, 'install']
-            + self.install_options
-            + [self.current_package, head]
-        )
-        cmd = [opt for opt in opts if opt]
-        rc, out, err = self.module.run_command(cmd)
+    def _install_packages(self):
+        to_install = []
+        for package in self.packages:
+            self.current_package = package
+            if self._install_current_package():
+                to_install.append(package)
 
-        if self._current_package_is_installed():
-            self.changed_count += 1
-            self.changed = True
-            self.message = 'Package installed: {0}'.format(self.current_package)
+        if not to_install:
             return True
+
+        if self.state == 'head':
+            head = ['--HEAD']
         else:
-            self.failed = True
-            self.message = err.strip()
-            raise HomebrewException(self.message)
+            head = None
 
-    def _install_packages(self):
-        for package in self.packages:
+        rc, out, err = self._run_batch('install', to_install, head)
+
+        for package in to_install:
             self.current_package = package
-            self._install_current_package()
+            if self._current_package_is_installed():
+                self.changed_count += 1
+                self.changed = True
+                self.message = 'Package installed: {0}'.format(self.current_package)
+            else:
+                self.failed = True
+                self.message = err.strip()
+                raise HomebrewException(self.message)
 
         return True
     # /installed ----------------------------- }}}
 
     # upgraded ------------------------------- {{{
     def _upgrade_current_package(self):
+        """Check the current package, returning the brew command needed to
+        bring it to the latest version, if any.
+        """
         command = 'upgrade'
 
         if not self.valid_package(self.current_package):
@@ -580,12 +658,12 @@ class Homebrew(object):
         if not self._current_package_is_installed():
             command = 'install'
 
-        if self._current_package_is_installed() and not self._current_package_is_outdated():
+        elif not self._current_package_is_outdated():
             self.message = 'Package is already upgraded: {0}'.format(
                 self.current_package,
             )
             self.unchanged_count += 1
-            return True
+            return None
 
         if self.module.check_mode:
             self.changed = True
@@ -594,23 +672,7 @@ class Homebrew(object):
             )
             raise HomebrewException(self.message)
 
-        opts = (
-            [self.brew_path, command]
-            + self.install_options
-            + [self.current_package]
-        )
-        cmd = [opt for opt in opts if opt]
-        rc, out, err = self.module.run_command(cmd)
-
-        if self._current_package_is_installed() and not self._current_package_is_outdated():
-            self.changed_count += 1
-            self.changed = True
-            self.message = 'Package upgraded: {0}'.format(self.current_package)
-            return True
-        else:
-            self.failed = True
-            self.message = err.strip()
-            raise HomebrewException(self.message)
+        return command
 
     def _upgrade_all_packages(self):
         opts = (
@@ -633,14 +695,37 @@ class Homebrew(object):
         if not self.packages:
             self._upgrade_all_packages()
         else:
+            batches = {'install': [], 'upgrade': []}
             for package in self.packages:
                 self.current_package = package
-                self._upgrade_current_package()
+                command = self._upgrade_current_package()
+                if command:
+                    batches[command].append(package)
+
+            errors = dict()
+            for command in ('install', 'upgrade'):
+                if batches[command]:
+                    rc, out, err = self._run_batch(command, batches[command])
+                    errors[command] = err
+
+            for command in ('install', 'upgrade'):
+                for package in batches[command]:
+                    self.current_package = package
+                    if self._current_package_is_installed() and not self._current_package_is_outdated():
+                        self.changed_count += 1
+                        self.changed = True
+                        self.message = 'Package upgraded: {0}'.format(self.current_package)
+                    else:
+                        self.failed = True
+                        self.message = errors[command].strip()
+                        raise HomebrewException(self.message)
+
             return True
     # /upgraded ------------------------------ }}}
 
     # uninstalled ---------------------------- {{{
     def _uninstall_current_package(self):
+        """Check the current package, returning whether it must be uninstalled."""
         if not self.valid_package(self.current_package):
             self.failed = True
             self.message = 'Invalid package: {0}.'.format(self.current_package)
@@ -651,7 +736,7 @@ class Homebrew(object):
             self.message = 'Package already uninstalled: {0}'.format(
                 self.current_package,
             )
-            return True
+            return False
 
         if self.module.check_mode:
             self.changed = True
@@ -660,28 +745,30 @@ class Homebrew(object):
             )
             raise HomebrewException(self.message)
 
-        opts = (
-            [self.brew_path, 'uninstall']
-            + self.install_options
-            + [self.current_package]
-        )
-        cmd = [opt for opt in opts if opt]
-        rc, out, err = self.module.run_command(cmd)
-
-        if not self._current_package_is_installed():
-            self.changed_count += 1
-            self.changed = True
-            self.message = 'Package uninstalled: {0}'.format(self.current_package)
-            return True
-        else:
-            self.failed = True
-            self.message = err.strip()
-            raise HomebrewException(self.message)
+        return True
 
     def _uninstall_packages(self):
+        to_uninstall = []
         for package in self.packages:
             self.current_package = package
-            self._uninstall_current_package()
+            if self._uninstall_current_package():
+                to_uninstall.append(package)
+
+        if not to_uninstall:
+            return True
+
+        rc, out, err = self._run_batch('uninstall', to_uninstall)
+
+        for package in to_uninstall:
+            self.current_package = package
+            if not self._current_package_is_installed():
+                self.changed_count += 1
+                self.changed = True
+                self.message = 'Package uninstalled: {0}'.format(self.current_package)
+            else:
+                self.failed = True
+                self.message = err.strip()
+                raise HomebrewException(self.message)
 
         return True
     # /uninstalled ----------------------------- }}}
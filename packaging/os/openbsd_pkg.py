@@ -39,7 +39,9 @@ options:
     name:
         required: true
         description:
-        - Name of the package.
+        - Name of the package, or a list of package names. All the
+          packages are resolved against a single listing of the installed
+          packages and handed to one pkg_add/pkg_delete run.
     state:
         required: true
         choices: [ present, latest, absent ]
@@ -76,6 +78,11 @@ EXAMPLES = '''
 # Make sure nmap is not installed
 - openbsd_pkg: name=nmap state=absent
 
+# Make sure several packages are installed, in a single pkg_add run
+- openbsd_pkg:
+    name: ['nmap', 'rsync', 'vim--no_x11']
+    state: present
+
 # Make sure nmap is installed, build it from source if it is not
 - openbsd_pkg: name=nmap state=present build=yes
 
@@ -92,6 +99,9 @@ EXAMPLES = '''
 - openbsd_pkg: name=* state=latest
 '''
 
+# Matches the "stem-version[-flavors]" names listed by pkg_info -q.
+INSTALLED_RE = re.compile("^(?P<stem>.*?)-(?P<version>[0-9][^-]*)(?:-(?P<flavor>[a-z].*))?$")
+
 # Function used for executing commands.
 def execute_command(cmd, module):
     # Break command line into arguments.
@@ -100,111 +110,134 @@ def execute_command(cmd, module):
     cmd_args = shlex.split(cmd)
     return module.run_command(cmd_args)
 
-# Function used to find out if a package is currently installed.
-def get_package_state(name, pkg_spec, module):
-    info_cmd = 'pkg_info -Iq'
+# Function used to build an index of the installed packages, keyed by stem.
+# A single "pkg_info -q" lists every installed package as
+# "stem-version[-flavors]", which is all we need to answer the
+# present/absent/latest questions for any number of names in memory.
+def get_installed_packages(module):
+    rc, stdout, stderr = execute_command('pkg_info -q', module)
 
-    command = "%s inst:%s" % (info_cmd, name)
+    if stderr:
+        module.fail_json(msg="failed in get_installed_packages(): " + stderr)
 
-    rc, stdout, stderr = execute_command(command, module)
+    installed = {}
+    for fullname in stdout.splitlines():
+        fullname = fullname.strip()
+        match = INSTALLED_RE.match(fullname)
+        if not match:
+            continue
+        installed.setdefault(match.group('stem'), []).append(
+            (fullname, match.group('version'), match.group('flavor')))
 
-    if stderr:
-        module.fail_json(msg="failed in get_package_state(): " + stderr)
+    module.debug("get_installed_packages(): %d installed stems" % len(installed))
+    return installed
+
+# Function used to find out if a package is currently installed.
+def get_package_state(name, pkg_spec, installed, module):
+    if pkg_spec['style'] == 'branch':
+        # Let pkg_info(1) resolve which version a branch refers to.
+        command = "pkg_info -Iq inst:%s" % name
+        rc, stdout, stderr = execute_command(command, module)
 
-    if stdout:
-        # If the requested package name is just a stem, like "python", we may
-        # find multiple packages with that name.
-        pkg_spec['installed_names'] = [name for name in stdout.splitlines()]
+        if stderr:
+            module.fail_json(msg="failed in get_package_state(): " + stderr)
+
+        installed_names = stdout.splitlines()
+    else:
+        candidates = installed.get(pkg_spec['stem'], [])
+        if pkg_spec['style'] == 'version':
+            installed_names = [c[0] for c in candidates if c[0] == name]
+        elif pkg_spec['style'] == 'versionless':
+            installed_names = [c[0] for c in candidates if c[2] == pkg_spec['flavor']]
+        else:
+            # If the requested package name is just a stem, like "python", we
+            # may find multiple packages with that name.
+            installed_names = [c[0] for c in candidates]
+
+    if installed_names:
+        pkg_spec['installed_names'] = installed_names
         module.debug("get_package_state(): installed_names = %s" % pkg_spec['installed_names'])
         return True
     else:
         return False
 
-# Function used to make sure a package is present.
-def package_present(name, installed_state, pkg_spec, module):
-    build = module.params['build']
+# Function used to build a package from the ports tree.
+def build_package(name, pkg_spec, module):
+    port_dir = "%s/%s" % (module.params['ports_dir'], get_package_source_path(name, pkg_spec, module))
+    if not os.path.isdir(port_dir):
+        module.fail_json(msg="the port source directory %s does not exist" % (port_dir))
 
-    if module.check_mode:
-        install_cmd = 'pkg_add -Imn'
+    if pkg_spec['flavor']:
+        flavors = pkg_spec['flavor'].replace('-', ' ')
+        install_cmd = "cd %s && make clean=depends && FLAVOR=\"%s\" make install && make clean=depends" % (port_dir, flavors)
+    elif pkg_spec['subpackage']:
+        install_cmd = "cd %s && make clean=depends && SUBPACKAGE=\"%s\" make install && make clean=depends" % (port_dir, pkg_spec['subpackage'])
     else:
-        if build is True:
-            port_dir = "%s/%s" % (module.params['ports_dir'], get_package_source_path(name, pkg_spec, module))
-            if os.path.isdir(port_dir):
-                if pkg_spec['flavor']:
-                    flavors = pkg_spec['flavor'].replace('-', ' ')
-                    install_cmd = "cd %s && make clean=depends && FLAVOR=\"%s\" make install && make clean=depends" % (port_dir, flavors)
-                elif pkg_spec['subpackage']:
-                    install_cmd = "cd %s && make clean=depends && SUBPACKAGE=\"%s\" make install && make clean=depends" % (port_dir, pkg_spec['subpackage'])
-                else:
-                    install_cmd = "cd %s && make install && make clean=depends" % (port_dir)
-            else:
-                module.fail_json(msg="the port source directory %s does not exist" % (port_dir))
-        else:
-            install_cmd = 'pkg_add -Im'
-
-    if installed_state is False:
-
-        # Attempt to install the package
-        if build is True and not module.check_mode:
-            (rc, stdout, stderr) = module.run_command(install_cmd, module, use_unsafe_shell=True)
-        else:
-            (rc, stdout, stderr) = execute_command("%s %s" % (install_cmd, name), module)
+        install_cmd = "cd %s && make install && make clean=depends" % (port_dir)
 
-        # The behaviour of pkg_add is a bit different depending on if a
-        # specific version is supplied or not.
-        #
-        # When a specific version is supplied the return code will be 0 when
-        # a package is found and 1 when it is not. If a version is not
-        # supplied the tool will exit 0 in both cases.
-        #
-        # It is important to note that "version" relates to the
-        # packages-specs(7) notion of a version. If using the branch syntax
-        # (like "python%3.5") the version number is considered part of the
-        # stem, and the pkg_add behavior behaves the same as if the name did
-        # not contain a version (which it strictly speaking does not).
-        if pkg_spec['version'] or build is True:
-            # Depend on the return code.
-            module.debug("package_present(): depending on return code")
-            if rc:
-                changed=False
-        else:
-            # Depend on stderr instead.
-            module.debug("package_present(): depending on stderr")
-            if stderr:
-                # There is a corner case where having an empty directory in
-                # installpath prior to the right location will result in a
-                # "file:/local/package/directory/ is empty" message on stderr
-                # while still installing the package, so we need to look for
-                # for a message like "packagename-1.0: ok" just in case.
-                match = re.search("\W%s-[^:]+: ok\W" % name, stdout)
-                if match:
-                    # It turns out we were able to install the package.
-                    module.debug("package_present(): we were able to install package")
-                    pass
-                else:
-                    # We really did fail, fake the return code.
-                    module.debug("package_present(): we really did fail")
-                    rc = 1
-                    changed=False
-            else:
-                module.debug("package_present(): stderr was not set")
+    return module.run_command(install_cmd, use_unsafe_shell=True)
 
-        if rc == 0:
-            if module.check_mode:
-                module.exit_json(changed=True)
+# Function used to make sure packages are present.
+def package_present(names, pkg_specs, installed, module):
+    build = module.params['build']
 
-            changed=True
+    missing = [name for name in names if not pkg_specs[name]['installed']]
+    if not missing:
+        return (0, '', '', False)
 
-    else:
+    if build is True and not module.check_mode:
+        # Ports are built one at a time, depend on the return code.
         rc = 0
         stdout = ''
         stderr = ''
-        changed=False
+        for name in missing:
+            (build_rc, build_out, build_err) = build_package(name, pkg_specs[name], module)
+            stdout += build_out
+            stderr += build_err
+            if build_rc:
+                module.debug("package_present(): build of %s failed" % name)
+                return (build_rc, stdout, stderr, False)
+        return (rc, stdout, stderr, True)
 
-    return (rc, stdout, stderr, changed)
+    if module.check_mode:
+        install_cmd = 'pkg_add -Imn'
+    else:
+        install_cmd = 'pkg_add -Im'
+
+    # Install everything that is missing in one pkg_add(1) run.
+    (rc, stdout, stderr) = execute_command("%s %s" % (install_cmd, ' '.join(missing)), module)
+
+    # The exit code and stderr of pkg_add are not reliable indicators of
+    # what happened to the individual packages (an empty directory in
+    # installpath prior to the right location will result in a
+    # "file:/local/package/directory/ is empty" message on stderr while
+    # still installing the package). Outside of check mode, look at what is
+    # actually installed afterwards. In check mode, look for a message like
+    # "packagename-1.0: ok" for every package that stderr may concern.
+    failed = []
+    if module.check_mode:
+        if rc or stderr:
+            for name in missing:
+                match = re.search("\W%s-[^:]+: ok\W" % re.escape(pkg_specs[name]['stem']), stdout)
+                if not match:
+                    failed.append(name)
+    else:
+        installed = get_installed_packages(module)
+        for name in missing:
+            if not get_package_state(name, pkg_specs[name], installed, module):
+                failed.append(name)
+
+    if failed:
+        module.debug("package_present(): failed to install: %s" % ' '.join(failed))
+        if not stderr:
+            stderr = "failed to install: %s" % ' '.join(failed)
+        return (1, stdout, stderr, len(failed) < len(missing))
+
+    module.debug("package_present(): installed: %s" % ' '.join(missing))
+    return (0, stdout, '', True)
 
-# Function used to make sure a package is the latest available version.
-def package_latest(name, installed_state, pkg_spec, module):
+# Function used to make sure packages are the latest available version.
+def package_latest(names, pkg_specs, installed, module):
 
     if module.params['build'] is True:
         module.fail_json(msg="the combination of build=%s and state=latest is not supported" % module.params['build'])
@@ -214,27 +247,28 @@ def package_latest(name, installed_state, pkg_spec, module):
     else:
         upgrade_cmd = 'pkg_add -um'
 
-    pre_upgrade_name = ''
+    present = [name for name in names if pkg_specs[name]['installed']]
 
-    if installed_state is True:
-
-        # Attempt to upgrade the package.
-        (rc, stdout, stderr) = execute_command("%s %s" % (upgrade_cmd, name), module)
-
-        # Look for output looking something like "nmap-6.01->6.25: ok" to see if
-        # something changed (or would have changed). Use \W to delimit the match
-        # from progress meter output.
-        changed = False
-        for installed_name in pkg_spec['installed_names']:
-            module.debug("package_latest(): checking for pre-upgrade package name: %s" % installed_name)
-            match = re.search("\W%s->.+: ok\W" % installed_name, stdout)
-            if match:
-                module.debug("package_latest(): pre-upgrade package name match: %s" % installed_name)
-                if module.check_mode:
-                    module.exit_json(changed=True)
-
-                changed = True
-                break
+    rc = 0
+    stdout = ''
+    stderr = ''
+    changed = False
+
+    if present:
+        # Attempt to upgrade all installed packages in one go.
+        (rc, stdout, stderr) = execute_command("%s %s" % (upgrade_cmd, ' '.join(present)), module)
+
+        # Look for output looking something like "nmap-6.01->6.25: ok" to see
+        # if something changed (or would have changed). Use \W to delimit the
+        # match from progress meter output.
+        for name in present:
+            for installed_name in pkg_specs[name]['installed_names']:
+                module.debug("package_latest(): checking for pre-upgrade package name: %s" % installed_name)
+                match = re.search("\W%s->.+: ok\W" % re.escape(installed_name), stdout)
+                if match:
+                    module.debug("package_latest(): pre-upgrade package name match: %s" % installed_name)
+                    changed = True
+                    break
 
         # FIXME: This part is problematic. Based on the issues mentioned (and
         # handled) in package_present() it is not safe to blindly trust stderr
@@ -249,29 +283,30 @@ def package_latest(name, installed_state, pkg_spec, module):
             if stderr:
                 rc=1
 
-        return (rc, stdout, stderr, changed)
+        if rc != 0:
+            return (rc, stdout, stderr, changed)
 
-    else:
-        # If package was not installed at all just make it present.
-        module.debug("package_latest(): package is not installed, calling package_present()")
-        return package_present(name, installed_state, pkg_spec, module)
+    # Packages that were not installed at all are just made present.
+    module.debug("package_latest(): calling package_present() for packages that are not installed")
+    (present_rc, present_out, present_err, present_changed) = package_present(names, pkg_specs, installed, module)
+
+    return (present_rc, stdout + present_out, stderr + present_err, changed or present_changed)
 
-# Function used to make sure a package is not installed.
-def package_absent(name, installed_state, module):
+# Function used to make sure packages are not installed.
+def package_absent(names, pkg_specs, module):
     if module.check_mode:
         remove_cmd = 'pkg_delete -In'
     else:
         remove_cmd = 'pkg_delete -I'
 
-    if installed_state is True:
+    present = [name for name in names if pkg_specs[name]['installed']]
 
-        # Attempt to remove the package.
-        rc, stdout, stderr = execute_command("%s %s" % (remove_cmd, name), module)
+    if present:
 
-        if rc == 0:
-            if module.check_mode:
-                module.exit_json(changed=True)
+        # Attempt to remove all the packages in one go.
+        rc, stdout, stderr = execute_command("%s %s" % (remove_cmd, ' '.join(present)), module)
 
+        if rc == 0:
             changed=True
         else:
             changed=False
@@ -447,7 +482,7 @@ def upgrade_packages(module):
 def main():
     module = AnsibleModule(
         argument_spec = dict(
-            name = dict(required=True),
+            name = dict(required=True, type='list'),
             state = dict(required=True, choices=['absent', 'installed', 'latest', 'present', 'removed']),
             build = dict(default='no', type='bool'),
             ports_dir = dict(default='/usr/ports'),
@@ -455,7 +490,7 @@ def main():
         supports_check_mode = True
     )
 
-    name      = module.params['name']
+    names     = module.params['name']
     state     = module.params['state']
     build     = module.params['build']
     ports_dir = module.params['ports_dir']
@@ -464,7 +499,10 @@ def main():
     stdout = ''
     stderr = ''
     result = {}
-    result['name'] = name
+    if len(names) == 1:
+        result['name'] = names[0]
+    else:
+        result['name'] = names
     result['state'] = state
     result['build'] = build
 
@@ -473,39 +511,46 @@ def main():
             module.fail_json(msg="the ports source directory %s does not exist" % (ports_dir))
 
         # build sqlports if its not installed yet
-        pkg_spec = {}
-        parse_package_name('sqlports', pkg_spec, module)
-        installed_state = get_package_state('sqlports', pkg_spec, module)
-        if not installed_state:
+        pkg_specs = {'sqlports': {}}
+        parse_package_name('sqlports', pkg_specs['sqlports'], module)
+        installed = get_installed_packages(module)
+        pkg_specs['sqlports']['installed'] = get_package_state('sqlports', pkg_specs['sqlports'], installed, module)
+        if not pkg_specs['sqlports']['installed']:
             module.debug("main(): installing 'sqlports' because build=%s" % module.params['build'])
-            package_present('sqlports', installed_state, pkg_spec, module)
+            package_present(['sqlports'], pkg_specs, installed, module)
 
-    if name == '*':
-        if state != 'latest':
-            module.fail_json(msg="the package name '*' is only valid when using state=latest")
+    if '*' in names:
+        if state != 'latest' or len(names) > 1:
+            module.fail_json(msg="the package name '*' is only valid on its own when using state=latest")
         else:
             # Perform an upgrade of all installed packages.
             (rc, stdout, stderr, changed) = upgrade_packages(module)
     else:
-        # Parse package name and put results in the pkg_spec dictionary.
-        pkg_spec = {}
-        parse_package_name(name, pkg_spec, module)
+        # Parse package names and put results in the pkg_specs dictionary.
+        pkg_specs = {}
+        for name in names:
+            pkg_spec = {}
+            parse_package_name(name, pkg_spec, module)
+
+            # Not sure how the branch syntax is supposed to play together
+            # with build mode. Disable it for now.
+            if pkg_spec['style'] == 'branch' and module.params['build'] is True:
+                module.fail_json(msg="the combination of 'branch' syntax and build=%s is not supported: %s" % (module.params['build'], name))
 
-        # Not sure how the branch syntax is supposed to play together
-        # with build mode. Disable it for now.
-        if pkg_spec['style'] == 'branch' and module.params['build'] is True:
-            module.fail_json(msg="the combination of 'branch' syntax and build=%s is not supported: %s" % (module.params['build'], name))
+            pkg_specs[name] = pkg_spec
 
-        # Get package state.
-        installed_state = get_package_state(name, pkg_spec, module)
+        # Get package state, all names are looked up in the same listing.
+        installed = get_installed_packages(module)
+        for name in names:
+            pkg_specs[name]['installed'] = get_package_state(name, pkg_specs[name], installed, module)
 
         # Perform requested action.
         if state in ['installed', 'present']:
-            (rc, stdout, stderr, changed) = package_present(name, installed_state, pkg_spec, module)
+            (rc, stdout, stderr, changed) = package_present(names, pkg_specs, installed, module)
         elif state in ['absent', 'removed']:
-            (rc, stdout, stderr, changed) = package_absent(name, installed_state, module)
+            (rc, stdout, stderr, changed) = package_absent(names, pkg_specs, module)
         elif state == 'latest':
-            (rc, stdout, stderr, changed) = package_latest(name, installed_state, pkg_spec, module)
+            (rc, stdout, stderr, changed) = package_latest(names, pkg_specs, installed, module)
 
     if rc != 0:
         if stderr:
@@ -78,6 +78,19 @@ options:
         choices: ["yes", "no"]
         aliases: [ 'update-cache' ]
 
+    cache_valid_time:
+        description:
+            - Skip the refresh of the master package lists requested by
+              C(update_cache) if the last one made through this module is
+              less than this number of seconds old. The time of the last
+              refresh is kept in
+              I(/var/lib/pacman/.ansible-update-stamp). C(force) always
+              refreshes the lists.
+            - Set it to C(0) to always refresh the lists.
+        required: false
+        default: 0
+        version_added: "2.3"
+
     upgrade:
         description:
             - Whether or not to upgrade whole system
@@ -111,62 +124,249 @@ EXAMPLES = '''
 
 # Run the equivalent of "pacman -Rdd", force remove package baz
 - pacman: name=baz state=absent force=yes
+
+# Install package foo, refreshing the package lists at most once an hour
+- pacman: name=foo update_cache=yes cache_valid_time=3600
+'''
+
+RETURN = '''
+cache_updated:
+    description: Whether the master package lists were refreshed, or in check mode would be.
+    returned: when update_cache is set
+    type: boolean
+    sample: false
+cache_update_time:
+    description: Time of the last refresh of the master package lists, in seconds since the epoch.
+    returned: when update_cache is set
+    type: int
+    sample: 1476802320
 '''
 
 import shlex
 import os
 import re
 import sys
+import time
+
+# Touched after each successful refresh of the master package lists
+PACMAN_UPDATE_STAMP = '/var/lib/pacman/.ansible-update-stamp'
+
+def split_evr(version):
+    """Split a pacman version string in its epoch, version and release parts"""
+    epoch = '0'
+    i = 0
+    while i < len(version) and version[i].isdigit():
+        i += 1
+    if i < len(version) and version[i] == ':':
+        epoch = version[:i] or '0'
+        version = version[i + 1:]
+
+    release = None
+    if '-' in version:
+        version, release = version.rsplit('-', 1)
+
+    return epoch, version, release
+
+def rpmvercmp(a, b):
+    """Compare two version segments the way libalpm's rpmvercmp() does"""
+    if a == b:
+        return 0
+
+    one = two = 0
+    ptr1 = ptr2 = 0
+    while one < len(a) and two < len(b):
+        while one < len(a) and not a[one].isalnum():
+            one += 1
+        while two < len(b) and not b[two].isalnum():
+            two += 1
+
+        if one >= len(a) or two >= len(b):
+            break
+
+        # If the separator lengths were different, we are also finished
+        if (one - ptr1) != (two - ptr2):
+            if (one - ptr1) < (two - ptr2):
+                return -1
+            return 1
+
+        ptr1 = one
+        ptr2 = two
+
+        # Grab the first completely alpha or completely numeric segment
+        if a[ptr1].isdigit():
+            while ptr1 < len(a) and a[ptr1].isdigit():
+                ptr1 += 1
+            while ptr2 < len(b) and b[ptr2].isdigit():
+                ptr2 += 1
+            isnum = True
+        else:
+            while ptr1 < len(a) and a[ptr1].isalpha():
+                ptr1 += 1
+            while ptr2 < len(b) and b[ptr2].isalpha():
+                ptr2 += 1
+            isnum = False
+
+        seg1 = a[one:ptr1]
+        seg2 = b[two:ptr2]
+
+        # Segments of different types: numeric is newer than alpha
+        if not seg2:
+            if isnum:
+                return 1
+            return -1
+
+        if isnum:
+            seg1 = seg1.lstrip('0')
+            seg2 = seg2.lstrip('0')
+            if len(seg1) != len(seg2):
+                if len(seg1) > len(seg2):
+                    return 1
+                return -1
+
+        if seg1 != seg2:
+            if seg1 < seg2:
+                return -1
+            return 1
+
+        one = ptr1
+        two = ptr2
+
+    if one >= len(a) and two >= len(b):
+        return 0
+
+    # A remaining alpha string never beats an empty string
+    if (one >= len(a) and not b[two].isalpha()) or (one < len(a) and a[one].isalpha()):
+        return -1
+    return 1
+
+def vercmp(a, b):
+    """Compare two package versions with the semantics of vercmp(8)"""
+    if a == b:
+        return 0
+
+    epoch1, version1, release1 = split_evr(a)
+    epoch2, version2, release2 = split_evr(b)
+
+    ret = rpmvercmp(epoch1, epoch2)
+    if ret == 0:
+        ret = rpmvercmp(version1, version2)
+        if ret == 0 and release1 and release2:
+            ret = rpmvercmp(release1, release2)
+    return ret
+
+def get_package_index(module, pacman_path, remote=False):
+    """Query the local database, and the sync databases if remote is set, once for all packages.
+    Returns a dict mapping package names to a (local version, repository version) tuple and
+    a boolean to indicate whether online information were available"""
+    index = {}
+
+    cmd = "%s -Q" % (pacman_path)
+    rc, stdout, stderr = module.run_command(cmd, check_rc=False)
+    # pacman -Q exits with 1 when no package at all is installed
+    for line in stdout.split('\n'):
+        fields = line.split()
+        if len(fields) >= 2:
+            index[fields[0]] = (fields[1], None)
 
-def get_version(pacman_output):
-    """Take pacman -Qi or pacman -Si output and get the Version"""
-    lines = pacman_output.split('\n')
-    for line in lines:
-        if 'Version' in line:
-            return line.split(':')[1].strip()
-    return None
-
-def query_package(module, pacman_path, name, state="present"):
-    """Query the package status in both the local system and the repository. Returns a boolean to indicate if the package is installed, a second boolean to indicate if the package is up-to-date and a third boolean to indicate whether online information were available"""
-    if state == "present":
-        lcmd = "%s -Qi %s" % (pacman_path, name)
-        lrc, lstdout, lstderr = module.run_command(lcmd, check_rc=False)
-        if lrc != 0:
-            # package is not installed locally
-            return False, False, False
-
-        # get the version installed locally (if any)
-        lversion = get_version(lstdout)
-
-        rcmd = "%s -Si %s" % (pacman_path, name)
-        rrc, rstdout, rstderr = module.run_command(rcmd, check_rc=False)
-        # get the version in the repository
-        rversion = get_version(rstdout)
-
-        if rrc == 0:
-            # Return True to indicate that the package is installed locally, and the result of the version number comparison
-            # to determine if the package is up-to-date.
-            return True, (lversion == rversion), False
+    if not remote:
+        return index, False
+
+    cmd = "%s -Sl" % (pacman_path)
+    rc, stdout, stderr = module.run_command(cmd, check_rc=False)
+    if rc != 0:
+        return index, False
+
+    for line in stdout.split('\n'):
+        # repo name version [installed]
+        fields = line.split()
+        if len(fields) < 3:
+            continue
+        repo, name, rversion = fields[:3]
+        lversion = index.get(name, (None, None))[0]
+        for key in (name, '%s/%s' % (repo, name)):
+            # Repositories are listed by priority, the first one wins
+            if index.get(key, (None, None))[1] is None:
+                index[key] = (lversion, rversion)
+
+    return index, True
+
+def resolve_provides(module, pacman_path, index, names):
+    """Look the names missing from the index up one by one with pacman -Qi, which also
+    finds the installed package providing a virtual name (like bash for sh).
+    Adds those names to the index and returns a dict mapping each of them to the
+    name of the installed package"""
+    providers = {}
+    for name in names:
+        if '/' in name or name in index:
+            continue
+        cmd = "%s -Qi %s" % (pacman_path, name)
+        rc, stdout, stderr = module.run_command(cmd, check_rc=False)
+        if rc != 0:
+            continue
+        info = {}
+        for line in stdout.split('\n'):
+            if ':' in line:
+                key, value = line.split(':', 1)
+                info[key.strip()] = value.strip()
+        if info.get('Name') in index:
+            providers[name] = info['Name']
+            index[name] = index[info['Name']]
+    return providers
+
+def query_package(index, name, online):
+    """Look the package status up in the index built by get_package_index. Returns a boolean to indicate if the package is installed, a second boolean to indicate if the package is up-to-date and a third boolean to indicate whether online information were unavailable"""
+    lversion, rversion = index.get(name, (None, None))
+    if '/' in name:
+        # repo/name only refers to the sync database
+        lversion = index.get(name.split('/', 1)[1], (None, None))[0]
+
+    if lversion is None:
+        # package is not installed locally
+        return False, False, False
+
+    if online and rversion is not None:
+        # Return True to indicate that the package is installed locally, and the result of the version number comparison
+        # to determine if the package is up-to-date.
+        return True, vercmp(lversion, rversion) >= 0, False
 
     # package is installed but cannot fetch remote Version. Last True stands for the error
-        return True, True, True
+    return True, True, True
 
 
 def update_package_db(module, pacman_path):
+    """Refresh the master package lists unless they were refreshed less than cache_valid_time seconds ago.
+    Returns whether they were (or in check mode, would be) refreshed and the time of the last refresh"""
+    # The sync databases keep the mirror's Last-Modified time, so the
+    # time of the refresh itself is kept in a stamp file
+    try:
+        cache_update_time = int(os.path.getmtime(PACMAN_UPDATE_STAMP))
+    except OSError:
+        cache_update_time = None
+    cache_valid_time = module.params["cache_valid_time"]
     if module.params["force"]:
         args = "Syy"
+    elif cache_valid_time > 0 and cache_update_time is not None and time.time() - cache_update_time < cache_valid_time:
+        return False, cache_update_time
     else:
         args = "Sy"
 
+    if module.check_mode:
+        return True, int(time.time())
+
     cmd = "%s -%s" % (pacman_path, args)
     rc, stdout, stderr = module.run_command(cmd, check_rc=False)
 
     if rc == 0:
-        return True
+        try:
+            open(PACMAN_UPDATE_STAMP, 'w').close()
+        except (IOError, OSError):
+            # Without the stamp the next run refreshes again
+            pass
+        return True, int(time.time())
     else:
         module.fail_json(msg="could not update package db")
 
-def upgrade(module, pacman_path):
+def upgrade(module, pacman_path, result):
     cmdupgrade = "%s -Suq --noconfirm" % (pacman_path)
     cmdneedrefresh = "%s -Qqu" % (pacman_path)
     rc, stdout, stderr = module.run_command(cmdneedrefresh, check_rc=False)
@@ -174,16 +374,16 @@ def upgrade(module, pacman_path):
     if rc == 0:
         if module.check_mode:
             data = stdout.split('\n')
-            module.exit_json(changed=True, msg="%s package(s) would be upgraded" % (len(data) - 1))
+            module.exit_json(changed=True, msg="%s package(s) would be upgraded" % (len(data) - 1), **result)
         rc, stdout, stderr = module.run_command(cmdupgrade, check_rc=False)
         if rc == 0:
-            module.exit_json(changed=True, msg='System upgraded')
+            module.exit_json(changed=True, msg='System upgraded', **result)
         else:
             module.fail_json(msg="Could not upgrade")
     else:
-        module.exit_json(changed=False, msg='Nothing to upgrade')
+        module.exit_json(changed=False, msg='Nothing to upgrade', **result)
 
-def remove_packages(module, pacman_path, packages):
+def remove_packages(module, pacman_path, packages, result):
     if module.params["recurse"] or module.params["force"]:
         if module.params["recurse"]:
             args = "Rs"
@@ -194,37 +394,44 @@ def remove_packages(module, pacman_path, packages):
     else:
         args = "R"
 
-    remove_c = 0
-    # Using a for loop incase of error, we can report the package that failed
-    for package in packages:
-        # Query the package first, to see if we even need to remove
-        installed, updated, unknown = query_package(module, pacman_path, package)
-        if not installed:
-            continue
+    index, online = get_package_index(module, pacman_path)
+    providers = resolve_provides(module, pacman_path, index, packages)
 
-        cmd = "%s -%s %s --noconfirm" % (pacman_path, args, package)
+    # Query the packages first, to see if we even need to remove
+    to_remove = []
+    for package in packages:
+        installed, updated, unknown = query_package(index, package, online)
+        # pacman -R only takes package names, not what they provide
+        package = providers.get(package, package)
+        if installed and package not in to_remove:
+            to_remove.append(package)
+
+    if to_remove:
+        # Remove everything in a single transaction, the index would be stale
+        # after a recursive removal anyway
+        cmd = "%s -%s %s --noconfirm" % (pacman_path, args, " ".join(to_remove))
         rc, stdout, stderr = module.run_command(cmd, check_rc=False)
 
         if rc != 0:
-            module.fail_json(msg="failed to remove %s" % (package))
-
-        remove_c += 1
+            module.fail_json(msg="failed to remove %s" % (", ".join(to_remove)), stdout=stdout, stderr=stderr)
 
-    if remove_c > 0:
+        module.exit_json(changed=True, msg="removed %s package(s)" % len(to_remove), **result)
 
-        module.exit_json(changed=True, msg="removed %s package(s)" % remove_c)
+    module.exit_json(changed=False, msg="package(s) already absent", **result)
 
-    module.exit_json(changed=False, msg="package(s) already absent")
 
-
-def install_packages(module, pacman_path, state, packages, package_files):
-    install_c = 0
+def install_packages(module, pacman_path, state, packages, package_files, result):
+    to_install = []
+    to_install_files = []
     package_err = []
     message = ""
 
+    index, online = get_package_index(module, pacman_path, remote=(state == 'latest'))
+    resolve_provides(module, pacman_path, index, packages)
+
     for i, package in enumerate(packages):
         # if the package is installed and state == present or state == latest and is up-to-date then skip
-        installed, updated, latestError = query_package(module, pacman_path, package)
+        installed, updated, latestError = query_package(index, package, online)
         if latestError and state == 'latest':
             package_err.append(package)
 
@@ -232,30 +439,38 @@ def install_packages(module, pacman_path, state, packages, package_files):
             continue
 
         if package_files[i]:
-            params = '-U %s' % package_files[i]
+            to_install_files.append(package_files[i])
         else:
-            params = '-S %s' % package
+            to_install.append(package)
+
+    # One transaction per source, so that packages pulled in as dependencies
+    # of earlier ones are not reinstalled
+    for params, targets in (('-S', to_install), ('-U', to_install_files)):
+        if not targets:
+            continue
 
-        cmd = "%s %s --noconfirm --needed" % (pacman_path, params)
+        cmd = "%s %s %s --noconfirm --needed" % (pacman_path, params, " ".join(targets))
         rc, stdout, stderr = module.run_command(cmd, check_rc=False)
 
         if rc != 0:
-            module.fail_json(msg="failed to install %s" % (package))
+            module.fail_json(msg="failed to install %s" % (", ".join(targets)), stdout=stdout, stderr=stderr)
 
-        install_c += 1
+    install_c = len(to_install) + len(to_install_files)
 
     if state == 'latest' and len(package_err) > 0:
         message = "But could not ensure 'latest' state for %s package(s) as remote version could not be fetched." % (package_err)
 
     if install_c > 0:
-        module.exit_json(changed=True, msg="installed %s package(s). %s" % (install_c, message))
+        module.exit_json(changed=True, msg="installed %s package(s). %s" % (install_c, message), **result)
 
-    module.exit_json(changed=False, msg="package(s) already installed. %s" % (message))
+    module.exit_json(changed=False, msg="package(s) already installed. %s" % (message), **result)
 
 def check_packages(module, pacman_path, packages, state):
     would_be_changed = []
+    index, online = get_package_index(module, pacman_path, remote=(state == 'latest'))
+    resolve_provides(module, pacman_path, index, packages)
     for package in packages:
-        installed, updated, unknown = query_package(module, pacman_path, package)
+        installed, updated, unknown = query_package(index, package, online)
         if ((state in ["present", "latest"] and not installed) or
                 (state == "absent" and installed) or
                 (state == "latest" and not updated)):
@@ -272,16 +487,26 @@ def check_packages(module, pacman_path, packages, state):
 def expand_package_groups(module, pacman_path, pkgs):
     expanded = []
 
-    for pkg in pkgs:
-        cmd = "%s -Sgq %s" % (pacman_path, pkg)
-        rc, stdout, stderr = module.run_command(cmd, check_rc=False)
+    # List all group names once, then the members of the requested groups,
+    # rather than asking pacman about every name
+    groups = {}
+    cmd = "%s -Sg" % (pacman_path)
+    rc, stdout, stderr = module.run_command(cmd, check_rc=False)
+    if rc == 0:
+        names = set(stdout.split())
+        wanted = [pkg for pkg in pkgs if pkg in names]
+        if wanted:
+            cmd = "%s -Sg %s" % (pacman_path, " ".join(wanted))
+            rc, stdout, stderr = module.run_command(cmd, check_rc=False)
+            for line in stdout.split('\n'):
+                fields = line.split()
+                if len(fields) == 2:
+                    groups.setdefault(fields[0], []).append(fields[1])
 
-        if rc == 0:
+    for pkg in pkgs:
+        if pkg in groups:
             # A group was found matching the name, so expand it
-            for name in stdout.split('\n'):
-                name = name.strip()
-                if name:
-                    expanded.append(name)
+            expanded.extend(groups[pkg])
         else:
             expanded.append(pkg)
 
@@ -296,7 +521,8 @@ def main():
             recurse      = dict(default=False, type='bool'),
             force        = dict(default=False, type='bool'),
             upgrade      = dict(default=False, type='bool'),
-            update_cache = dict(default=False, aliases=['update-cache'], type='bool')
+            update_cache = dict(default=False, aliases=['update-cache'], type='bool'),
+            cache_valid_time = dict(default=0, type='int')
         ),
         required_one_of = [['name', 'update_cache', 'upgrade']],
         supports_check_mode = True)
@@ -311,16 +537,21 @@ def main():
     elif p['state'] in ['absent', 'removed']:
         p['state'] = 'absent'
 
-    if p["update_cache"] and not module.check_mode:
-        update_package_db(module, pacman_path)
-        if not (p['name'] or p['upgrade']):
-            module.exit_json(changed=True, msg='Updated the package master lists')
+    result = {}
 
-    if p['update_cache'] and module.check_mode and not (p['name'] or p['upgrade']):
-        module.exit_json(changed=True, msg='Would have updated the package cache')
+    if p["update_cache"]:
+        cache_updated, cache_update_time = update_package_db(module, pacman_path)
+        result['cache_updated'] = cache_updated
+        result['cache_update_time'] = cache_update_time
+        if not (p['name'] or p['upgrade']):
+            if cache_updated and module.check_mode:
+                module.exit_json(changed=True, msg='Would have updated the package cache', **result)
+            if cache_updated:
+                module.exit_json(changed=True, msg='Updated the package master lists', **result)
+            module.exit_json(changed=False, msg='The package master lists are up to date', **result)
 
     if p['upgrade']:
-        upgrade(module, pacman_path)
+        upgrade(module, pacman_path, result)
 
     if p['name']:
         pkgs = expand_package_groups(module, pacman_path, p['name'])
@@ -339,9 +570,9 @@ def main():
             check_packages(module, pacman_path, pkgs, p['state'])
 
         if p['state'] in ['present', 'latest']:
-            install_packages(module, pacman_path, p['state'], pkgs, pkg_files)
+            install_packages(module, pacman_path, p['state'], pkgs, pkg_files, result)
         elif p['state'] == 'absent':
-            remove_packages(module, pacman_path, pkgs)
+            remove_packages(module, pacman_path, pkgs, result)
 
 # import module snippets
 from ansible.module_utils.basic import *
@@ -146,6 +146,21 @@ options:
     default: False
     choices: [ "yes", "no" ]
 
+  jobs:
+    description:
+      - Number of packages to build simultaneously (--jobs)
+    required: false
+    default: null
+    version_added: "2.3"
+
+  loadavg:
+    description:
+      - Do not start new builds while other builds are running and the load
+        average is at least this value (--load-average)
+    required: false
+    default: null
+    version_added: "2.3"
+
 requirements: [ gentoolkit ]
 author: 
     - "Yap Sok Ann (@sayap)"
@@ -172,6 +187,9 @@ EXAMPLES = '''
 # Sync repositories and update world
 - portage: package=@world update=yes deep=yes sync=yes
 
+# Update world using all 8 cores, throttled on load
+- portage: package=@world update=yes deep=yes jobs=8 loadavg=8.0
+
 # Remove unneeded packages
 - portage: depclean=yes
 
@@ -191,7 +209,58 @@ def query_package(module, package, action):
     return query_atom(module, package, action)
 
 
+# Name and version of an installed package directory, e.g. foo-bar-1.2.3_rc1-r2
+PF_RE = re.compile(
+    r'^(?P<pn>.+?)-(?P<pv>\d+(?:\.\d+)*[a-z]?'
+    r'(?:_(?:alpha|beta|pre|rc|p)\d*)*(?:-r\d+)?)$'
+)
+# Atoms without operator, version, slot, repository or wildcard
+SIMPLE_ATOM_RE = re.compile(r'^(?:[\w+][\w+.-]*/)?[\w+][\w+-]*$')
+
+VDB_PATH = '/var/db/pkg'
+
+
+def get_installed_packages(module):
+    """Index the installed packages by reading the package database once.
+
+    Returns a set holding both the category/name and the bare name of every
+    installed package.
+    """
+    if module.installed_packages is not None:
+        return module.installed_packages
+
+    installed = set()
+    try:
+        categories = os.listdir(VDB_PATH)
+    except OSError:
+        categories = []
+
+    for category in categories:
+        category_path = os.path.join(VDB_PATH, category)
+        if not os.path.isdir(category_path):
+            continue
+
+        for pf in os.listdir(category_path):
+            # Skip packages in the middle of being merged
+            if pf.startswith('-MERGING-'):
+                continue
+            match = PF_RE.match(pf)
+            if match:
+                installed.add('%s/%s' % (category, match.group('pn')))
+                installed.add(match.group('pn'))
+
+    module.installed_packages = installed
+    return installed
+
+
 def query_atom(module, atom, action):
+    if SIMPLE_ATOM_RE.match(atom):
+        return atom in get_installed_packages(module)
+
+    # Leave version and slot matching to equery
+    if not module.equery_path:
+        module.fail_json(msg='equery is required to query atom %s' % atom)
+
     cmd = '%s list %s' % (module.equery_path, atom)
 
     rc, out, err = module.run_command(cmd)
@@ -215,14 +284,18 @@ def query_set(module, set, action):
             module.fail_json(msg='set %s cannot be removed' % set)
         return False
 
-    world_sets_path = '/var/lib/portage/world_sets'
-    if not os.path.exists(world_sets_path):
-        return False
+    if module.world_sets is None:
+        world_sets_path = '/var/lib/portage/world_sets'
+        try:
+            f = open(world_sets_path)
+            try:
+                module.world_sets = f.read()
+            finally:
+                f.close()
+        except IOError:
+            module.world_sets = ''
 
-    cmd = 'grep %s %s' % (set, world_sets_path)
-
-    rc, out, err = module.run_command(cmd)
-    return rc == 0
+    return set in module.world_sets
 
 
 def sync_repositories(module, webrsync=False):
@@ -240,9 +313,11 @@ def sync_repositories(module, webrsync=False):
         module.fail_json(msg='could not sync package repositories')
 
 
-# Note: In the 3 functions below, equery is done one-by-one, but emerge is done
-# in one go. If that is not desirable, split the packages into multiple tasks
-# instead of joining them together with comma.
+# Note: In the 3 functions below, packages are looked up one-by-one in the
+# package database read once by get_installed_packages (equery is only run for
+# atoms with versions or slots), but emerge is done in one go. If that is not
+# desirable, split the packages into multiple tasks instead of joining them
+# together with comma.
 
 
 def emerge_packages(module, packages):
@@ -277,6 +352,14 @@ def emerge_packages(module, packages):
         if p[flag]:
             args.append(arg)
 
+    emerge_values = {
+        'jobs': '--jobs=%d',
+        'loadavg': '--load-average=%s',
+    }
+    for flag, arg in emerge_values.iteritems():
+        if p[flag] is not None:
+            args.append(arg % p[flag])
+
     if p['usepkg'] and p['usepkgonly']:
         module.fail_json(msg='Use only one of usepkg, usepkgonly')
 
@@ -416,6 +499,8 @@ def main():
             getbinpkg=dict(default=False, type='bool'),
             usepkgonly=dict(default=False, type='bool'),
             usepkg=dict(default=False, type='bool'),
+            jobs=dict(default=None, type='int'),
+            loadavg=dict(default=None, type='float'),
         ),
         required_one_of=[['package', 'sync', 'depclean']],
         mutually_exclusive=[['nodeps', 'onlydeps'], ['quiet', 'verbose']],
@@ -423,7 +508,9 @@ def main():
     )
 
     module.emerge_path = module.get_bin_path('emerge', required=True)
-    module.equery_path = module.get_bin_path('equery', required=True)
+    module.equery_path = module.get_bin_path('equery')
+    module.installed_packages = None
+    module.world_sets = None
 
     p = module.params
 
@@ -26,8 +26,18 @@
 # You should have received a copy of the GNU General Public License
 # along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
 
-from xml.dom.minidom import parseString as parseXML
 import re
+import time
+
+try:
+    from xml.etree.cElementTree import iterparse
+except ImportError:
+    from xml.etree.ElementTree import iterparse
+
+try:
+    from cStringIO import StringIO
+except ImportError:
+    from io import StringIO
 
 DOCUMENTATION = '''
 ---
@@ -143,6 +153,15 @@ EXAMPLES = '''
 - zypper: name=docker>=1.10 state=installed
 '''
 
+RETURN = '''
+timing:
+    description: Seconds spent working out the transaction (plan) and running
+      zypper to apply it (apply, 0.0 when there was nothing to do).
+    returned: when state is present, installed or latest, except for name=* with state=latest
+    type: dictionary
+    sample: {"plan": 0.412, "apply": 5.873}
+'''
+
 
 def split_name_version(name):
     """splits of the package name and desired version
@@ -201,34 +220,59 @@ def get_installed_state(m, packages):
     return parse_zypper_xml(m, cmd, fail_not_found=False)[0]
 
 
+def iter_zypper_xml(output, tags):
+    """parse zypper xml output incrementally, yielding (parent tag, element) for the elements in tags.
+    Elements are discarded once yielded, so memory is bounded by one element rather than the whole document."""
+    parents = []
+    for event, elem in iterparse(StringIO(output), events=('start', 'end')):
+        if event == 'start':
+            parents.append(elem)
+            continue
+
+        parents.pop()
+        if elem.tag in tags:
+            yield parents[-1].tag, elem
+            elem.clear()
+            # drop the already processed siblings
+            parents[-1].clear()
+
+
 def parse_zypper_xml(m, cmd, fail_not_found=True, packages=None):
     rc, stdout, stderr = m.run_command(cmd, check_rc=False)
 
-    dom = parseXML(stdout)
-    if rc == 104:
-        # exit code 104 is ZYPPER_EXIT_INF_CAP_NOT_FOUND (no packages found)
-        if fail_not_found:
-            errmsg = dom.getElementsByTagName('message')[-1].childNodes[0].data
-            m.fail_json(msg=errmsg, rc=rc, stdout=stdout, stderr=stderr, cmd=cmd)
-        else:
-            return {}, rc, stdout, stderr
-    elif rc in [0, 106, 103]:
-        # zypper exit codes
-        # 0: success
-        # 106: signature verification failed
-        # 103: zypper was upgraded, run same command again
-        if packages is None:
-            firstrun = True
-            packages = {}
-        solvable_list = dom.getElementsByTagName('solvable')
-        for solvable in solvable_list:
-            name = solvable.getAttribute('name')
-            packages[name] = {}
-            packages[name]['version'] = solvable.getAttribute('edition')
-            packages[name]['oldversion'] = solvable.getAttribute('edition-old')
-            status = solvable.getAttribute('status')
-            packages[name]['installed'] = status == "installed"
-            packages[name]['group'] = solvable.parentNode.nodeName
+    firstrun = False
+    try:
+        if rc == 104:
+            # exit code 104 is ZYPPER_EXIT_INF_CAP_NOT_FOUND (no packages found)
+            if fail_not_found:
+                errmsg = ''
+                for group, message in iter_zypper_xml(stdout, ['message']):
+                    errmsg = message.text
+                m.fail_json(msg=errmsg, rc=rc, stdout=stdout, stderr=stderr, cmd=cmd)
+            else:
+                return {}, rc, stdout, stderr
+        elif rc in [0, 106, 103]:
+            # zypper exit codes
+            # 0: success
+            # 106: signature verification failed
+            # 103: zypper was upgraded, run same command again
+            if packages is None:
+                firstrun = True
+                packages = {}
+            for group, solvable in iter_zypper_xml(stdout, ['solvable']):
+                name = solvable.get('name')
+                packages[name] = {}
+                packages[name]['version'] = solvable.get('edition', '')
+                packages[name]['oldversion'] = solvable.get('edition-old', '')
+                status = solvable.get('status')
+                packages[name]['installed'] = status == "installed"
+                packages[name]['group'] = group
+    except SyntaxError:
+        # ParseError of ElementTree is a SyntaxError
+        e = get_exception()
+        m.fail_json(msg='Failed to parse zypper output: %s' % e, rc=rc, stdout=stdout, stderr=stderr, cmd=cmd)
+
+    if rc in [0, 106, 103]:
         if rc == 103 and firstrun:
             # if this was the first run and it failed with 103
             # run zypper again with the same command to complete update
@@ -289,9 +333,18 @@ def set_diff(m, retvals, result):
         retvals['diff']['prepared'] += '\n' + output
 
 
-def package_present(m, name, want_latest):
-    "install and update (if want_latest) the packages in name_install, while removing the packages in name_remove"
-    retvals = {'rc': 0, 'stdout': '', 'stderr': ''}
+def version_installed(installed, version):
+    "whether the installed edition is the one requested with an exact =version specifier"
+    if not version.startswith('=') or installed is None:
+        return False
+    version = version[1:]
+    # a version without release matches any release
+    return installed['version'] == version or installed['version'].startswith(version + '-')
+
+
+def plan_package_present(m, name, want_latest):
+    """compute the packages to pass to the install transaction.
+    for state=present, the installed state of all named packages is read with a single search"""
     name_install, name_remove, urls = get_want_state(m, name)
 
     # if a version string is given, pass it to zypper
@@ -302,17 +355,35 @@ def package_present(m, name, want_latest):
     if install_version or remove_version:
         m.params['oldpackage'] = True
 
-    if not want_latest:
+    if want_latest:
+        name_install = [p for p in name_install if not name_install[p]]
+        name_remove = [p for p in name_remove if not name_remove[p]]
+    else:
         # for state=present: filter out already installed packages
         install_and_remove = name_install.copy()
         install_and_remove.update(name_remove)
         prerun_state = get_installed_state(m, install_and_remove)
+        # packages whose exact requested version is already there need no transaction
+        install_version = [p+name_install[p] for p in name_install
+                           if name_install[p] and not version_installed(prerun_state.get(p), name_install[p])]
         # generate lists of packages to install or remove
-        name_install = [p for p in name_install if p not in prerun_state]
-        name_remove = [p for p in name_remove if p in prerun_state]
-        if not any((name_install, name_remove, urls, install_version, remove_version)):
-            # nothing to install/remove and nothing to update
-            return None, retvals
+        name_install = [p for p in name_install if not name_install[p] and p not in prerun_state]
+        name_remove = [p for p in name_remove if not name_remove[p] and p in prerun_state]
+
+    return name_install, name_remove, urls, install_version, remove_version
+
+
+def package_present(m, name, want_latest):
+    "install and update (if want_latest) the packages in name_install, while removing the packages in name_remove"
+    retvals = {'rc': 0, 'stdout': '', 'stderr': ''}
+
+    start = time.time()
+    name_install, name_remove, urls, install_version, remove_version = plan_package_present(m, name, want_latest)
+    retvals['timing'] = {'plan': round(time.time() - start, 3), 'apply': 0.0}
+
+    if not any((name_install, name_remove, urls, install_version, remove_version)):
+        # nothing to install/remove and nothing to update
+        return None, retvals
 
     # zypper install also updates packages
     cmd = get_cmd(m, 'install')
@@ -330,7 +401,9 @@ def package_present(m, name, want_latest):
     cmd.extend(['-%s' % p for p in name_remove])
 
     retvals['cmd'] = cmd
+    start = time.time()
     result, retvals['rc'], retvals['stdout'], retvals['stderr'] = parse_zypper_xml(m, cmd)
+    retvals['timing']['apply'] = round(time.time() - start, 3)
 
     return result, retvals
 
@@ -444,5 +517,6 @@ def main():
 
 # import module snippets
 from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.pycompat24 import get_exception
 if __name__ == "__main__":
     main()
@@ -73,7 +73,8 @@ options:
   state:
     description:
       - "Should this port accept(enabled) or reject(disabled) connections."
-    required: true
+      - "Required unless the zone lists (C(services), C(ports), C(sources), C(rich_rules)) are used."
+    required: false
     choices: [ "enabled", "disabled" ]
   timeout:
     description:
@@ -86,6 +87,30 @@ options:
     required: false
     default: null
     version_added: "2.1"
+  services:
+    description:
+      - "Full list of the services of the zone. Services of the zone that are not listed are removed. Together with C(ports), C(sources) and C(rich_rules) this declares the zone in one task: the zone settings are fetched once, the permanent configuration is changed with a single update and only the missing or extra entries are added or removed at runtime. Lists that are not given are left alone."
+    required: false
+    default: null
+    version_added: "2.3"
+  ports:
+    description:
+      - "Full list of the ports of the zone, in the same format as C(port). See C(services)."
+    required: false
+    default: null
+    version_added: "2.3"
+  sources:
+    description:
+      - "Full list of the sources of the zone. See C(services)."
+    required: false
+    default: null
+    version_added: "2.3"
+  rich_rules:
+    description:
+      - "Full list of the rich rules of the zone. See C(services)."
+    required: false
+    default: null
+    version_added: "2.3"
 notes:
   - Not tested on any Debian based system.
   - Requires the python2 bindings of firewalld, which may not be installed by default if the distribution switched to python 3
@@ -102,6 +127,17 @@ EXAMPLES = '''
 - firewalld: source='192.0.2.0/24' zone=internal state=enabled
 - firewalld: zone=trusted interface=eth2 permanent=true state=enabled
 - firewalld: masquerade=yes state=enabled permanent=true zone=dmz
+
+# Declare the whole zone in one task, entries that are not listed are removed
+- firewalld:
+    zone: public
+    permanent: true
+    immediate: true
+    services: [ ssh, https ]
+    ports: [ 8081/tcp, 161-162/udp ]
+    sources: [ 192.0.2.0/24 ]
+    rich_rules:
+      - 'rule service name="ftp" audit limit value="1/m" accept'
 '''
 
 from ansible.module_utils.basic import AnsibleModule
@@ -364,6 +400,109 @@ def set_rich_rule_disabled_permanent(zone, rule):
     fw_settings.removeRichRule(rule)
     update_fw_settings(fw_zone, fw_settings)
 
+########################
+# declarative zone mode
+#
+
+# Zone lists and the name used by the firewalld API calls handling them,
+# e.g. getServices/addService/removeService
+ZONE_LISTS = dict(
+    services='Service',
+    ports='Port',
+    sources='Source',
+    rich_rules='RichRule',
+)
+
+def parse_port(port):
+    try:
+        port, protocol = port.split('/')
+    except ValueError:
+        module.fail_json(msg='improper port format (missing protocol?): %s' % port)
+    return (port, protocol)
+
+def get_desired_zone_lists(params):
+    desired = {}
+    for category in ZONE_LISTS:
+        items = params[category]
+        if items is None:
+            continue
+        if category == 'ports':
+            items = [parse_port(port) for port in items]
+        elif category == 'rich_rules':
+            # Convert the rule strings to standard format
+            items = [str(Rich_Rule(rule_str=rule)) for rule in items]
+        desired[category] = set(items)
+    return desired
+
+def get_zone_lists(source, categories, *args):
+    current = {}
+    for category in categories:
+        items = getattr(source, 'get%ss' % ZONE_LISTS[category])(*args)
+        if category == 'ports':
+            items = [tuple(port) for port in items]
+        current[category] = set(items)
+    return current
+
+def diff_zone_lists(current, desired):
+    changes = []
+    for category in desired:
+        to_add = list(desired[category] - current[category])
+        to_remove = list(current[category] - desired[category])
+        to_add.sort()
+        to_remove.sort()
+        for item in to_add:
+            changes.append(('add', category, item))
+        for item in to_remove:
+            changes.append(('remove', category, item))
+    return changes
+
+def zone_item_args(category, item):
+    if category == 'ports':
+        return list(item)
+    return [item]
+
+def describe_zone_change(action, category, item, zone, operation):
+    if category == 'ports':
+        item = '%s/%s' % item
+    if action == 'add':
+        return "Added %s %s to zone %s (%s)" % (category[:-1].replace('_', ' '), item, zone, operation)
+    return "Removed %s %s from zone %s (%s)" % (category[:-1].replace('_', ' '), item, zone, operation)
+
+def reconcile_zone(zone, permanent, immediate, timeout):
+    desired = get_desired_zone_lists(module.params)
+    changed = False
+    msgs = []
+
+    if permanent:
+        # One read of the zone settings and at most one update
+        fw_zone, fw_settings = get_fw_zone_settings(zone)
+        changes = diff_zone_lists(get_zone_lists(fw_settings, desired), desired)
+        msgs.append('Permanent operation')
+        for action, category, item in changes:
+            if not module.check_mode:
+                method = getattr(fw_settings, '%s%s' % (action, ZONE_LISTS[category]))
+                method(*zone_item_args(category, item))
+            msgs.append(describe_zone_change(action, category, item, zone, 'permanent'))
+        if changes:
+            changed = True
+            if not module.check_mode:
+                update_fw_settings(fw_zone, fw_settings)
+
+    if immediate or not permanent:
+        changes = diff_zone_lists(get_zone_lists(fw, desired, zone), desired)
+        msgs.append('Non-permanent operation')
+        for action, category, item in changes:
+            if not module.check_mode:
+                args = [zone] + zone_item_args(category, item)
+                if action == 'add' and category != 'sources':
+                    args.append(timeout)
+                getattr(fw, '%s%s' % (action, ZONE_LISTS[category]))(*args)
+            msgs.append(describe_zone_change(action, category, item, zone, 'runtime'))
+        if changes:
+            changed = True
+
+    return changed, msgs
+
 
 def main():
     global module
@@ -377,10 +516,14 @@ def main():
             immediate=dict(type='bool',default=False),
             source=dict(required=False,default=None),
             permanent=dict(type='bool',required=False,default=None),
-            state=dict(choices=['enabled', 'disabled'], required=True),
+            state=dict(choices=['enabled', 'disabled'], required=False, default=None),
             timeout=dict(type='int',required=False,default=0),
             interface=dict(required=False,default=None),
             masquerade=dict(required=False,default=None),
+            services=dict(type='list',required=False,default=None),
+            ports=dict(type='list',required=False,default=None),
+            sources=dict(type='list',required=False,default=None),
+            rich_rules=dict(type='list',required=False,default=None),
         ),
         supports_check_mode=True
     )
@@ -481,6 +624,23 @@ def main():
     interface = module.params['interface']
     masquerade = module.params['masquerade']
 
+    declarative = False
+    for category in ZONE_LISTS:
+        if module.params[category] != None:
+            declarative = True
+
+    if declarative:
+        for option in ['service', 'port', 'rich_rule', 'source', 'interface', 'masquerade']:
+            if module.params[option] != None:
+                module.fail_json(msg='%s cannot be used together with the zone lists (services, ports, sources, rich_rules)' % option)
+        changed, msgs = reconcile_zone(zone, permanent, immediate, timeout)
+        if fw_offline:
+            msgs.append("(offline operation: only on-disk configs were altered)")
+        module.exit_json(changed=changed, msg=', '.join(msgs))
+
+    if desired_state == None:
+        module.fail_json(msg='state is a required parameter')
+
     modification_count = 0
     if service != None:
         modification_count += 1
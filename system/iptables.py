@@ -18,11 +18,130 @@
 # You should have received a copy of the GNU General Public License
 # along with this software.  If not, see <http://www.gnu.org/licenses/>.
 
+import pwd
+import shlex
+
 BINS = dict(
     ipv4='iptables',
     ipv6='ip6tables',
 )
 
+SAVE_BINS = dict(
+    ipv4='iptables-save',
+    ipv6='ip6tables-save',
+)
+
+RESTORE_BINS = dict(
+    ipv4='iptables-restore',
+    ipv6='ip6tables-restore',
+)
+
+# Host prefix length iptables-save appends to single addresses.
+HOST_PREFIX = dict(
+    ipv4='/32',
+    ipv6='/128',
+)
+
+# Default --reject-with iptables-save prints for a bare -j REJECT.
+REJECT_DEFAULT = dict(
+    ipv4='icmp-port-unreachable',
+    ipv6='icmp6-port-unreachable',
+)
+
+# Options that may be set on the items of the rules list.
+RULE_OPTIONS = (
+    'table', 'state', 'action', 'chain', 'protocol', 'source', 'to_source',
+    'destination', 'to_destination', 'match', 'jump', 'goto', 'in_interface',
+    'out_interface', 'fragment', 'set_counters', 'source_port',
+    'destination_port', 'to_ports', 'set_dscp_mark', 'set_dscp_mark_class',
+    'comment', 'ctstate', 'limit', 'limit_burst', 'uid_owner', 'reject_with',
+    'icmp_type',
+)
+
+# Long options and the spelling iptables-save uses for them.
+OPTION_ALIASES = {
+    '--protocol': '-p',
+    '--source': '-s',
+    '--src': '-s',
+    '--destination': '-d',
+    '--dst': '-d',
+    '--match': '-m',
+    '--jump': '-j',
+    '--goto': '-g',
+    '--in-interface': '-i',
+    '--out-interface': '-o',
+    '--fragment': '-f',
+    '--source-port': '--sport',
+    '--destination-port': '--dport',
+}
+
+# Matches that are loaded implicitly by -p for their port options.
+PROTOCOL_OPTIONS = {
+    'tcp': ('--sport', '--dport', '--tcp-flags', '--syn', '--tcp-option'),
+    'udp': ('--sport', '--dport'),
+    'icmp': ('--icmp-type',),
+}
+
+# Options of the rule itself rather than of a match or target.
+BASE_OPTIONS = ('-p', '-s', '-d', '-i', '-o', '-f')
+
+# --limit units in seconds, and the scale xt_limit keeps rates in.
+LIMIT_UNITS = dict(s=1, m=60, h=60 * 60, d=24 * 60 * 60)
+LIMIT_SCALE = 10000
+LIMIT_RATES = (
+    ('day', LIMIT_SCALE * 24 * 60 * 60),
+    ('hour', LIMIT_SCALE * 60 * 60),
+    ('min', LIMIT_SCALE * 60),
+    ('sec', LIMIT_SCALE),
+)
+# Defaults iptables-save prints for a bare -m limit and leaves out.
+LIMIT_DEFAULT = '3/hour'
+LIMIT_BURST_DEFAULT = '5'
+
+# ICMP type names and the type[/code] iptables-save prints for them.
+ICMP_TYPES = {
+    'any': 'any',
+    'echo-reply': '0',
+    'pong': '0',
+    'destination-unreachable': '3',
+    'network-unreachable': '3/0',
+    'host-unreachable': '3/1',
+    'protocol-unreachable': '3/2',
+    'port-unreachable': '3/3',
+    'fragmentation-needed': '3/4',
+    'source-route-failed': '3/5',
+    'network-unknown': '3/6',
+    'host-unknown': '3/7',
+    'network-prohibited': '3/9',
+    'host-prohibited': '3/10',
+    'tos-network-unreachable': '3/11',
+    'tos-host-unreachable': '3/12',
+    'communication-prohibited': '3/13',
+    'host-precedence-violation': '3/14',
+    'precedence-cutoff': '3/15',
+    'source-quench': '4',
+    'redirect': '5',
+    'network-redirect': '5/0',
+    'host-redirect': '5/1',
+    'tos-network-redirect': '5/2',
+    'tos-host-redirect': '5/3',
+    'echo-request': '8',
+    'ping': '8',
+    'router-advertisement': '9',
+    'router-solicitation': '10',
+    'time-exceeded': '11',
+    'ttl-exceeded': '11',
+    'ttl-zero-during-transit': '11/0',
+    'ttl-zero-during-reassembly': '11/1',
+    'parameter-problem': '12',
+    'ip-header-bad': '12/0',
+    'required-option-missing': '12/1',
+    'timestamp-request': '13',
+    'timestamp-reply': '14',
+    'address-mask-request': '17',
+    'address-mask-reply': '18',
+}
+
 DOCUMENTATION = '''
 ---
 module: iptables
@@ -291,6 +410,16 @@ options:
         ACCEPT, DROP, QUEUE, RETURN. Only built in chains can have policies.
         This parameter requires the chain parameter. Ignores all other
         parameters."
+  rules:
+    version_added: "2.3"
+    description:
+      - "A list of rules to converge with a single iptables-save and
+        iptables-restore run. Each item is a dictionary taking the rule
+        options of this module (table, state, action, chain, protocol, ...);
+        options left out of an item fall back to the value given to the
+        module itself. Mutually exclusive with C(flush) and C(policy)."
+    required: false
+    default: null
 '''
 
 EXAMPLES = '''
@@ -311,6 +440,26 @@ EXAMPLES = '''
 
 # Tag all outbound tcp packets with DSCP DiffServ class CS1
 - iptables: chain=OUTPUT jump=DSCP table=mangle set_dscp_mark_class=CS1 protocol=tcp
+
+# Converge several rules with a single iptables-restore run
+- iptables:
+    chain: INPUT
+    rules:
+      - { protocol: tcp, destination_port: 22, jump: ACCEPT, action: insert }
+      - { protocol: tcp, destination_port: 443, jump: ACCEPT }
+      - { source: 8.8.8.8, jump: DROP, state: absent }
+      - { table: nat, chain: PREROUTING, protocol: tcp, destination_port: 80,
+          jump: REDIRECT, to_ports: 8600 }
+  become: yes
+'''
+
+RETURN = '''
+commands:
+    description: the iptables-restore commands run (or, in check mode, that
+                 would be run) for the rules list
+    returned: when rules is used
+    type: list
+    sample: ["-I INPUT 1 -p tcp --destination-port 22 -j ACCEPT"]
 '''
 
 
@@ -417,6 +566,304 @@ def set_chain_policy(iptables_path, module, params):
     module.run_command(cmd, check_rc=True)
 
 
+def is_option(token):
+    return len(token) > 1 and token[0] == '-' and not token[1].isdigit()
+
+
+def split_options(tokens):
+    options = []
+    negate = False
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        i += 1
+        if token == '!':
+            negate = True
+            continue
+        values = []
+        while i < len(tokens) and tokens[i] != '!' and not is_option(tokens[i]):
+            values.append(tokens[i])
+            i += 1
+        flag = OPTION_ALIASES.get(token, token)
+        if negate:
+            flag = '!' + flag
+            negate = False
+        options.append((flag, ' '.join(values)))
+    return options
+
+
+def dscp_class_value(value):
+    name = value.upper()
+    if name == 'EF':
+        return 46
+    if name.startswith('CS') and name[2:].isdigit():
+        return int(name[2:]) << 3
+    if name.startswith('AF') and len(name) == 4 and name[2:].isdigit():
+        return (int(name[2]) << 3) + (int(name[3]) << 1)
+    return None
+
+
+def limit_rate(value):
+    """Return a --limit rate as iptables-save prints it, e.g. 60/min as
+    1/sec and a bare 5 as 5/sec."""
+    if '/' in value:
+        rate, unit = value.split('/', 1)
+        unit = LIMIT_UNITS.get(unit[:1].lower())
+    else:
+        rate, unit = value, 1
+    if unit is None or not rate.isdigit() or int(rate) == 0:
+        return value
+    period = LIMIT_SCALE * unit // int(rate)
+    if period == 0:
+        return value
+    # Same unit selection as print_rate() in libxt_limit.
+    i = 1
+    while i < len(LIMIT_RATES):
+        mult = LIMIT_RATES[i][1]
+        if period > mult or mult // period < mult % period:
+            break
+        i += 1
+    name, mult = LIMIT_RATES[i - 1]
+    return '%d/%s' % (mult // period, name)
+
+
+def normalize_option(flag, value, ip_version):
+    """Return an option as iptables-save prints it, or None for options it
+    leaves out."""
+    bare = flag.lstrip('!')
+    if bare in ('-s', '-d') and value and '/' not in value:
+        return flag, value + HOST_PREFIX[ip_version]
+    if bare == '-p':
+        return flag, value.lower()
+    if bare in ('--state', '--ctstate'):
+        states = value.split(',')
+        states.sort()
+        return flag, ','.join(states)
+    if bare == '--limit':
+        return flag, limit_rate(value)
+    if bare == '--limit-burst' and value == LIMIT_BURST_DEFAULT:
+        return None
+    if bare == '--set-dscp-class':
+        dscp = dscp_class_value(value)
+        if dscp is None:
+            return flag, value
+        return '--set-dscp', '0x%02x' % dscp
+    if bare == '--set-dscp':
+        try:
+            return flag, '0x%02x' % int(value, 0)
+        except ValueError:
+            return flag, value
+    if bare == '--icmp-type':
+        return flag, ICMP_TYPES.get(value.lower(), value)
+    if bare == '--uid-owner' and not value.isdigit():
+        try:
+            return flag, str(pwd.getpwnam(value).pw_uid)
+        except KeyError:
+            return flag, value
+    return flag, value
+
+
+def normalize_rule(tokens, ip_version):
+    """Turn a rule into a key that compares equal to the same rule as
+    iptables-save prints it.
+
+    The key keeps the order of the matches, which decides how the rule is
+    evaluated, and only sorts the options inside the base part, each match
+    and the target, where iptables-save uses its own order."""
+    base = []
+    matches = []
+    target = None
+    current = None
+    protocol = None
+    for flag, value in split_options(tokens):
+        if flag == '-c':
+            continue
+        if flag == '-p':
+            protocol = value.lower()
+        option = normalize_option(flag, value, ip_version)
+        if option is None:
+            continue
+        if flag in ('-m', '-j', '-g'):
+            current = [value, []]
+            if flag == '-m':
+                matches.append(current)
+            else:
+                target = [flag + ' ' + value, current[1]]
+                current = target
+        elif flag.lstrip('!') in BASE_OPTIONS:
+            base.append(option)
+        elif flag.lstrip('!') in PROTOCOL_OPTIONS.get(protocol, ()):
+            # Loaded implicitly by -p if no -m for the protocol came first.
+            owner = [m for m in matches if m[0] == protocol]
+            if owner:
+                owner[0][1].append(option)
+            else:
+                matches.append([protocol, [option]])
+        elif current is not None:
+            current[1].append(option)
+        else:
+            base.append(option)
+
+    for name, options in matches:
+        if name == 'limit' and not [o for o in options if o[0] == '--limit']:
+            options.append(('--limit', LIMIT_DEFAULT))
+    if target is not None and target[0] == '-j REJECT':
+        if not [o for o in target[1] if o[0] == '--reject-with']:
+            target[1].append(('--reject-with', REJECT_DEFAULT[ip_version]))
+
+    base.sort()
+    key = [tuple(base)]
+    for name, options in matches:
+        options.sort()
+        key.append(('-m ' + name, tuple(options)))
+    if target is not None:
+        target[1].sort()
+        key.append((target[0], tuple(target[1])))
+    return tuple(key)
+
+
+def parse_save(output, ip_version):
+    tables = {}
+    table = None
+    for line in output.splitlines():
+        if line.startswith('*'):
+            table = line[1:].strip()
+            tables[table] = []
+        elif line.startswith('-A ') and table is not None:
+            tokens = shlex.split(line)
+            chain = tokens[1]
+            key = normalize_rule(tokens[2:], ip_version)
+            tables[table].append([chain, key, line, False])
+    return tables
+
+
+def quote_restore(token):
+    if token and not [c for c in token if c.isspace() or c in '"\'#']:
+        return token
+    return '"%s"' % token.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def format_restore(action, chain, tokens, position=None):
+    command = [action, chain]
+    if position is not None:
+        command.append(str(position))
+    command.extend([quote_restore(token) for token in tokens])
+    return ' '.join(command)
+
+
+def rule_params(module, item):
+    if not isinstance(item, dict):
+        module.fail_json(msg="Items of rules must be dictionaries, got: %s" % item)
+    unsupported = [key for key in item if key not in RULE_OPTIONS]
+    if unsupported:
+        module.fail_json(
+            msg="Unsupported option(s) in rules item: %s" % ', '.join(unsupported))
+    params = dict(module.params)
+    for key, value in item.items():
+        if key in ('match', 'ctstate'):
+            if value is None:
+                value = []
+            elif not isinstance(value, list):
+                value = [v.strip() for v in str(value).split(',')]
+        elif value is not None:
+            value = str(value)
+        params[key] = value
+    for key, choices in (('table', ['filter', 'nat', 'mangle', 'raw', 'security']),
+                         ('state', ['present', 'absent']),
+                         ('action', ['append', 'insert'])):
+        if params[key] not in choices:
+            module.fail_json(
+                msg="value of %s must be one of: %s, got: %s" % (key, ', '.join(choices), params[key]))
+    if params['chain'] is None:
+        module.fail_json(msg="chain must be specified for every item of rules")
+    if params['set_dscp_mark'] and params['set_dscp_mark_class']:
+        module.fail_json(
+            msg="parameters are mutually exclusive: set_dscp_mark|set_dscp_mark_class")
+    return params
+
+
+def plan_rules(module, tables, items, ip_version):
+    """Work out the iptables-restore commands needed to converge items,
+    updating the in-memory copy of tables as if they had been run."""
+    commands = {}
+    order = []
+    for item in items:
+        params = rule_params(module, item)
+        table = params['table']
+        chain = params['chain']
+        tokens = construct_rule(params)
+        key = normalize_rule(tokens, ip_version)
+        rules = tables.setdefault(table, [])
+        matches = [r for r in rules if r[0] == chain and r[1] == key]
+
+        if params['state'] == 'present':
+            if matches:
+                continue
+            if params['action'] == 'insert':
+                inserted = [r for r in rules if r[0] == chain and r[3]]
+                position = len(inserted) + 1
+                command = format_restore('-I', chain, tokens, position)
+                index = len(rules)
+                for i in range(len(rules)):
+                    if rules[i][0] == chain and not rules[i][3]:
+                        index = i
+                        break
+                if inserted:
+                    index = rules.index(inserted[-1]) + 1
+                rules.insert(index, [chain, key, format_restore('-A', chain, tokens), True])
+            else:
+                command = format_restore('-A', chain, tokens)
+                index = len(rules)
+                for i in range(len(rules)):
+                    if rules[i][0] == chain:
+                        index = i + 1
+                rules.insert(index, [chain, key, command, False])
+        else:
+            if not matches:
+                continue
+            # Delete using the rule as iptables-save printed it.
+            command = '-D' + matches[0][2][2:]
+            rules.remove(matches[0])
+
+        if table not in commands:
+            commands[table] = []
+            order.append(table)
+        commands[table].append(command)
+    return order, commands
+
+
+def apply_rules(module, ip_version):
+    save_path = module.get_bin_path(SAVE_BINS[ip_version], True)
+    restore_path = module.get_bin_path(RESTORE_BINS[ip_version], True)
+
+    rc, out, err = module.run_command([save_path], check_rc=True)
+    tables = parse_save(out, ip_version)
+    before = dict([(table, [r[2] for r in rules]) for table, rules in tables.items()])
+
+    order, commands = plan_rules(module, tables, module.params['rules'], ip_version)
+
+    result = dict(changed=bool(order), ip_version=ip_version, commands=[])
+    script = []
+    for table in order:
+        result['commands'].extend(commands[table])
+        script.append('*%s' % table)
+        script.extend(commands[table])
+        script.append('COMMIT')
+
+    if module._diff:
+        result['diff'] = dict(before='', after='')
+        for table in order:
+            result['diff']['before'] += '*%s\n%s\n' % (table, '\n'.join(before.get(table, [])))
+            result['diff']['after'] += '*%s\n%s\n' % (table, '\n'.join([r[2] for r in tables[table]]))
+
+    if script and not module.check_mode:
+        rc, out, err = module.run_command([restore_path, '--noflush'], data='\n'.join(script) + '\n')
+        if rc != 0:
+            module.fail_json(msg="iptables-restore failed: %s" % err, commands=result['commands'])
+
+    module.exit_json(**result)
+
+
 def main():
     module = AnsibleModule(
         supports_check_mode=True,
@@ -469,10 +916,13 @@ def main():
                 default=None,
                 type='str',
                 choices=['ACCEPT', 'DROP', 'QUEUE', 'RETURN']),
+            rules=dict(required=False, default=None, type='list'),
         ),
         mutually_exclusive=(
             ['set_dscp_mark', 'set_dscp_mark_class'],
             ['flush', 'policy'],
+            ['rules', 'flush'],
+            ['rules', 'policy'],
         ),
     )
     args = dict(
@@ -489,6 +939,10 @@ def main():
     ip_version = module.params['ip_version']
     iptables_path = module.get_bin_path(BINS[ip_version], True)
 
+    # Converge a list of rules with one iptables-save/iptables-restore pair
+    if module.params['rules']:
+        apply_rules(module, ip_version)
+
     # Check if chain option is required
     if args['flush'] is False and args['chain'] is None:
         module.fail_json(
@@ -32,8 +32,9 @@ options:
   name:
     aliases: [ 'host' ]
     description:
-      - The host to add or remove (must match a host specified in key)
-    required: true
+      - The host to add or remove (must match a host specified in key).
+        Required unless C(hosts) is given.
+    required: false
     default: null
   key:
     description:
@@ -51,6 +52,20 @@ options:
     choices: [ "present", "absent" ]
     required: no
     default: present
+  hosts:
+    description:
+      - A list of hosts to manage in one go. Every item is a dictionary with
+        a C(name) and optionally a C(key) and a C(state), which defaults to
+        the C(state) of the task. The file is read and indexed once and all
+        the changes are written with a single atomic rewrite.
+    required: false
+    default: null
+    version_added: "2.3"
+notes:
+  - The known_hosts file is parsed natively, including hashed host names
+    (see HashKnownHosts in ssh_config(5)) and the @cert-authority and
+    @revoked markers. Host patterns are compared literally, so a pattern
+    such as C(*.example.com) is managed by using that pattern as name.
 requirements: [ ]
 author: "Matthew Vernon (@mcv21)"
 '''
@@ -61,6 +76,17 @@ EXAMPLES = '''
   known_hosts: path='/etc/ssh/ssh_known_hosts'
                name='foo.com.invalid'
                key="{{ lookup('file', 'pubkeys/foo.com.invalid') }}"
+
+# Add several hosts and remove another with a single rewrite of the file
+- known_hosts:
+    path: /etc/ssh/ssh_known_hosts
+    hosts:
+      - name: foo.com.invalid
+        key: "{{ lookup('file', 'pubkeys/foo.com.invalid') }}"
+      - name: bar.com.invalid
+        key: "{{ lookup('file', 'pubkeys/bar.com.invalid') }}"
+      - name: old.com.invalid
+        state: absent
 '''
 
 # Makes sure public host keys are present or absent in the given known_hosts
@@ -72,208 +98,298 @@ EXAMPLES = '''
 #    key = line(s) to add to known_hosts file
 #    path = the known_hosts file to edit (default: ~/.ssh/known_hosts)
 #    state = absent|present (default: present)
+#    hosts = list of dicts with name, key and state, instead of name/key
 
+import base64
 import os
 import os.path
 import tempfile
 import errno
-import re
+try:
+    from hashlib import sha1
+except ImportError:
+    from sha import new as sha1
 from ansible.module_utils.pycompat24 import get_exception
 from ansible.module_utils.basic import *
 
+# Prefix of hashed host names, see HashKnownHosts in ssh_config(5)
+HASH_MAGIC = '|1|'
+
+def _pad_table(value):
+    table = [x ^ value for x in range(256)]
+    try:
+        return bytes(bytearray(table))
+    except NameError:
+        return ''.join([chr(x) for x in table])
+
+# Translation tables XORing a key with the HMAC ipad and opad bytes
+HMAC_IPAD = _pad_table(0x36)
+HMAC_OPAD = _pad_table(0x5c)
+HMAC_ZERO = _pad_table(0)[:1]
+
 def enforce_state(module, params):
     """
-    Add or remove key.
+    Add or remove keys.
     """
 
-    host = params["name"]
-    key = params.get("key",None)
-    port = params.get("port",None)
     path = params.get("path")
-    state = params.get("state")
-    #Find the ssh-keygen binary
-    sshkeygen = module.get_bin_path("ssh-keygen",True)
-
-    # Trailing newline in files gets lost, so re-add if necessary
-    if key and key[-1] != '\n':
-        key+='\n'
-
-    if key is None and state != "absent":
-        module.fail_json(msg="No key specified when adding a host")
-
-    sanity_check(module,host,key,sshkeygen)
-
-    found,replace_or_add,found_line=search_for_host_key(module,host,key,path,sshkeygen)
-
-    #We will change state if found==True & state!="present"
-    #or found==False & state=="present"
-    #i.e found XOR (state=="present")
-    #Alternatively, if replace is true (i.e. key present, and we must change it)
-    if module.check_mode:
-        module.exit_json(changed = replace_or_add or (state=="present") != found)
 
-    #Now do the work.
+    if params.get("hosts"):
+        items = params["hosts"]
+    else:
+        if params.get("name") is None:
+            module.fail_json(msg="one of name or hosts is required")
+        items = [dict(name=params["name"], key=params.get("key"))]
+
+    index = build_index(read_known_hosts(module, path))
+
+    # Look up all the hosts in a single pass over the hashed entries
+    names = []
+    for item in items:
+        if not isinstance(item, dict) or not item.get("name", item.get("host")):
+            module.fail_json(msg="Items of hosts must be dictionaries with a name")
+        names.append(item.get("name", item.get("host")))
+    resolve_hosts(index, names)
+
+    changed = False
+    for name, item in zip(names, items):
+        key = item.get("key")
+        state = item.get("state", params.get("state"))
+        if state not in ("present", "absent"):
+            module.fail_json(msg="state of %s must be one of: present, absent" % name)
+        if key is None and state != "absent":
+            module.fail_json(msg="No key specified when adding a host")
+        if update_host(module, index, name, key, state):
+            changed = True
+
+    #Do all the work in one rewrite of the file
+    if changed and not module.check_mode:
+        write_known_hosts(module, path, index)
+
+    params['changed'] = changed
+    return params
 
-    #Only remove whole host if found and no key provided
-    if found and key is None and state=="absent":
-        module.run_command([sshkeygen,'-R',host,'-f',path], check_rc=True)
-        params['changed'] = True
+def read_known_hosts(module, path):
+    '''Return the lines of path, or an empty list if it does not exist.'''
+    try:
+        inf=open(path,"r")
+    except IOError:
+        e = get_exception()
+        if e.errno == errno.ENOENT:
+            return []
+        module.fail_json(msg="Failed to read %s: %s" % \
+                             (path,str(e)))
+    try:
+        lines = inf.readlines()
+    finally:
+        inf.close()
+    # Trailing newline in files gets lost, so re-add if necessary
+    if lines and not lines[-1].endswith('\n'):
+        lines[-1] += '\n'
+    return lines
 
-    #Next, add a new (or replacing) entry
-    if replace_or_add or found != (state=="present"):
-        try:
-            inf=open(path,"r")
-        except IOError:
-            e = get_exception()
-            if e.errno == errno.ENOENT:
-                inf=None
-            else:
-                module.fail_json(msg="Failed to read %s: %s" % \
-                                     (path,str(e)))
+def write_known_hosts(module, path, index):
+    '''Write the surviving and added lines of index to path atomically.'''
+    tmp = None
+    try:
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        outf = os.fdopen(fd, 'w')
         try:
-            outf=tempfile.NamedTemporaryFile(dir=os.path.dirname(path))
-            if inf is not None:
-                for line_number, line in enumerate(inf, start=1):
-                    if found_line==line_number and (replace_or_add or state=='absent'):
-                        continue # skip this line to replace its key
+            for line_number, line in enumerate(index['lines']):
+                if line_number not in index['removed']:
                     outf.write(line)
-                inf.close()
-            if state == 'present':
-                outf.write(key)
-            outf.flush()
-            module.atomic_move(outf.name,path)
-        except (IOError,OSError):
-            e = get_exception()
-            module.fail_json(msg="Failed to write to file %s: %s" % \
-                                 (path,str(e)))
-
-        try:
+            for entry in index['added']:
+                outf.write(entry['text'])
+        finally:
             outf.close()
-        except:
-            pass
+        module.atomic_move(tmp,path)
+    except (IOError,OSError):
+        e = get_exception()
+        if tmp is not None and os.path.exists(tmp):
+            os.remove(tmp)
+        module.fail_json(msg="Failed to write to file %s: %s" % \
+                             (path,str(e)))
 
-        params['changed'] = True
+def parse_known_hosts_line(line):
+    '''parse_known_hosts_line(line) -> (marker, hosts, type, key) or None
 
-    return params
+    Splits a line in the format described in sshd(8), section
+    "SSH_KNOWN_HOSTS FILE FORMAT". marker is the optional @cert-authority or
+    @revoked field. Comments, blank and malformed lines give None.
+    '''
+    fields = line.split()
+    if not fields or fields[0][0] == '#':
+        return None
+    marker = None
+    if fields[0][0] == '@':
+        marker = fields.pop(0)
+    if len(fields) < 3:
+        return None
+    return marker, fields[0], fields[1], fields[2]
+
+def parse_hashed_host(hostfield):
+    '''Return the (salt, digest) of a hashed host field, or None.'''
+    if not hostfield.startswith(HASH_MAGIC):
+        return None
+    try:
+        salt, digest = hostfield[len(HASH_MAGIC):].split('|')
+        return base64.b64decode(salt), base64.b64decode(digest)
+    except (TypeError, ValueError):
+        return None
+
+def hmac_sha1_pads(salt):
+    '''Return the inner and outer SHA-1 states of HMAC-SHA1 keyed with
+    salt (RFC 2104), so that each name checked only costs two copies.'''
+    if len(salt) > 64:
+        salt = sha1(salt).digest()
+    salt = salt + HMAC_ZERO * (64 - len(salt))
+    return sha1(salt.translate(HMAC_IPAD)), sha1(salt.translate(HMAC_OPAD))
+
+def hmac_sha1(pads, data):
+    inner = pads[0].copy()
+    inner.update(data)
+    outer = pads[1].copy()
+    outer.update(inner.digest())
+    return outer.digest()
+
+def hash_matches(salt, digest, name):
+    return hmac_sha1(hmac_sha1_pads(salt), name.encode('utf-8')) == digest
+
+def build_index(lines):
+    '''build_index(lines) -> index
+
+    Builds the host -> [(type, key, line)] index of a known_hosts file in one
+    pass. Entries are dicts holding the line number, marker, type and key.
+    Plain host names are indexed right away; hashed entries are kept aside
+    and matched against the wanted names by resolve_hosts().
+    '''
+    hosts = {}
+    hashed = []
+    for line_number, line in enumerate(lines):
+        parsed = parse_known_hosts_line(line)
+        if parsed is None:
+            continue
+        marker, hostfield, keytype, key = parsed
+        entry = dict(line=line_number, marker=marker, type=keytype, key=key, removed=False)
+        hashed_host = parse_hashed_host(hostfield)
+        if hashed_host is not None:
+            hashed.append((hashed_host[0], hashed_host[1], entry))
+        else:
+            for host in hostfield.split(','):
+                hosts.setdefault(host.lower(), []).append(entry)
+    return dict(lines=lines, hosts=hosts, hashed=hashed, resolved={},
+                removed={}, added=[])
 
-def sanity_check(module,host,key,sshkeygen):
-    '''Check supplied key is sensible
+def resolve_hosts(index, names):
+    '''Add the hashed entries matching any of names to the host index.
 
-    host and key are parameters provided by the user; If the host
-    provided is inconsistent with the key supplied, then this function
-    quits, providing an error to the user.
-    sshkeygen is the path to ssh-keygen, found earlier with get_bin_path
+    The HMAC-SHA1 of each hashed entry is keyed with its own salt, so every
+    entry has to be checked against every name; doing all the names at once
+    only sets up each key once.
     '''
-    #If no key supplied, we're doing a removal, and have nothing to check here.
-    if key is None:
+    pending = []
+    for name in names:
+        if name.lower() not in index['resolved']:
+            index['resolved'][name.lower()] = True
+            pending.append((name.lower(), name.encode('utf-8')))
+    if not pending:
         return
-    #Rather than parsing the key ourselves, get ssh-keygen to do it
-    #(this is essential for hashed keys, but otherwise useful, as the
-    #key question is whether ssh-keygen thinks the key matches the host).
+    for salt, digest, entry in index['hashed']:
+        pads = hmac_sha1_pads(salt)
+        for host, data in pending:
+            if hmac_sha1(pads, data) == digest:
+                index['hosts'].setdefault(host, []).append(entry)
+
+def lookup_host(index, name):
+    '''Return the entries currently present for name, in file order.'''
+    resolve_hosts(index, [name])
+    entries = [e for e in index['hosts'].get(name.lower(), []) if not e['removed']]
+    entries.sort(key=lambda e: e['line'])
+    return entries
+
+def remove_entry(index, entry):
+    entry['removed'] = True
+    if entry['line'] < len(index['lines']):
+        index['removed'][entry['line']] = True
+    else:
+        index['added'].remove(entry)
 
-    #The approach is to write the key to a temporary file,
-    #and then attempt to look up the specified host in that file.
-    try:
-        outf=tempfile.NamedTemporaryFile()
-        outf.write(key)
-        outf.flush()
-    except IOError:
-        e = get_exception()
-        module.fail_json(msg="Failed to write to temporary file %s: %s" % \
-                             (outf.name,str(e)))
-    rc,stdout,stderr=module.run_command([sshkeygen,'-F',host,
-                                         '-f',outf.name],
-                                        check_rc=True)
-    try:
-        outf.close()
-    except:
-        pass
+def add_entry(index, name, marker, keytype, key, text):
+    entry = dict(line=len(index['lines']) + len(index['added']), marker=marker,
+                 type=keytype, key=key, removed=False, text=text)
+    index['added'].append(entry)
+    index['hosts'].setdefault(name.lower(), []).append(entry)
 
-    if stdout=='': #host not found
+def parse_key(module, host, key):
+    '''Check supplied key is sensible
+
+    host and key are parameters provided by the user; If the host
+    provided is inconsistent with the key supplied, then this function
+    quits, providing an error to the user. Returns the (marker, type, key,
+    line) of every line of key that is for host.
+    '''
+    wanted = []
+    for line in key.splitlines():
+        parsed = parse_known_hosts_line(line)
+        if parsed is None:
+            continue
+        marker, hostfield, keytype, keydata = parsed
+        hashed_host = parse_hashed_host(hostfield)
+        if hashed_host is not None:
+            matches = hash_matches(hashed_host[0], hashed_host[1], host)
+        else:
+            matches = host.lower() in [h.lower() for h in hostfield.split(',')]
+        if matches:
+            wanted.append((marker, keytype, keydata, line.strip() + '\n'))
+    if not wanted: #host not found
         module.fail_json(msg="Host parameter does not match hashed host field in supplied key")
+    return wanted
 
-def search_for_host_key(module,host,key,path,sshkeygen):
-    '''search_for_host_key(module,host,key,path,sshkeygen) -> (found,replace_or_add,found_line)
+def update_host(module, index, host, key, state):
+    '''update_host(module,index,host,key,state) -> changed
 
-    Looks up host and keytype in the known_hosts file path; if it's there, looks to see
-    if one of those entries matches key. Returns:
-    found (Boolean): is host found in path?
-    replace_or_add (Boolean): is the key in path different to that supplied by user?
-    found_line (int or None): the line where a key of the same type was found
-    if found=False, then replace is always False.
-    sshkeygen is the path to ssh-keygen, found earlier with get_bin_path
+    Adds or removes the keys of host in index. With no key, all the entries
+    of host are removed. Otherwise only one key per key type (and marker)
+    is kept: a different key of the same type is replaced.
     '''
-    if os.path.exists(path)==False:
-        return False, False, None
-    #openssh >=6.4 has changed ssh-keygen behaviour such that it returns
-    #1 if no host is found, whereas previously it returned 0
-    rc,stdout,stderr=module.run_command([sshkeygen,'-F',host,'-f',path],
-                                 check_rc=False)
-    if stdout=='' and stderr=='' and (rc==0 or rc==1):
-        return False, False, None #host not found, no other errors
-    if rc!=0: #something went wrong
-        module.fail_json(msg="ssh-keygen failed (rc=%d,stdout='%s',stderr='%s')" % (rc,stdout,stderr))
-
-    #If user supplied no key, we don't want to try and replace anything with it
-    if key is None:
-        return True, False, None
+    entries = lookup_host(index, host)
 
-    lines=stdout.split('\n')
-    new_key = normalize_known_hosts_key(key, host)
-
-    for l in lines:
-        if l=='':
-            continue
-        elif l[0]=='#': # info output from ssh-keygen; contains the line number where key was found
-            try:
-                # This output format has been hardcoded in ssh-keygen since at least OpenSSH 4.0
-                # It always outputs the non-localized comment before the found key
-                found_line = int(re.search(r'found: line (\d+)', l).group(1))
-            except IndexError:
-                e = get_exception()
-                module.fail_json(msg="failed to parse output of ssh-keygen for line number: '%s'" % l)
+    #Only remove whole host if found and no key provided
+    if key is None:
+        for entry in entries:
+            remove_entry(index, entry)
+        return bool(entries)
+
+    changed = False
+    for marker, keytype, keydata, text in parse_key(module, host, key):
+        same_type = [e for e in entries if e['marker'] == marker and e['type'] == keytype]
+        exact = [e for e in same_type if e['key'] == keydata]
+        if state == 'present':
+            if exact:
+                continue
+            for entry in same_type:
+                remove_entry(index, entry)
+            add_entry(index, host, marker, keytype, keydata, text)
         else:
-            found_key = normalize_known_hosts_key(l,host)
-            if new_key==found_key: #found a match
-                return True, False, found_line  #found exactly the same key, don't replace
-            elif new_key['type'] == found_key['type']: # found a different key for the same key type
-                return True, True, found_line
-    #No match found, return found and replace, but no line
-    return True, True, None
-
-def normalize_known_hosts_key(key, host):
-    '''
-    Transform a key, either taken from a known_host file or provided by the
-    user, into a normalized form.
-    The host part (which might include multiple hostnames or be hashed) gets
-    replaced by the provided host. Also, any spurious information gets removed
-    from the end (like the username@host tag usually present in hostkeys, but
-    absent in known_hosts files)
-    '''
-    k=key.strip() #trim trailing newline
-    k=key.split()
-    d = dict()
-    #The optional "marker" field, used for @cert-authority or @revoked
-    if k[0][0] == '@':
-        d['options'] = k[0]
-        d['host']=host
-        d['type']=k[2]
-        d['key']=k[3]
-    else:
-        d['host']=host
-        d['type']=k[1]
-        d['key']=k[2]
-    return d
+            if not exact:
+                continue
+            for entry in exact:
+                remove_entry(index, entry)
+        changed = True
+    return changed
 
 def main():
 
     module = AnsibleModule(
         argument_spec = dict(
-            name      = dict(required=True,  type='str', aliases=['host']),
+            name      = dict(required=False, type='str', aliases=['host']),
             key       = dict(required=False,  type='str'),
             path      = dict(default="~/.ssh/known_hosts", type='path'),
             state     = dict(default='present', choices=['absent','present']),
+            hosts     = dict(required=False, type='list'),
             ),
+        mutually_exclusive = [['name', 'hosts'], ['key', 'hosts']],
+        required_one_of = [['name', 'hosts']],
         supports_check_mode = True
         )
 
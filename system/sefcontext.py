@@ -29,7 +29,8 @@ options:
   target:
     description:
       - Target path (expression).
-    required: true
+      - Required unless C(entries) is given.
+    required: false
     default: null
     aliases: ['path']
   ftype:
@@ -40,7 +41,8 @@ options:
   setype:
     description:
       - SELinux type for the specified target.
-    required: true
+      - Required unless C(entries) is given.
+    required: false
     default: null
   seuser:
     description:
@@ -64,6 +66,17 @@ options:
       - Reload SELinux policy after commit.
     required: false
     default: yes
+  entries:
+    description:
+      - List of file context mappings to manage at once, each a dictionary
+        with C(target), C(setype) and optionally C(ftype), C(seuser),
+        C(selevel) and C(state). Keys that are left out are taken from the
+        task options. All the changes are computed against one read of the
+        mappings and committed in a single semanage transaction, so the
+        policy is only rebuilt once.
+    required: false
+    default: null
+    version_added: "2.3"
 notes:
    - The changes are persistent across reboots
 requirements: [ 'libselinux-python', 'policycoreutils-python' ]
@@ -73,6 +86,14 @@ author: Dag Wieers
 EXAMPLES = '''
 # Allow apache to modify files in /srv/git_repos
 - sefcontext: target='/srv/git_repos(/.*)?' setype=httpd_git_rw_content_t state=present
+
+# Manage several mappings in one transaction
+- sefcontext:
+    state: present
+    entries:
+      - { target: '/srv/git_repos(/.*)?', setype: httpd_git_rw_content_t }
+      - { target: '/srv/www(/.*)?', setype: httpd_sys_content_t }
+      - { target: '/srv/old(/.*)?', state: absent }
 '''
 
 RETURN = '''
@@ -198,18 +219,99 @@ def semanage_fcontext_delete(module, result, target, ftype, do_reload, sestore='
 
     module.exit_json(changed=changed, **result)
 
+def semanage_fcontext_apply(module, result, entries, do_reload, sestore=''):
+    ''' Add, modify and delete many SELinux file context mapping definitions.
+
+    The mappings are read once and all the changes are committed in a single
+    semanage transaction, so the policy is only rebuilt once. '''
+
+    changes = []
+    prepared_diff = ''
+
+    try:
+        sefcontext = seobject.fcontextRecords(sestore)
+        sefcontext.set_reload(do_reload)
+        records = sefcontext.get_all()
+
+        for entry in entries:
+            target = entry['target']
+            ftype = option_to_file_type_str[entry['ftype']]
+            setype = entry['setype']
+            seuser = entry['seuser']
+            serange = entry['selevel']
+            exists = records.get((target, ftype))
+
+            if entry['state'] == 'absent':
+                if not exists:
+                    continue
+                # Remove existing entry
+                changes.append(('delete', target, ftype, None, None, None))
+                del records[(target, ftype)]
+                prepared_diff += '# Deletion to semanage file context mappings\n'
+                prepared_diff += '-%s      %s      %s:%s:%s:%s\n' % (target, ftype, exists[0], exists[1], exists[2], exists[3])
+            elif exists:
+                # Modify existing entry
+                orig_seuser, orig_serole, orig_setype, orig_serange = exists
+
+                if seuser is None:
+                    seuser = orig_seuser
+                if serange is None:
+                    serange = orig_serange
+
+                if setype == orig_setype and seuser == orig_seuser and serange == orig_serange:
+                    continue
+                changes.append(('modify', target, ftype, setype, serange, seuser))
+                records[(target, ftype)] = (seuser, orig_serole, setype, serange)
+                prepared_diff += '# Change to semanage file context mappings\n'
+                prepared_diff += '-%s      %s      %s:%s:%s:%s\n' % (target, ftype, orig_seuser, orig_serole, orig_setype, orig_serange)
+                prepared_diff += '+%s      %s      %s:%s:%s:%s\n' % (target, ftype, seuser, orig_serole, setype, serange)
+            else:
+                # Add missing entry
+                if seuser is None:
+                    seuser = 'system_u'
+                if serange is None:
+                    serange = 's0'
+
+                changes.append(('add', target, ftype, setype, serange, seuser))
+                records[(target, ftype)] = (seuser, 'object_r', setype, serange)
+                prepared_diff += '# Addition to semanage file context mappings\n'
+                prepared_diff += '+%s      %s      %s:%s:%s:%s\n' % (target, ftype, seuser, 'object_r', setype, serange)
+
+        if changes and not module.check_mode:
+            sefcontext.start()
+            for action, target, ftype, setype, serange, seuser in changes:
+                if action == 'add':
+                    sefcontext.add(target, setype, ftype, serange, seuser)
+                elif action == 'modify':
+                    sefcontext.modify(target, setype, ftype, serange, seuser)
+                else:
+                    sefcontext.delete(target, ftype)
+            sefcontext.finish()
+
+    except Exception:
+        e = get_exception()
+        module.fail_json(msg="%s: %s\n" % (e.__class__.__name__, str(e)))
+
+    if module._diff and prepared_diff:
+        result['diff'] = dict(prepared=prepared_diff)
+
+    module.exit_json(changed=bool(changes), **result)
+
 
 def main():
     module = AnsibleModule(
         argument_spec = dict(
-                target  = dict(required=True, aliases=['path']),
+                target  = dict(required=False, aliases=['path']),
                 ftype   = dict(required=False, choices=option_to_file_type_str.keys(), default='a'),
-                setype  = dict(required=True),
+                setype  = dict(required=False),
                 seuser  = dict(required=False, default=None),
                 selevel = dict(required=False, default=None, aliases=['serange']),
                 state   = dict(required=False, choices=['present', 'absent'], default='present'),
                 reload  = dict(required=False, type='bool', default='yes'),
+                entries = dict(required=False, type='list'),
             ),
+        mutually_exclusive = [['entries', 'target']],
+        required_one_of = [['entries', 'target']],
         supports_check_mode = True,
     )
     if not HAVE_SELINUX:
@@ -221,6 +323,33 @@ def main():
     if not selinux.is_selinux_enabled():
         module.fail_json(msg="SELinux is disabled on this host.")
 
+    if module.params['entries']:
+        entries = []
+        for entry in module.params['entries']:
+            if not isinstance(entry, dict):
+                module.fail_json(msg='Items of entries must be dictionaries, got: %s' % entry)
+            entry = dict(entry)
+            if 'path' in entry:
+                entry.setdefault('target', entry.pop('path'))
+            if 'serange' in entry:
+                entry.setdefault('selevel', entry.pop('serange'))
+            for param in ('target', 'ftype', 'setype', 'seuser', 'selevel', 'state'):
+                entry.setdefault(param, module.params[param])
+            for param in ('target', 'setype'):
+                if entry[param] is None and (param == 'target' or entry['state'] == 'present'):
+                    module.fail_json(msg='%s is required for every item of entries' % param)
+            if entry['ftype'] not in option_to_file_type_str:
+                module.fail_json(msg='Invalid value of "ftype" in entries: {0}'.format(entry['ftype']))
+            if entry['state'] not in ('present', 'absent'):
+                module.fail_json(msg='Invalid value of "state" in entries: {0}'.format(entry['state']))
+            entries.append(entry)
+
+        result = dict(entries=module.params['entries'])
+        semanage_fcontext_apply(module, result, entries, module.params['reload'])
+
+    if module.params['setype'] is None:
+        module.fail_json(msg='missing required arguments: setype')
+
     target = module.params['target']
     ftype = module.params['ftype']
     setype = module.params['setype']
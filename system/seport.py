@@ -28,25 +28,39 @@ options:
   ports:
     description:
       - Ports or port ranges, separated by a comma
-    required: true
+      - Required unless C(entries) is given.
+    required: false
     default: null
   proto:
     description:
       - Protocol for the specified port.
-    required: true
+      - Required unless C(entries) is given.
+    required: false
     default: null
     choices: [ 'tcp', 'udp' ]
   setype:
     description:
       - SELinux type for the specified port.
-    required: true
+      - Required unless C(entries) is given.
+    required: false
     default: null
   state:
     description:
       - Desired boolean value.
-    required: true
+      - Required unless C(entries) is given.
+    required: false
     default: present
     choices: [ 'present', 'absent' ]
+  entries:
+    description:
+      - List of port definitions to manage at once, each a dictionary with
+        C(ports), C(proto), C(setype) and C(state). Keys that are left out
+        are taken from the task options. All the changes are computed
+        against one read of the port definitions and committed in a single
+        semanage transaction, so the policy is only rebuilt once.
+    required: false
+    default: null
+    version_added: "2.3"
   reload:
     description:
       - Reload SELinux policy after commit.
@@ -66,6 +80,15 @@ EXAMPLES = '''
 - seport: ports=8991 proto=tcp setype=ssh_port_t state=present
 # Allow memcached to listen on tcp ports 10000-10100 and 10112
 - seport: ports=10000-10100,10112 proto=tcp setype=memcache_port_t state=present
+# Define several port types in one transaction
+- seport:
+    proto: tcp
+    state: present
+    entries:
+      - { ports: 8888, setype: http_port_t }
+      - { ports: 8991, setype: ssh_port_t }
+      - { ports: 10000-10100, setype: memcache_port_t }
+      - { ports: 9090, setype: websm_port_t, state: absent }
 '''
 
 try:
@@ -84,31 +107,8 @@ from ansible.module_utils.basic import *
 from ansible.module_utils.pycompat24 import get_exception
 
 
-def semanage_port_get_ports(seport, setype, proto):
-    """ Get the list of ports that have the specified type definition.
-
-    :param seport: Instance of seobject.portRecords
-
-    :type setype: str
-    :param setype: SELinux type.
-
-    :type proto: str
-    :param proto: Protocol ('tcp' or 'udp')
-
-    :rtype: list
-    :return: List of ports that have the specified SELinux type.
-    """
-    records = seport.get_all_by_type()
-    if (setype, proto) in records:
-        return records[(setype, proto)]
-    else:
-        return []
-
-
-def semanage_port_get_type(seport, port, proto):
-    """ Get the SELinux type of the specified port.
-
-    :param seport: Instance of seobject.portRecords
+def semanage_port_get_key(port, proto):
+    """ Get the key of the specified port in seobject.portRecords.get_all().
 
     :type port: str
     :param port: Port or port range (example: "8080", "8080-9090")
@@ -117,34 +117,27 @@ def semanage_port_get_type(seport, port, proto):
     :param proto: Protocol ('tcp' or 'udp')
 
     :rtype: tuple
-    :return: Tuple containing the SELinux type and MLS/MCS level, or None if not found.
+    :return: Tuple containing the low port, high port and protocol.
     """
     ports = port.split('-', 1)
     if len(ports) == 1:
         ports.extend(ports)
-    key = (int(ports[0]), int(ports[1]), proto)
+    return (int(ports[0]), int(ports[1]), proto)
 
-    records = seport.get_all()
-    if key in records:
-        return records[key]
-    else:
-        return None
 
+def semanage_port_apply(module, entries, do_reload, serange='s0', sestore=''):
+    """ Add and delete SELinux port type definitions in a single transaction.
 
-def semanage_port_add(module, ports, proto, setype, do_reload, serange='s0', sestore=''):
-    """ Add SELinux port type definition to the policy.
+    The current definitions are read once and all the changes are committed
+    between start() and finish(), so the policy is only rebuilt once.
 
     :type module: AnsibleModule
     :param module: Ansible module
 
-    :type ports: list
-    :param ports: List of ports and port ranges to add (e.g. ["8080", "8080-9090"])
-
-    :type proto: str
-    :param proto: Protocol ('tcp' or 'udp')
-
-    :type setype: str
-    :param setype: SELinux type
+    :type entries: list
+    :param entries: List of (ports, proto, setype, state) tuples, where ports
+                    is a list of ports and port ranges (e.g. ["8080", "8080-9090"])
+                    and state is 'present' or 'absent'
 
     :type do_reload: bool
     :param do_reload: Whether to reload SELinux policy after commit
@@ -161,16 +154,36 @@ def semanage_port_add(module, ports, proto, setype, do_reload, serange='s0', ses
     try:
         seport = seobject.portRecords(sestore)
         seport.set_reload(do_reload)
-        change = False
-        ports_by_type = semanage_port_get_ports(seport, setype, proto)
-        for port in ports:
-            if port not in ports_by_type:
-                change = True
-                port_type = semanage_port_get_type(seport, port, proto)
-                if port_type is None and not module.check_mode:
+        records = seport.get_all()
+        changes = []
+        for ports, proto, setype, state in entries:
+            for port in ports:
+                key = semanage_port_get_key(port, proto)
+                port_type = records.get(key)
+                if state == 'present':
+                    if port_type is not None and port_type[0] == setype:
+                        continue
+                    if port_type is None:
+                        changes.append(('add', port, proto, setype))
+                    else:
+                        changes.append(('modify', port, proto, setype))
+                    records[key] = (setype, serange)
+                else:
+                    if port_type is None or port_type[0] != setype:
+                        continue
+                    changes.append(('delete', port, proto, setype))
+                    del records[key]
+
+        if changes and not module.check_mode:
+            seport.start()
+            for action, port, proto, setype in changes:
+                if action == 'add':
                     seport.add(port, proto, serange, setype)
-                elif port_type is not None and not module.check_mode:
+                elif action == 'modify':
                     seport.modify(port, proto, serange, setype)
+                else:
+                    seport.delete(port, proto)
+            seport.finish()
 
     except ValueError:
         e = get_exception()
@@ -188,7 +201,37 @@ def semanage_port_add(module, ports, proto, setype, do_reload, serange='s0', ses
         e = get_exception()
         module.fail_json(msg="%s: %s\n" % (e.__class__.__name__, str(e)))
 
-    return change
+    return bool(changes)
+
+
+def semanage_port_add(module, ports, proto, setype, do_reload, serange='s0', sestore=''):
+    """ Add SELinux port type definition to the policy.
+
+    :type module: AnsibleModule
+    :param module: Ansible module
+
+    :type ports: list
+    :param ports: List of ports and port ranges to add (e.g. ["8080", "8080-9090"])
+
+    :type proto: str
+    :param proto: Protocol ('tcp' or 'udp')
+
+    :type setype: str
+    :param setype: SELinux type
+
+    :type do_reload: bool
+    :param do_reload: Whether to reload SELinux policy after commit
+
+    :type serange: str
+    :param serange: SELinux MLS/MCS range (defaults to 's0')
+
+    :type sestore: str
+    :param sestore: SELinux store
+
+    :rtype: bool
+    :return: True if the policy was changed, otherwise False
+    """
+    return semanage_port_apply(module, [(ports, proto, setype, 'present')], do_reload, serange, sestore)
 
 
 def semanage_port_del(module, ports, proto, setype, do_reload, sestore=''):
@@ -215,59 +258,42 @@ def semanage_port_del(module, ports, proto, setype, do_reload, sestore=''):
     :rtype: bool
     :return: True if the policy was changed, otherwise False
     """
-    try:
-        seport = seobject.portRecords(sestore)
-        seport.set_reload(do_reload)
-        change = False
-        ports_by_type = semanage_port_get_ports(seport, setype, proto)
-        for port in ports:
-            if port in ports_by_type:
-                change = True
-                if not module.check_mode:
-                    seport.delete(port, proto)
+    return semanage_port_apply(module, [(ports, proto, setype, 'absent')], do_reload, sestore=sestore)
 
-    except ValueError:
-        e = get_exception()
-        module.fail_json(msg="%s: %s\n" % (e.__class__.__name__, str(e)))
-    except IOError:
-        e = get_exception()
-        module.fail_json(msg="%s: %s\n" % (e.__class__.__name__, str(e)))
-    except KeyError:
-        e = get_exception()
-        module.fail_json(msg="%s: %s\n" % (e.__class__.__name__, str(e)))
-    except OSError:
-        e = get_exception()
-        module.fail_json(msg="%s: %s\n" % (e.__class__.__name__, str(e)))
-    except RuntimeError:
-        e = get_exception()
-        module.fail_json(msg="%s: %s\n" % (e.__class__.__name__, str(e)))
 
-    return change
+def split_ports(ports):
+    return [x.strip() for x in str(ports).split(',')]
 
 
 def main():
     module = AnsibleModule(
         argument_spec={
                 'ports': {
-                    'required': True,
+                    'required': False,
                 },
                 'proto': {
-                    'required': True,
+                    'required': False,
                     'choices': ['tcp', 'udp'],
                 },
                 'setype': {
-                    'required': True,
+                    'required': False,
                 },
                 'state': {
-                    'required': True,
+                    'required': False,
                     'choices': ['present', 'absent'],
                 },
+                'entries': {
+                    'required': False,
+                    'type': 'list',
+                },
                 'reload': {
                     'required': False,
                     'type': 'bool',
                     'default': 'yes',
                 },
             },
+        mutually_exclusive=[['entries', 'ports']],
+        required_one_of=[['entries', 'ports']],
         supports_check_mode=True
     )
     if not HAVE_SELINUX:
@@ -279,11 +305,38 @@ def main():
     if not selinux.is_selinux_enabled():
         module.fail_json(msg="SELinux is disabled on this host.")
 
-    ports = [x.strip() for x in str(module.params['ports']).split(',')]
+    do_reload = module.params['reload']
+
+    if module.params['entries']:
+        entries = []
+        for entry in module.params['entries']:
+            if not isinstance(entry, dict):
+                module.fail_json(msg='Items of entries must be dictionaries, got: %s' % entry)
+            entry = dict(entry)
+            for param in ('ports', 'proto', 'setype', 'state'):
+                entry.setdefault(param, module.params[param])
+                if entry[param] is None:
+                    module.fail_json(msg='%s is required for every item of entries' % param)
+            if entry['proto'] not in ('tcp', 'udp'):
+                module.fail_json(msg='Invalid value of "proto" in entries: {0}'.format(entry['proto']))
+            if entry['state'] not in ('present', 'absent'):
+                module.fail_json(msg='Invalid value of "state" in entries: {0}'.format(entry['state']))
+            entries.append((split_ports(entry['ports']), entry['proto'], entry['setype'], entry['state']))
+
+        result = {
+            'entries': module.params['entries'],
+            'changed': semanage_port_apply(module, entries, do_reload),
+        }
+        module.exit_json(**result)
+
+    for param in ('proto', 'setype', 'state'):
+        if module.params[param] is None:
+            module.fail_json(msg='missing required arguments: %s' % param)
+
+    ports = split_ports(module.params['ports'])
     proto = module.params['proto']
     setype = module.params['setype']
     state = module.params['state']
-    do_reload = module.params['reload']
 
     result = {
         'ports': ports,
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+"""
+Benchmark of the source path handling of the archive module.
+
+Times the loop archive used to compute the archive root and split the
+existing from the missing paths (remove=yes) against common_root() and
+split_existing(), on a tree of DIRS x FILES files created in a temporary
+directory, and checks that both give the same result.
+
+Usage: python test/benchmarks/archive_paths.py [DIRS [FILES [MISSING%]]]
+Default: 100 dirs x 1000 files, 10% of the paths missing.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+import files.archive as archive
+
+REPEAT = 3
+
+
+def old_split(expanded_paths, dest, remove):
+    """The path loop of archive before common_root() and split_existing()."""
+    archive_paths = []
+    missing = []
+    arcroot = ''
+
+    for path in expanded_paths:
+        if arcroot == '':
+            arcroot = os.path.dirname(path) + os.sep
+        else:
+            for i in range(len(arcroot)):
+                if path[i] != arcroot[i]:
+                    break
+
+            if i < len(arcroot):
+                arcroot = os.path.dirname(arcroot[0:i+1])
+
+            arcroot += os.sep
+
+        if remove and os.path.isdir(path) and dest.startswith(path):
+            raise ValueError(path)
+
+        if os.path.lexists(path):
+            archive_paths.append(path)
+        else:
+            missing.append(path)
+
+    return arcroot, archive_paths, missing
+
+
+def new_split(expanded_paths, dest, remove):
+    """The same steps as archive.main() does them now."""
+    arcroot = archive.common_root(expanded_paths)
+
+    if remove:
+        for path in expanded_paths:
+            if dest.startswith(path) and os.path.isdir(path):
+                raise ValueError(path)
+
+    archive_paths, missing = archive.split_existing(expanded_paths)
+    return arcroot, archive_paths, missing
+
+
+def make_tree(root, dirs, files, missing_pct):
+    paths = []
+    for d in range(dirs):
+        dirpath = os.path.join(root, 'src', 'd%04d' % d)
+        os.makedirs(dirpath)
+        for f in range(files):
+            path = os.path.join(dirpath, 'f%05d' % f)
+            # Every n-th path is listed but not created
+            if missing_pct and (d * files + f) % (100 // missing_pct) == 0:
+                paths.append(path)
+                continue
+            open(path, 'w').close()
+            paths.append(path)
+    return paths
+
+
+def best_time(func, *args):
+    best = None
+    for i in range(REPEAT):
+        start = time.time()
+        result = func(*args)
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+def main(argv):
+    dirs = 100
+    files = 1000
+    missing_pct = 10
+    if len(argv) > 0:
+        dirs = int(argv[0])
+    if len(argv) > 1:
+        files = int(argv[1])
+    if len(argv) > 2:
+        missing_pct = int(argv[2])
+
+    root = tempfile.mkdtemp()
+    try:
+        paths = make_tree(root, dirs, files, missing_pct)
+        dest = os.path.join(root, 'out.tar.gz')
+
+        old_time, old_result = best_time(old_split, paths, dest, True)
+        new_time, new_result = best_time(new_split, paths, dest, True)
+    finally:
+        shutil.rmtree(root)
+
+    if old_result != new_result:
+        sys.stderr.write('results differ\n')
+        return 1
+
+    sys.stdout.write('%d paths, %d missing, python %s\n' % (
+        len(paths), len(new_result[2]), sys.version.split()[0]))
+    sys.stdout.write('  old loop:                        %.3fs\n' % old_time)
+    sys.stdout.write('  common_root + split_existing:    %.3fs\n' % new_time)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
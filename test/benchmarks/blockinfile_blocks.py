@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+"""
+Benchmark of converging many blocks with blockinfile.
+
+Runs blockinfile's main() on a file of LINES lines holding 10 managed
+blocks, converging BLOCKS blocks (the 10 existing ones updated, the rest
+inserted) once as that many single-block tasks and once as a single task
+with the blocks option, and checks that both leave the same file.
+
+Usage: python test/benchmarks/blockinfile_blocks.py [LINES [BLOCKS]]
+Default: 1000000 lines, 20 blocks.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+import files.blockinfile as blockinfile
+
+EXISTING = 10
+
+
+class ModuleExit(Exception):
+    pass
+
+
+class FakeModule(object):
+    params = None
+    ansible_version = '2.2.0'
+    check_mode = False
+
+    def __init__(self, **kwargs):
+        self.params = dict(FakeModule.params)
+
+    def boolean(self, value):
+        return bool(value)
+
+    def exit_json(self, **kwargs):
+        raise ModuleExit()
+
+    def fail_json(self, **kwargs):
+        raise Exception(kwargs['msg'])
+
+    def atomic_move(self, src, dest, unsafe_writes=False):
+        shutil.move(src, dest)
+
+    def load_file_common_arguments(self, params):
+        return {}
+
+    def set_file_attributes_if_different(self, file_args, changed):
+        return changed
+
+
+def run_task(dest, **kwargs):
+    params = dict(
+        dest=dest, state='present', marker='# {mark} ANSIBLE MANAGED BLOCK',
+        block='', insertafter=None, insertbefore=None, create=False,
+        backup=False, validate=None, blocks=None, follow=False,
+        unsafe_writes=False,
+    )
+    params.update(kwargs)
+    FakeModule.params = params
+    try:
+        blockinfile.main()
+    except ModuleExit:
+        pass
+
+
+def marker(n):
+    return '# {mark} BLOCK %d' % n
+
+
+def make_file(path, lines):
+    f = open(path, 'w')
+    step = lines // (EXISTING + 1)
+    for i in range(lines):
+        f.write('line %d of the original file\n' % i)
+        if i and i % step == 0 and i // step <= EXISTING:
+            n = i // step - 1
+            f.write(marker(n).replace('{mark}', 'BEGIN') + '\n')
+            f.write('old content of block %d\n' % n)
+            f.write(marker(n).replace('{mark}', 'END') + '\n')
+    f.close()
+
+
+def read(path):
+    f = open(path, 'rb')
+    data = f.read()
+    f.close()
+    return data
+
+
+def main(argv):
+    lines = 1000000
+    count = 20
+    if len(argv) > 0:
+        lines = int(argv[0])
+    if len(argv) > 1:
+        count = int(argv[1])
+
+    blocks = [dict(marker=marker(n), block='new content of block %d\nsecond line' % n)
+              for n in range(count)]
+
+    tmpdir = tempfile.mkdtemp()
+    saved = blockinfile.AnsibleModule
+    blockinfile.AnsibleModule = FakeModule
+    try:
+        source = os.path.join(tmpdir, 'source')
+        make_file(source, lines)
+
+        single = os.path.join(tmpdir, 'single')
+        shutil.copy(source, single)
+        start = time.time()
+        for block in blocks:
+            run_task(single, **block)
+        single_time = time.time() - start
+
+        multi = os.path.join(tmpdir, 'multi')
+        shutil.copy(source, multi)
+        start = time.time()
+        run_task(multi, blocks=blocks)
+        multi_time = time.time() - start
+
+        one = os.path.join(tmpdir, 'one')
+        shutil.copy(source, one)
+        start = time.time()
+        run_task(one, **blocks[0])
+        one_time = time.time() - start
+
+        identical = read(single) == read(multi)
+    finally:
+        blockinfile.AnsibleModule = saved
+        shutil.rmtree(tmpdir)
+
+    if not identical:
+        sys.stderr.write('results differ\n')
+        return 1
+
+    sys.stdout.write('%d lines, %d existing blocks, %d blocks to converge, python %s\n' % (
+        lines, EXISTING, count, sys.version.split()[0]))
+    sys.stdout.write('  %d single-block tasks:  %.2fs\n' % (count, single_time))
+    sys.stdout.write('  one task with blocks:    %.2fs\n' % multi_time)
+    sys.stdout.write('  one single-block task:   %.2fs\n' % one_time)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+"""
+Benchmark of the parsing of zypper --xmlout output.
+
+Times the minidom parser zypper used to build its packages dict against
+parse_zypper_xml(), which walks the output with iterparse, on a synthetic
+install summary of SOLVABLES packages, and checks that both return the
+same dict. The peak memory of each parser is measured in a child process.
+
+Usage: python test/benchmarks/zypper_xml.py [SOLVABLES]
+Default: 20000 solvables.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from xml.dom.minidom import parseString as parseXML
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+import packaging.os.zypper as zypper
+
+REPEAT = 3
+
+
+class FakeModule(object):
+    def __init__(self, stdout):
+        self.stdout = stdout
+
+    def run_command(self, cmd, check_rc=False):
+        return 0, self.stdout, ''
+
+    def fail_json(self, **kwargs):
+        raise Exception(kwargs['msg'])
+
+
+def old_parse(stdout):
+    """The minidom parsing zypper did before iter_zypper_xml()."""
+    dom = parseXML(stdout)
+    packages = {}
+    solvable_list = dom.getElementsByTagName('solvable')
+    for solvable in solvable_list:
+        name = solvable.getAttribute('name')
+        packages[name] = {}
+        packages[name]['version'] = solvable.getAttribute('edition')
+        packages[name]['oldversion'] = solvable.getAttribute('edition-old')
+        status = solvable.getAttribute('status')
+        packages[name]['installed'] = status == "installed"
+        packages[name]['group'] = solvable.parentNode.nodeName
+    return packages
+
+
+def new_parse(stdout):
+    packages, rc, out, err = zypper.parse_zypper_xml(FakeModule(stdout), ['zypper'])
+    return packages
+
+
+PARSERS = dict(old=old_parse, new=new_parse)
+
+
+def make_output(count):
+    lines = [
+        "<?xml version='1.0'?>",
+        '<stream>',
+        '<message type="info">Loading repository data...</message>',
+        '<message type="info">Reading installed packages...</message>',
+        '<install-summary download-size="1" space-usage-diff="1" packages-to-change="%d">' % count,
+    ]
+    for group in ('to-install', 'to-upgrade'):
+        lines.append('<%s>' % group)
+        for i in range(count // 2):
+            attrs = 'type="package" name="%s-%05d" edition="1.%d-1.1" arch="x86_64" repository="repo-oss"' % (group, i, i)
+            if group == 'to-upgrade':
+                attrs += ' edition-old="1.%d-0.1"' % i
+            lines.append('<solvable %s/>' % attrs)
+        lines.append('</%s>' % group)
+    lines.append('</install-summary>')
+    lines.append('</stream>')
+    return '\n'.join(lines) + '\n'
+
+
+def best_time(func, *args):
+    best = None
+    for i in range(REPEAT):
+        start = time.time()
+        result = func(*args)
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+def max_rss():
+    """Peak RSS of this process in KB. VmHWM is preferred because Linux
+    carries ru_maxrss over from the parent process."""
+    try:
+        f = open('/proc/self/status')
+        try:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+        finally:
+            f.close()
+    except IOError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def peak_memory(parser, path):
+    """Growth of the peak RSS in KB while parser runs, in a new process."""
+    proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--memory', parser, path],
+                            stdout=subprocess.PIPE)
+    out = proc.communicate()[0]
+    if proc.returncode != 0:
+        return None
+    return int(out.strip())
+
+
+def measure_memory(parser, path):
+    f = open(path)
+    stdout = f.read()
+    f.close()
+    before = max_rss()
+    PARSERS[parser](stdout)
+    after = max_rss()
+    sys.stdout.write('%d\n' % (after - before))
+    return 0
+
+
+def main(argv):
+    if len(argv) == 3 and argv[0] == '--memory':
+        return measure_memory(argv[1], argv[2])
+
+    count = 20000
+    if len(argv) > 0:
+        count = int(argv[0])
+
+    stdout = make_output(count)
+    old_time, old_result = best_time(old_parse, stdout)
+    new_time, new_result = best_time(new_parse, stdout)
+
+    if old_result != new_result:
+        sys.stderr.write('results differ\n')
+        return 1
+
+    fd, path = tempfile.mkstemp()
+    os.write(fd, stdout.encode('utf-8'))
+    os.close(fd)
+    try:
+        sys.stdout.write('%d solvables, %.1f MB of output, python %s\n' % (
+            count, len(stdout) / 1048576.0, sys.version.split()[0]))
+        for name, elapsed in (('old', old_time), ('new', new_time)):
+            memory = peak_memory(name, path)
+            if memory is None:
+                memory = 'n/a'
+            else:
+                memory = '%.1f MB' % (memory / 1024.0)
+            sys.stdout.write('  %s: %.3fs, peak RSS growth %s\n' % (
+                dict(old='minidom  ', new='iterparse')[name], elapsed, memory))
+    finally:
+        os.remove(path)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
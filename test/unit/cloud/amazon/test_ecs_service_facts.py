@@ -0,0 +1,100 @@
+#!/usr/bin/python
+
+import threading
+import unittest
+
+import botocore
+
+import cloud.amazon.ecs_service_facts as ecs_service_facts
+
+
+def arn(i):
+    return 'arn:aws:ecs:us-east-1:123456789012:service/service-%03d' % i
+
+
+class FakeClient(object):
+    def __init__(self, count, missing=()):
+        self.services = [arn(i) for i in range(count)]
+        self.missing = missing
+        self.lock = threading.Lock()
+        self.list_calls = []
+        self.describe_calls = []
+        self.throttle = 0
+
+    def list_services(self, **kwargs):
+        self.list_calls.append(dict(kwargs))
+        start = int(kwargs.get('nextToken', 0))
+        end = start + kwargs['maxResults']
+        response = dict(serviceArns=self.services[start:end])
+        if end < len(self.services):
+            response['nextToken'] = str(end)
+        return response
+
+    def describe_services(self, services, cluster=None):
+        self.lock.acquire()
+        try:
+            if self.throttle:
+                self.throttle -= 1
+                raise botocore.exceptions.ClientError(
+                    {'Error': {'Code': 'ThrottlingException', 'Message': 'Rate exceeded'}},
+                    'DescribeServices')
+            self.describe_calls.append(list(services))
+        finally:
+            self.lock.release()
+        return dict(
+            services=[dict(serviceArn=s, events=[]) for s in services if s not in self.missing],
+            failures=[dict(arn=s, reason='MISSING') for s in services if s in self.missing],
+        )
+
+
+class Manager(ecs_service_facts.EcsServiceManager):
+    def __init__(self, client):
+        self.ecs = client
+
+
+class AnsibleEcsServiceFacts(unittest.TestCase):
+
+    def setUp(self):
+        self.saved_sleep = ecs_service_facts.time.sleep
+        ecs_service_facts.time.sleep = lambda seconds: None
+
+    def tearDown(self):
+        ecs_service_facts.time.sleep = self.saved_sleep
+
+    def test_list_services_follows_pages(self):
+        client = FakeClient(250)
+        result = Manager(client).list_services('default')
+        self.assertEqual(result['services'], client.services)
+        self.assertEqual(len(client.list_calls), 3)
+        self.assertEqual(client.list_calls[0], dict(maxResults=100, cluster='default'))
+
+    def test_describe_services_in_chunks(self):
+        client = FakeClient(25)
+        result = Manager(client).describe_services('default', client.services)
+        self.assertEqual([s['serviceArn'] for s in result['services']], client.services)
+        self.assertEqual(sorted([len(c) for c in client.describe_calls]), [5, 10, 10])
+        self.assertFalse('services_not_running' in result)
+
+    def test_describe_services_failures(self):
+        client = FakeClient(25, missing=(arn(3), arn(17)))
+        result = Manager(client).describe_services('default', ','.join(client.services))
+        self.assertEqual(len(result['services']), 23)
+        self.assertEqual([f['arn'] for f in result['services_not_running']], [arn(3), arn(17)])
+
+    def test_describe_services_throttled(self):
+        client = FakeClient(45)
+        client.throttle = 3
+        result = Manager(client).describe_services(None, client.services)
+        self.assertEqual([s['serviceArn'] for s in result['services']], client.services)
+        self.assertEqual(len(client.describe_calls), 5)
+
+    def test_run_concurrently_raises_first_error(self):
+        def func(item):
+            if item == 2:
+                raise ValueError('item 2')
+
+        self.assertRaises(ValueError, ecs_service_facts.run_concurrently, func, range(5), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
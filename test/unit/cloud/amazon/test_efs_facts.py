@@ -0,0 +1,151 @@
+#!/usr/bin/python
+
+import threading
+import time
+import unittest
+
+from botocore.exceptions import ClientError
+
+import cloud.amazon.efs_facts as efs_facts
+
+
+def throttled():
+    return ClientError({'Error': {'Code': 'ThrottlingException', 'Message': 'Rate exceeded'}},
+                       'DescribeFileSystems')
+
+
+class FakeClient(object):
+    def __init__(self, file_systems):
+        self.file_systems = file_systems
+
+    def describe_file_systems(self, **kwargs):
+        return dict(FileSystems=[dict(fs) for fs in self.file_systems])
+
+    def describe_tags(self, FileSystemId):
+        return dict(Tags=[dict(Key='Name', Value=FileSystemId)])
+
+    def describe_mount_targets(self, FileSystemId):
+        return dict(MountTargets=[dict(MountTargetId='fsmt-' + FileSystemId, LifeCycleState='available')])
+
+    def describe_mount_target_security_groups(self, MountTargetId):
+        return dict(SecurityGroups=['sg-1'])
+
+
+class FakeConnection(efs_facts.EFSConnection):
+    def __init__(self, file_systems):
+        self.region = 'us-east-1'
+        self.local = threading.local()
+        self.file_systems = file_systems
+        self.clients = []
+
+    def connect(self):
+        client = FakeClient(self.file_systems)
+        self.clients.append(client)
+        return client
+
+
+def file_system(i, state='available'):
+    return dict(FileSystemId='fs-%03d' % i, LifeCycleState=state,
+                CreationTime=0, SizeInBytes=dict(Value=0))
+
+
+class AnsibleEfsRunConcurrently(unittest.TestCase):
+
+    def test_calls_func_for_every_item(self):
+        seen = []
+        efs_facts.run_concurrently(seen.append, range(100), 8)
+        self.assertEqual(sorted(seen), list(range(100)))
+
+    def test_runs_items_in_parallel(self):
+        lock = threading.Lock()
+        state = dict(running=0, peak=0)
+
+        def func(item):
+            lock.acquire()
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+            lock.release()
+            time.sleep(0.05)
+            lock.acquire()
+            state['running'] -= 1
+            lock.release()
+
+        efs_facts.run_concurrently(func, range(8), 4)
+        self.assertEqual(state['peak'], 4)
+
+    def test_raises_first_error(self):
+        def func(item):
+            if item == 3:
+                raise ValueError('item 3')
+
+        self.assertRaises(ValueError, efs_facts.run_concurrently, func, range(10), 2)
+
+    def test_no_items(self):
+        efs_facts.run_concurrently(None, [], 8)
+
+
+class AnsibleEfsCallWithBackoff(unittest.TestCase):
+
+    def setUp(self):
+        self.sleeps = []
+        self.saved_sleep = efs_facts.sleep
+        efs_facts.sleep = self.sleeps.append
+
+    def tearDown(self):
+        efs_facts.sleep = self.saved_sleep
+
+    def test_retries_while_throttled(self):
+        calls = []
+
+        def method(**kwargs):
+            calls.append(kwargs)
+            if len(calls) < 3:
+                raise throttled()
+            return 'done'
+
+        self.assertEqual(efs_facts.call_with_backoff(method, Marker='m'), 'done')
+        self.assertEqual(self.sleeps, [1, 2])
+        self.assertEqual(calls, [dict(Marker='m')] * 3)
+
+    def test_iterate_all_follows_markers(self):
+        pages = dict(
+            first=dict(Tags=[1, 2], NextMarker='second'),
+            second=dict(Tags=[3]),
+        )
+
+        def method(**kwargs):
+            return pages[kwargs.get('Marker', 'first')]
+
+        self.assertEqual(list(efs_facts.iterate_all('Tags', method, FileSystemId='fs-1', Marker=None)), [1, 2, 3])
+
+
+class AnsibleEfsGather(unittest.TestCase):
+
+    def test_gathers_from_a_client_per_thread(self):
+        file_systems = [file_system(i) for i in range(20)] + [file_system(20, 'creating')]
+        connection = FakeConnection(file_systems)
+        items = list(connection.get_file_systems(efs_facts.GATHER_ALL, 4))
+        self.assertEqual([item['FileSystemId'] for item in items],
+                         [fs['FileSystemId'] for fs in file_systems])
+        self.assertEqual(items[0]['Tags'], dict(Name='fs-000'))
+        self.assertEqual(items[0]['MountTargets'][0]['SecurityGroups'], ['sg-1'])
+        self.assertEqual(items[20]['Tags'], {})
+        self.assertEqual(items[20]['MountTargets'], [])
+        # One client for the listing and one per worker thread
+        self.assertTrue(2 <= len(connection.clients) <= 5)
+
+    def test_gather_only_tags(self):
+        connection = FakeConnection([file_system(1)])
+        items = list(connection.get_file_systems(['tags'], 4))
+        self.assertEqual(items[0]['Tags'], dict(Name='fs-001'))
+        self.assertFalse('MountTargets' in items[0])
+
+    def test_gather_security_groups_implies_mount_targets(self):
+        connection = FakeConnection([file_system(1)])
+        items = list(connection.get_file_systems(['security_groups'], 4))
+        self.assertEqual(items[0]['MountTargets'][0]['SecurityGroups'], ['sg-1'])
+        self.assertFalse('Tags' in items[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+#!/usr/bin/python
+
+import base64
+import gzip
+import json
+import unittest
+from StringIO import StringIO
+
+import botocore
+
+import cloud.amazon.route53_facts as route53_facts
+
+
+def zone_order(name):
+    labels = name.rstrip('.').split('.')
+    labels.reverse()
+    return labels
+
+
+def record_set(name, type='A'):
+    return {'Name': name, 'Type': type, 'TTL': 300,
+            'ResourceRecords': [{'Value': '192.0.2.1'}]}
+
+
+class FakeClient(object):
+    """list_resource_record_sets over a sorted zone, throttling the calls
+    whose index is in throttle."""
+
+    def __init__(self, record_sets, throttle=()):
+        self.record_sets = record_sets
+        self.throttle = throttle
+        self.calls = []
+
+    def list_resource_record_sets(self, **kwargs):
+        self.calls.append(dict(kwargs))
+        if len(self.calls) - 1 in self.throttle:
+            raise botocore.exceptions.ClientError(
+                {'Error': {'Code': 'Throttling', 'Message': 'Rate exceeded'}},
+                'ListResourceRecordSets')
+        start = 0
+        if 'StartRecordName' in kwargs:
+            first = zone_order(kwargs['StartRecordName'])
+            while start < len(self.record_sets) and zone_order(self.record_sets[start]['Name']) < first:
+                start += 1
+        end = start + int(kwargs['MaxItems'])
+        data = dict(ResourceRecordSets=self.record_sets[start:end],
+                    IsTruncated=end < len(self.record_sets))
+        if data['IsTruncated']:
+            data['NextRecordName'] = self.record_sets[end]['Name']
+            data['NextRecordType'] = self.record_sets[end]['Type']
+        return data
+
+
+class ModuleFail(Exception):
+    pass
+
+
+class FakeModule(object):
+    def __init__(self, **kwargs):
+        self.params = dict(
+            query='record_sets', hosted_zone_id='Z1', start_record_name=None,
+            type=None, max_items=None, all_pages=True, name_filter=None,
+            type_filter=None, compact=False, compress=False,
+        )
+        self.params.update(kwargs)
+
+    def jsonify(self, data):
+        return json.dumps(data)
+
+    def fail_json(self, **kwargs):
+        raise ModuleFail(kwargs['msg'])
+
+
+def zone(count):
+    # Ordered the way the API orders names, by reversed labels
+    names = ['example.com.']
+    names += ['host%03d.dev.example.com.' % i for i in range(count)]
+    names += ['www.example.com.']
+    return [record_set(name) for name in names]
+
+
+class AnsibleRoute53RecordNames(unittest.TestCase):
+
+    def test_record_name_glob(self):
+        self.assertEqual(route53_facts.record_name_glob('*.Dev.Example.com'),
+                         ('*.dev.example.com.', 'dev.example.com.'))
+        self.assertEqual(route53_facts.record_name_glob('www.example.com.'),
+                         ('www.example.com.', 'www.example.com.'))
+        self.assertEqual(route53_facts.record_name_glob('web?.example.com'),
+                         ('web?.example.com.', None))
+        self.assertEqual(route53_facts.record_name_glob('*')[0], '*.')
+        self.assertFalse(route53_facts.record_name_glob('*')[1])
+
+    def test_in_domain(self):
+        self.assertTrue(route53_facts.in_domain('dev.example.com.', 'dev.example.com.'))
+        self.assertTrue(route53_facts.in_domain('a.dev.example.com.', 'dev.example.com.'))
+        self.assertFalse(route53_facts.in_domain('adev.example.com.', 'dev.example.com.'))
+        self.assertFalse(route53_facts.in_domain('example.com.', 'dev.example.com.'))
+
+
+class AnsibleRoute53IterateRecordSets(unittest.TestCase):
+
+    def setUp(self):
+        self.sleeps = []
+        self.saved_sleep = route53_facts.time.sleep
+        route53_facts.time.sleep = self.sleeps.append
+
+    def tearDown(self):
+        route53_facts.time.sleep = self.saved_sleep
+
+    def test_follows_pages(self):
+        client = FakeClient(zone(1000))
+        names = [r['Name'] for r in route53_facts.iterate_record_sets(client, dict(HostedZoneId='Z1'), 100)]
+        self.assertEqual(names, [r['Name'] for r in zone(1000)])
+        self.assertEqual([c['MaxItems'] for c in client.calls], ['100', '200', '300', '300', '300'])
+        self.assertEqual(client.calls[1]['StartRecordName'], 'host099.dev.example.com.')
+
+    def test_throttling_keeps_page_size(self):
+        client = FakeClient(zone(1000), throttle=(1, 2))
+        names = [r['Name'] for r in route53_facts.iterate_record_sets(client, dict(HostedZoneId='Z1'), 100)]
+        self.assertEqual(len(names), 1002)
+        self.assertEqual([c['MaxItems'] for c in client.calls], ['100', '200', '200', '200', '300', '300', '300'])
+        self.assertEqual(self.sleeps, [1, 2])
+
+    def test_other_errors_are_raised(self):
+        def fail(**kwargs):
+            raise botocore.exceptions.ClientError(
+                {'Error': {'Code': 'NoSuchHostedZone', 'Message': 'No zone'}},
+                'ListResourceRecordSets')
+        client = FakeClient([])
+        client.list_resource_record_sets = fail
+        self.assertRaises(botocore.exceptions.ClientError, list,
+                          route53_facts.iterate_record_sets(client, dict(HostedZoneId='Z1'), 100))
+
+
+class AnsibleRoute53AllRecordSets(unittest.TestCase):
+
+    def test_all_pages(self):
+        client = FakeClient(zone(500))
+        results = route53_facts.all_record_sets_details(client, FakeModule())
+        self.assertEqual(results['RecordCount'], 502)
+        self.assertEqual(len(results['ResourceRecordSets']), 502)
+
+    def test_domain_filter_reads_only_the_domain(self):
+        client = FakeClient(zone(500))
+        results = route53_facts.all_record_sets_details(
+            client, FakeModule(name_filter='*.dev.example.com', compact=True))
+        self.assertEqual(results['RecordCount'], 500)
+        self.assertEqual(client.calls[0]['StartRecordName'], 'dev.example.com.')
+        self.assertEqual(results['ResourceRecordSets'][0],
+                         dict(name='host000.dev.example.com.', type='A', ttl=300, values=['192.0.2.1']))
+
+    def test_compress(self):
+        client = FakeClient(zone(10))
+        results = route53_facts.all_record_sets_details(
+            client, FakeModule(type_filter=['A'], compress=True))
+        data = gzip.GzipFile(fileobj=StringIO(base64.b64decode(results['ResourceRecordSetsCompressed']))).read()
+        self.assertEqual(len(json.loads(data)), 12)
+        self.assertFalse('ResourceRecordSets' in results)
+
+
+class AnsibleRoute53Options(unittest.TestCase):
+
+    def setUp(self):
+        self.saved_module = route53_facts.AnsibleModule
+
+    def tearDown(self):
+        route53_facts.AnsibleModule = self.saved_module
+
+    def run_main(self, **kwargs):
+        route53_facts.AnsibleModule = lambda **spec: FakeModule(**kwargs)
+        route53_facts.main()
+
+    def test_filters_need_all_pages(self):
+        for option, value in (('name_filter', '*.example.com'), ('type_filter', ['A']),
+                              ('compact', True), ('compress', True)):
+            params = {'all_pages': False, option: value}
+            try:
+                self.run_main(**params)
+            except ModuleFail as e:
+                self.assertEqual(str(e), '%s can only be used with all_pages' % option)
+            else:
+                self.fail('%s accepted without all_pages' % option)
+
+
+if __name__ == '__main__':
+    unittest.main()
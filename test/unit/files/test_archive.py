@@ -0,0 +1,167 @@
+#!/usr/bin/python
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import files.archive as archive
+
+
+class ModuleExit(Exception):
+    pass
+
+
+class FakeModule(object):
+    params = None
+    last = None
+
+    def __init__(self, **kwargs):
+        self.check_mode = False
+        self.result = None
+        FakeModule.last = self
+
+    def exit_json(self, **kwargs):
+        self.result = kwargs
+        raise ModuleExit()
+
+    def fail_json(self, **kwargs):
+        self.result = kwargs
+        raise ModuleExit()
+
+    def atomic_move(self, src, dest):
+        os.rename(src, dest)
+
+    def load_file_common_arguments(self, params):
+        return {}
+
+    def set_fs_attributes_if_different(self, file_args, changed):
+        return changed
+
+
+class AnsibleArchiveTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.src = os.path.join(self.tmpdir, 'src')
+        os.makedirs(os.path.join(self.src, 'sub'))
+        self.write('one', 'first\n')
+        self.write('sub/two', 'second\n' * 1000)
+        os.symlink('one', os.path.join(self.src, 'link'))
+        self.dest = os.path.join(self.tmpdir, 'out.tar.gz')
+        self.manifest_path = self.dest + '.manifest'
+        self.arcroot = self.tmpdir + os.sep
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, name, data):
+        f = open(os.path.join(self.src, name), 'w')
+        f.write(data)
+        f.close()
+
+    def build(self):
+        members = {}
+        successes, errors, throughput = archive.write_archive(
+            self.dest, 'gz', [self.src], self.arcroot, 2,
+            [self.manifest_path], members)
+        self.assertEqual(errors, [])
+        archive.write_manifest(FakeModule(), self.manifest_path, self.dest,
+                               'gz', self.arcroot, members)
+        return successes, members
+
+    def unchanged(self):
+        return archive.archive_unchanged(
+            archive.read_manifest(self.manifest_path), self.dest, 'gz',
+            [self.src], self.arcroot, [self.manifest_path])
+
+
+class AnsibleArchiveManifest(AnsibleArchiveTestCase):
+
+    def test_manifest_round_trip(self):
+        successes, members = self.build()
+        manifest = archive.read_manifest(self.manifest_path)
+        self.assertEqual(manifest['version'], 1)
+        self.assertEqual(manifest['format'], 'gz')
+        self.assertEqual(manifest['size'], os.path.getsize(self.dest))
+        self.assertEqual(sorted(manifest['members']), sorted(members))
+        self.assertEqual(manifest['members']['src/link'][4], 'one')
+
+    def test_read_manifest_missing_or_corrupt(self):
+        self.assertEqual(archive.read_manifest(self.manifest_path), None)
+        f = open(self.manifest_path, 'w')
+        f.write('{not json')
+        f.close()
+        self.assertEqual(archive.read_manifest(self.manifest_path), None)
+
+    def test_unchanged(self):
+        successes, members = self.build()
+        self.assertEqual(sorted(self.unchanged()), sorted(successes))
+
+    def test_touched_but_same_content(self):
+        self.build()
+        path = os.path.join(self.src, 'one')
+        st = os.stat(path)
+        os.utime(path, (st.st_atime, st.st_mtime + 10))
+        self.assertNotEqual(self.unchanged(), None)
+
+    def test_changed_content(self):
+        self.build()
+        self.write('one', 'FIRST\n')
+        self.assertEqual(self.unchanged(), None)
+
+    def test_added_member(self):
+        self.build()
+        self.write('three', 'third\n')
+        self.assertEqual(self.unchanged(), None)
+
+    def test_removed_member(self):
+        self.build()
+        os.remove(os.path.join(self.src, 'sub', 'two'))
+        self.assertEqual(self.unchanged(), None)
+
+    def test_other_format(self):
+        self.build()
+        self.assertEqual(archive.archive_unchanged(
+            archive.read_manifest(self.manifest_path), self.dest, 'bz2',
+            [self.src], self.arcroot, [self.manifest_path]), None)
+
+
+class AnsibleArchiveIncremental(AnsibleArchiveTestCase):
+
+    def setUp(self):
+        AnsibleArchiveTestCase.setUp(self)
+        self.saved_module = archive.AnsibleModule
+        archive.AnsibleModule = FakeModule
+
+    def tearDown(self):
+        archive.AnsibleModule = self.saved_module
+        AnsibleArchiveTestCase.tearDown(self)
+
+    def run_module(self, paths):
+        FakeModule.params = dict(
+            path=paths, format='gz', dest=self.dest, remove=False,
+            threads=1, incremental=True,
+        )
+        self.assertRaises(ModuleExit, archive.main)
+        return FakeModule.last.result
+
+    def test_second_run_unchanged(self):
+        result = self.run_module([self.src])
+        self.assertTrue(result['changed'])
+        result = self.run_module([self.src])
+        self.assertFalse(result['changed'])
+        self.assertEqual(result['state'], 'archive')
+
+    def test_second_run_keeps_incomplete(self):
+        paths = [self.src, os.path.join(self.tmpdir, 'missing')]
+        self.run_module(paths)
+        self.assertTrue(os.path.exists(self.manifest_path))
+        result = self.run_module(paths)
+        self.assertFalse(result['changed'])
+        self.assertEqual(result['state'], 'incomplete')
+        self.assertEqual(result['missing'], [paths[1]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+#!/usr/bin/python
+
+import os
+import tempfile
+import unittest
+
+import monitoring.nagios as nagios
+
+
+class ModuleExit(Exception):
+    pass
+
+
+class FakeModule(object):
+    def __init__(self):
+        self.result = None
+
+    def exit_json(self, **kwargs):
+        self.result = kwargs
+        raise ModuleExit()
+
+    def fail_json(self, **kwargs):
+        self.result = kwargs
+        raise ModuleExit()
+
+
+def nagios_params(**kwargs):
+    params = dict(
+        action=None, author='Ansible', comment='Scheduling downtime',
+        host=None, hosts=None, servicegroup=None, minutes=30,
+        cmdfile=None, command=None, services=None,
+    )
+    params.update(kwargs)
+    return params
+
+
+class AnsibleNagiosAct(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.cmdfile = tempfile.mkstemp()
+        os.close(fd)
+        self.module = FakeModule()
+
+    def tearDown(self):
+        os.remove(self.cmdfile)
+
+    def act(self, **kwargs):
+        ansible_nagios = nagios.Nagios(
+            self.module, **nagios_params(cmdfile=self.cmdfile, **kwargs)
+        )
+        self.assertRaises(ModuleExit, ansible_nagios.act)
+        f = open(self.cmdfile)
+        written = f.read()
+        f.close()
+        return self.module.result, written
+
+    def test_act_command(self):
+        result, written = self.act(
+            action='command', command='DISABLE_FAILURE_PREDICTION'
+        )
+        self.assertTrue(result['changed'])
+        self.assertEqual(len(result['nagios_commands']), 1)
+        self.assertTrue(
+            result['nagios_commands'][0].endswith('] DISABLE_FAILURE_PREDICTION')
+        )
+        self.assertTrue(written.endswith('DISABLE_FAILURE_PREDICTION\n'))
+
+    def test_act_silence_nagios(self):
+        result, written = self.act(action='silence_nagios')
+        self.assertEqual(len(result['nagios_commands']), 1)
+        self.assertTrue('DISABLE_NOTIFICATIONS' in written)
+
+    def test_act_servicegroup_host_downtime(self):
+        result, written = self.act(
+            action='servicegroup_host_downtime', servicegroup='web'
+        )
+        self.assertEqual(len(result['nagios_commands']), 1)
+        self.assertTrue('SCHEDULE_SERVICEGROUP_HOST_DOWNTIME;web;' in written)
+
+    def test_act_downtime_hosts(self):
+        result, written = self.act(
+            action='downtime', hosts=['web1', 'web2'], services='host'
+        )
+        self.assertEqual(len(result['nagios_commands']), 2)
+        self.assertTrue('SCHEDULE_HOST_DOWNTIME;web1;' in written)
+        self.assertTrue('SCHEDULE_HOST_DOWNTIME;web2;' in written)
+
+
+class AnsibleNagiosChunks(unittest.TestCase):
+
+    def test_chunk_commands_keeps_commands_whole(self):
+        commands = ['[1] COMMAND;%d\n' % i for i in range(100)]
+        chunks = list(nagios.chunk_commands(commands, 64))
+        self.assertEqual(''.join(chunks), ''.join(commands))
+        for chunk in chunks:
+            self.assertTrue(len(chunk) <= 64)
+            self.assertTrue(chunk.endswith('\n'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,189 @@
+#!/usr/bin/python
+
+import shlex
+import unittest
+
+import system.iptables as iptables
+
+
+class ModuleFail(Exception):
+    pass
+
+
+class FakeModule(object):
+    def __init__(self, **kwargs):
+        self.params = dict(
+            table='filter', state='present', action='append',
+            ip_version='ipv4', chain=None, protocol=None, source=None,
+            to_source=None, destination=None, to_destination=None, match=[],
+            jump=None, goto=None, in_interface=None, out_interface=None,
+            fragment=None, set_counters=None, source_port=None,
+            destination_port=None, to_ports=None, set_dscp_mark=None,
+            set_dscp_mark_class=None, comment=None, ctstate=[], limit=None,
+            limit_burst=None, uid_owner=None, reject_with=None,
+            icmp_type=None, flush=False, policy=None, rules=None,
+        )
+        self.params.update(kwargs)
+
+    def fail_json(self, **kwargs):
+        raise ModuleFail(kwargs['msg'])
+
+
+def rule_key(module, ip_version='ipv4', **kwargs):
+    params = dict(module.params)
+    params.update(kwargs)
+    return iptables.normalize_rule(iptables.construct_rule(params), ip_version)
+
+
+def saved_key(line, ip_version='ipv4'):
+    return iptables.normalize_rule(shlex.split(line)[2:], ip_version)
+
+
+SAVED = """# Generated by iptables-save
+*filter
+:INPUT ACCEPT [0:0]
+-A INPUT -p tcp -m tcp --dport 22 -j ACCEPT
+-A INPUT -s 8.8.8.8/32 -j DROP
+COMMIT
+*mangle
+:OUTPUT ACCEPT [0:0]
+-A OUTPUT -p tcp -j DSCP --set-dscp 0x08
+COMMIT
+"""
+
+
+class AnsibleIptablesNormalize(unittest.TestCase):
+
+    def setUp(self):
+        self.module = FakeModule(chain='INPUT')
+
+    def assertSaved(self, line, **kwargs):
+        self.assertEqual(rule_key(self.module, **kwargs), saved_key(line))
+
+    def test_implicit_protocol_match(self):
+        self.assertSaved(
+            '-A INPUT -p tcp -m tcp --dport 22 -j ACCEPT',
+            protocol='tcp', destination_port='22', jump='ACCEPT')
+
+    def test_host_prefix(self):
+        self.assertSaved('-A INPUT -s 8.8.8.8/32 -j DROP',
+                         source='8.8.8.8', jump='DROP')
+        self.assertEqual(
+            rule_key(self.module, 'ipv6', source='::1', jump='DROP'),
+            saved_key('-A INPUT -s ::1/128 -j DROP', 'ipv6'))
+
+    def test_dscp_mark(self):
+        self.assertSaved('-A OUTPUT -p tcp -j DSCP --set-dscp 0x08',
+                         protocol='tcp', jump='DSCP', set_dscp_mark='8')
+
+    def test_dscp_class(self):
+        self.assertSaved('-A OUTPUT -p tcp -j DSCP --set-dscp 0x08',
+                         protocol='tcp', jump='DSCP', set_dscp_mark_class='CS1')
+        self.assertSaved('-A OUTPUT -j DSCP --set-dscp 0x2e',
+                         jump='DSCP', set_dscp_mark_class='EF')
+        self.assertSaved('-A OUTPUT -j DSCP --set-dscp 0x0a',
+                         jump='DSCP', set_dscp_mark_class='AF11')
+
+    def test_icmp_type_name(self):
+        self.assertSaved(
+            '-A INPUT -p icmp -m icmp --icmp-type 8 -j ACCEPT',
+            protocol='icmp', icmp_type='echo-request', jump='ACCEPT')
+        self.assertSaved(
+            '-A INPUT -p icmp -m icmp --icmp-type 3/3 -j ACCEPT',
+            protocol='icmp', icmp_type='port-unreachable', jump='ACCEPT')
+        self.assertSaved(
+            '-A INPUT -p icmp -m icmp --icmp-type any -j ACCEPT',
+            protocol='icmp', icmp_type='any', jump='ACCEPT')
+
+    def test_limit(self):
+        self.assertSaved(
+            '-A INPUT -m limit --limit 5/sec -j ACCEPT',
+            limit='5', jump='ACCEPT')
+        self.assertSaved(
+            '-A INPUT -m limit --limit 1/sec -j ACCEPT',
+            limit='60/minute', jump='ACCEPT')
+        self.assertSaved(
+            '-A INPUT -m limit --limit 3/hour -j ACCEPT',
+            limit='3/h', limit_burst='5', jump='ACCEPT')
+        self.assertSaved(
+            '-A INPUT -m limit --limit 3/hour --limit-burst 10 -j ACCEPT',
+            limit_burst='10', jump='ACCEPT')
+
+    def test_reject_default(self):
+        self.assertSaved(
+            '-A INPUT -j REJECT --reject-with icmp-port-unreachable',
+            jump='REJECT')
+
+    def test_state_order(self):
+        self.assertSaved(
+            '-A INPUT -m state --state RELATED,ESTABLISHED -j ACCEPT',
+            ctstate=['ESTABLISHED', 'RELATED'], jump='ACCEPT')
+
+    def test_match_order_matters(self):
+        first = saved_key('-A INPUT -m comment --comment web -m state '
+                          '--state NEW -j ACCEPT')
+        second = saved_key('-A INPUT -m state --state NEW -m comment '
+                           '--comment web -j ACCEPT')
+        self.assertNotEqual(first, second)
+        self.assertSaved('-A INPUT -m comment --comment web -m state '
+                         '--state NEW -j ACCEPT',
+                         comment='web', ctstate=['NEW'], jump='ACCEPT')
+
+    def test_options_stay_with_their_match(self):
+        self.assertNotEqual(
+            saved_key('-A INPUT -p tcp -m tcp --dport 22 -j ACCEPT'),
+            saved_key('-A INPUT -p tcp -m tcp --sport 22 -j ACCEPT'))
+        self.assertNotEqual(
+            saved_key('-A INPUT -j ACCEPT'),
+            saved_key('-A INPUT -j DROP'))
+
+
+class AnsibleIptablesPlanRules(unittest.TestCase):
+
+    def plan(self, items, **kwargs):
+        module = FakeModule(**kwargs)
+        tables = iptables.parse_save(SAVED, 'ipv4')
+        return iptables.plan_rules(module, tables, items, 'ipv4')
+
+    def test_present_rules_are_unchanged(self):
+        order, commands = self.plan([
+            dict(protocol='tcp', destination_port=22, jump='ACCEPT'),
+            dict(source='8.8.8.8', jump='DROP'),
+            dict(table='mangle', chain='OUTPUT', protocol='tcp',
+                 jump='DSCP', set_dscp_mark_class='CS1'),
+        ], chain='INPUT')
+        self.assertEqual(order, [])
+        self.assertEqual(commands, {})
+
+    def test_append_insert_and_delete(self):
+        order, commands = self.plan([
+            dict(protocol='tcp', destination_port=443, jump='ACCEPT'),
+            dict(protocol='tcp', destination_port=80, jump='ACCEPT',
+                 action='insert'),
+            dict(protocol='tcp', destination_port=8080, jump='ACCEPT',
+                 action='insert'),
+            dict(source='8.8.8.8', jump='DROP', state='absent'),
+        ], chain='INPUT')
+        self.assertEqual(order, ['filter'])
+        self.assertEqual(commands['filter'], [
+            '-A INPUT -p tcp -j ACCEPT --destination-port 443',
+            '-I INPUT 1 -p tcp -j ACCEPT --destination-port 80',
+            '-I INPUT 2 -p tcp -j ACCEPT --destination-port 8080',
+            '-D INPUT -s 8.8.8.8/32 -j DROP',
+        ])
+
+    def test_repeated_item_is_planned_once(self):
+        item = dict(protocol='udp', destination_port=53, jump='ACCEPT')
+        order, commands = self.plan([item, dict(item)], chain='INPUT')
+        self.assertEqual(len(commands['filter']), 1)
+
+    def test_item_without_chain_fails(self):
+        self.assertRaises(ModuleFail, self.plan, [dict(jump='ACCEPT')])
+
+    def test_unsupported_option_fails(self):
+        self.assertRaises(ModuleFail, self.plan,
+                          [dict(chain='INPUT', flush=True)])
+
+
+if __name__ == '__main__':
+    unittest.main()